@@ -0,0 +1,178 @@
+# Csak hang mód benchmark: CPU használat egy helyi teszt HLS adáson (720p H.264 + AAC),
+# videóval, csak hanggal, valamint lejátszás közbeni ki/bekapcsolással (PlayerEngine.set_video).
+# A hang folytonosságát is ellenőrzi: a leghosszabb szünet két audio puffer között a váltásoknál,
+# és megszámolja a videó dekóder kimenetét is (csak hang módban 0 képkocka a várt érték).
+# Mindkét pipeline-on fut: playbin3 (a videó folyam kiválasztása megszűnik, a dekóder lebomlik)
+# és a régi playbin (csak a 'flags' videó bitje, a dekóder tovább fut).
+# GStreamer kell hozzá (x264enc, hlssink2, egy AAC kódoló, avdec_h264).
+# Futtatás a projekt gyökeréből: python3 benchmarks/bench_audio_only.py [mp/szakasz] [--display]
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from main import Gst, GLib, PlayerEngine
+from standin import StandinServer
+
+AAC_ENCODERS = ("avenc_aac", "voaacenc", "fdkaacenc", "faac")
+
+def make_hls(directory, seconds):
+    # Teszt adás: mozgó kép 1280x720@25 és szinusz hang, 2 mp-es szegmensek
+    aac = next((name for name in AAC_ENCODERS if Gst.ElementFactory.find(name)), None)
+    if aac is None:
+        raise SystemExit("Nincs AAC kódoló (gst-libav / plugins-bad)")
+    pipeline = Gst.parse_launch(
+        f"videotestsrc num-buffers={seconds * 25} pattern=ball ! video/x-raw,width=1280,height=720,framerate=25/1 ! "
+        f"x264enc speed-preset=ultrafast key-int-max=50 bitrate=3000 ! h264parse ! sink.video "
+        f"audiotestsrc num-buffers={seconds * 44100 // 1024} ! audioconvert ! {aac} ! aacparse ! sink.audio "
+        f"hlssink2 name=sink target-duration=2 playlist-length=0 max-files=0 "
+        f"location={directory}/seg%05d.ts playlist-location={directory}/playlist.m3u8")
+    pipeline.set_state(Gst.State.PLAYING)
+    msg = pipeline.get_bus().timed_pop_filtered(Gst.CLOCK_TIME_NONE, Gst.MessageType.EOS | Gst.MessageType.ERROR)
+    pipeline.set_state(Gst.State.NULL)
+    if msg.type == Gst.MessageType.ERROR:
+        raise SystemExit(f"HLS előállítási hiba: {msg.parse_error()[0].message}")
+
+class DecoderMonitor:
+    # A videó dekóderek kimenő képkockái (a playbin-be később bekerülő elemeken is)
+    def __init__(self):
+        self.frames = 0
+
+    def on_element_added(self, bin, sub_bin, element):
+        factory = element.get_factory()
+        if factory is None or "Decoder/Video" not in (factory.get_metadata("klass") or ""):
+            return
+        pad = element.get_static_pad("src")
+        if pad is not None:
+            pad.add_probe(Gst.PadProbeType.BUFFER, self.on_frame)
+
+    def on_frame(self, pad, info):
+        self.frames += 1
+        return Gst.PadProbeReturn.OK
+
+class AudioMonitor:
+    # Az audio sinkhez érkező pufferek ideje: a leghosszabb kimaradás a hang folytonosságát mutatja
+    def __init__(self):
+        self.last = None
+        self.max_gap = 0.0
+        self.buffers = 0
+
+    def on_handoff(self, sink, buffer, pad):
+        now = time.perf_counter()
+        if self.last is not None:
+            self.max_gap = max(self.max_gap, now - self.last)
+        self.last = now
+        self.buffers += 1
+
+    def reset(self):
+        self.last = None
+        self.max_gap = 0.0
+
+def run_loop(seconds, until=None):
+    context = GLib.MainContext.default()
+    end = time.time() + seconds
+    while time.time() < end:
+        context.iteration(True)
+        if until is not None and until():
+            return True
+    return False
+
+def cpu_time():
+    times = os.times()
+    return times.user + times.system
+
+def measure(name, seconds, monitor, decoders, action=None):
+    # action: a mérés elején végrehajtott váltás (a hangszünet mérése már fut); az első
+    # másodperc képkockái a váltás lecsengéséhez tartoznak, a dekódert utána számoljuk
+    monitor.reset()
+    wall, cpu = time.perf_counter(), cpu_time()
+    if action is not None:
+        action()
+    run_loop(1)
+    frames = decoders.frames
+    run_loop(seconds - 1)
+    frames = decoders.frames - frames
+    usage = (cpu_time() - cpu) / (time.perf_counter() - wall) * 100
+    print(f"{name:38s} CPU {usage:6.1f}% (egy mag = 100%), leghosszabb hangszünet {monitor.max_gap * 1000:6.0f} ms, "
+          f"dekódolt képkocka {frames / (seconds - 1):5.1f}/mp")
+    return usage
+
+def run_pipeline(factory, uri, seconds, display):
+    os.environ["GLADERADIO_PLAYBIN"] = factory
+    monitor = AudioMonitor()
+    decoders = DecoderMonitor()
+
+    def setup(playbin):
+        # Fejléc nélküli mérés: fakesink (sync=true, valós időben fogyaszt); --display esetén valódi kép
+        audio_sink = Gst.ElementFactory.make("fakesink", None)
+        audio_sink.set_property("sync", True)
+        audio_sink.set_property("signal-handoffs", True)
+        audio_sink.connect("handoff", monitor.on_handoff)
+        playbin.set_property("audio-sink", audio_sink)
+        if display:
+            playbin.set_property("video-sink", Gst.ElementFactory.make("autovideosink", None))
+        else:
+            video_sink = Gst.ElementFactory.make("fakesink", None)
+            video_sink.set_property("sync", True)
+            playbin.set_property("video-sink", video_sink)
+        playbin.connect("deep-element-added", decoders.on_element_added)
+        playbin.get_bus().add_signal_watch()
+
+    engine = PlayerEngine(setup)
+    print(f"--- {engine.video_factory} ---")
+
+    def start(video):
+        engine.play(uri, reusable=False, video=True)
+        if not video:
+            engine.set_video(False)
+        if not run_loop(20, lambda: engine.state == PlayerEngine.PLAYING):
+            raise SystemExit(f"Az adás nem indult el ({engine.state})")
+        run_loop(2) # Kezdeti töltés lecsengése
+
+    start(True)
+    with_video = measure("Videóval", seconds, monitor, decoders)
+    engine.stop()
+
+    start(False)
+    audio_only = measure("Csak hang (indulástól)", seconds, monitor, decoders)
+    engine.stop()
+
+    # Lejátszás közbeni váltások: a hang nem szakadhat meg
+    start(True)
+    measure("Videóval (váltás előtt)", seconds, monitor, decoders)
+    toggled = measure("Csak hang (lejátszás közben kapcsolva)", seconds, monitor, decoders, lambda: engine.set_video(False))
+    measure("Videó vissza", seconds, monitor, decoders, lambda: engine.set_video(True))
+    engine.stop()
+    run_loop(1)
+    print(f"Megtakarítás csak hang módban: {with_video - audio_only:.1f} százalékpont "
+          f"({100 * (1 - audio_only / max(with_video, 0.01)):.0f}%), lejátszás közbeni kapcsolással: "
+          f"{100 * (1 - toggled / max(with_video, 0.01)):.0f}%")
+
+def main():
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1].isdigit() else 15
+    display = "--display" in sys.argv
+    Gst.init(None)
+    factories = [name for name in ("playbin3", "playbin") if Gst.ElementFactory.find(name)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print("Teszt HLS adás készítése...")
+        make_hls(tmp, seconds * 5 + 10) # Minden indítás az elejéről játssza
+
+        def serve(headers, path, query):
+            name = os.path.basename(path)
+            with open(os.path.join(tmp, name), "rb") as f:
+                body = f.read()
+            content_type = "application/vnd.apple.mpegurl" if name.endswith(".m3u8") else "video/mp2t"
+            return 200, {"Content-Type": content_type}, body
+
+        server = StandinServer({"/hls/": serve}, compress=False).start()
+        for factory in factories:
+            run_pipeline(factory, f"{server.url}/hls/playlist.m3u8", seconds, display)
+        server.stop()
+
+if __name__ == "__main__":
+    main()
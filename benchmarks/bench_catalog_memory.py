@@ -0,0 +1,63 @@
+# Memória benchmark: a régi dict-lista vs. az oszlopos StationCatalog
+# Futtatás a projekt gyökeréből: python3 benchmarks/bench_catalog_memory.py [cache.json.bz2]
+import bz2
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from main import StationCatalog
+
+def load_records(path):
+    with bz2.open(path, "rt") as f:
+        data = json.load(f)
+    return data.get('radios', []) if isinstance(data, dict) else data
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak, elapsed
+
+def build_dict_list(path):
+    # A korábbi on_radios_loaded viselkedése: nyers dict-ek + deduplikált másolat
+    radios = load_records(path)
+    unique_radios = {}
+    for radio in radios:
+        if 'lastcheckok' in radio and str(radio['lastcheckok']) == '0':
+            continue
+        uuid = radio.get('stationuuid')
+        if uuid and uuid not in unique_radios:
+            unique_radios[uuid] = radio
+    return list(unique_radios.values())
+
+def build_catalog(path):
+    records = load_records(path)
+    catalog = StationCatalog.from_records(records)
+    del records
+    return catalog
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "radios_cache.json.bz2")
+    print(f"Forrás: {path}")
+
+    for label, build in (("dict-lista", build_dict_list), ("StationCatalog", build_catalog)):
+        result, current, peak, elapsed = measure(lambda: build(path))
+        count = len(result)
+        print(f"{label:>15}: {count} állomás, megtartott {current / 1024 / 1024:7.1f} MB "
+              f"({current / max(count, 1):6.0f} B/állomás), csúcs {peak / 1024 / 1024:7.1f} MB, "
+              f"{elapsed:5.2f} s")
+        del result
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# HTTP kliens benchmark helyi stand-in szerverrel: kapcsolatok és átvitt bájtok száma
+# csupasz requests.get vs. a közös HttpClient (keep-alive + ETag/If-Modified-Since újraellenőrzés).
+# Futtatás a projekt gyökeréből: python3 benchmarks/bench_http_client.py
+import hashlib
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+from main import HttpClient
+from standin import StandinServer
+
+LOGO_COUNT = 200
+LOGO_BODY = os.urandom(12 * 1024) # Egy tipikus favicon mérete
+PLAYLIST_BODY = b"[playlist]\nFile1=http://127.0.0.1/stream\nNumberOfEntries=1\n"
+
+def static_route(body, content_type):
+    etag = '"%s"' % hashlib.md5(body).hexdigest()
+    def handler(headers, path, query):
+        if headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        return 200, {"Content-Type": content_type, "ETag": etag, "Last-Modified": "Mon, 01 Dec 2025 10:00:00 GMT"}, body
+    return handler
+
+def run(label, server, fetch, urls):
+    server.reset_counters()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        statuses = list(pool.map(fetch, urls))
+    print(f"{label:>34}: {server.requests:4d} kérés, {server.connections:4d} kapcsolat, "
+          f"{server.bytes_sent / 1024:8.1f} KiB átvitel, státuszok: {sorted(set(statuses))}")
+    return server.connections, server.bytes_sent
+
+def main():
+    server = StandinServer({
+        "/logo/": static_route(LOGO_BODY, "image/png"),
+        "/list.pls": static_route(PLAYLIST_BODY * 20, "audio/x-scpls"),
+    }).start()
+    logo_urls = [f"{server.url}/logo/{i}.png" for i in range(LOGO_COUNT)]
+    playlist_urls = [f"{server.url}/list.pls"] * 50
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client = HttpClient(os.path.join(tmp, "validators.json"))
+
+        bare_conn, _ = run("requests.get (logók)", server, lambda url: requests.get(url, timeout=5).status_code, logo_urls)
+        pooled_conn, full_bytes = run("HttpClient (logók)", server, lambda url: client.get(url).status_code, logo_urls)
+        _, revalidate_bytes = run("HttpClient újraellenőrzés (logók)", server,
+                                  lambda url: client.get(url, revalidate=True).status_code, logo_urls)
+        run("HttpClient.fetch_text (playlist)", server, lambda url: client.fetch_text(url) is not None, playlist_urls)
+
+        client.save(force=True)
+        assert pooled_conn < bare_conn, "A keep-alive poolnak kevesebb kapcsolatot kell nyitnia"
+        assert revalidate_bytes < full_bytes / 10, "A 304 válaszoknak nem szabad újra átvinniük a törzset"
+        print(f"Kliens statisztika: {client.stats()}")
+
+    server.stop()
+
+if __name__ == "__main__":
+    main()
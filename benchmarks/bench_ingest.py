@@ -0,0 +1,81 @@
+# Első indítás benchmark: a teljes katalógus letöltése egy lassított helyi szerverről.
+# Régi út (resp.json() + bz2 cache írás + katalógus építés) vs. folyamatos feldolgozás
+# (+ bináris cache írás):
+# mennyi idő múlva jelenhet meg az első kártya, és mekkora a memóriacsúcs.
+# Futtatás a projekt gyökeréből: python3 benchmarks/bench_ingest.py [cache.json.bz2] [KiB/s]
+import bz2
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from main import CatalogFile, CatalogSync, HttpClient, MirrorManager, StationCatalog
+from standin import StandinServer
+
+def load_records(path):
+    with bz2.open(path, "rt") as f:
+        data = json.load(f)
+    return data.get('radios', []) if isinstance(data, dict) else data
+
+def run_buffered(server, cache_path):
+    # A korábbi viselkedés: a teljes válasz bevárása, majd egyben feldolgozás
+    http = HttpClient()
+    start = time.perf_counter()
+    resp = http.get(f"{server.url}/json/stations?limit=100000", timeout=60)
+    records = resp.json()
+    with bz2.open(cache_path, "wt", encoding="utf-8") as f:
+        json.dump({'radios': records}, f)
+    catalog = StationCatalog.from_records(records)
+    first_card = time.perf_counter() - start
+    return catalog, first_card, first_card
+
+def run_streaming(server, cache_path):
+    http = HttpClient()
+    sync = CatalogSync(http, MirrorManager(http, servers=[server.url]))
+    start = time.perf_counter()
+    first = []
+    def on_chunk(catalog):
+        if not first:
+            first.append(time.perf_counter() - start)
+    catalog, state = sync.fetch_full_stream(on_chunk=on_chunk)
+    CatalogFile.save(catalog, state, cache_path)
+    total = time.perf_counter() - start
+    return catalog, first[0] if first else total, total
+
+def measure(name, run, server, cache_path):
+    tracemalloc.start()
+    catalog, first_card, total = run(server, cache_path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # A cache visszaolvasható és ugyanazt a katalógust adja
+    if cache_path.endswith(".bin"):
+        assert len(CatalogFile.load(cache_path)[0]) == len(catalog)
+    else:
+        assert len(StationCatalog.from_records(load_records(cache_path))) == len(catalog)
+    print(f"{name:12s} első kártya {first_card * 1000:8.0f} ms, kész {total * 1000:8.0f} ms, "
+          f"memóriacsúcs {peak / 2**20:7.1f} MiB, {len(catalog)} állomás")
+    return catalog
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "radios_cache.json.bz2")
+    bandwidth = int(sys.argv[2]) * 1024 if len(sys.argv) > 2 else 4 * 2**20
+    body = json.dumps(load_records(path)).encode()
+    routes = {"/json/stations": lambda headers, p, query: (200, {"Content-Type": "application/json"}, body)}
+    # Tömörítés nélkül, hogy a sávszélesség korlát a nyers JSON méretére vonatkozzon
+    server = StandinServer(routes, compress=False, bandwidth=bandwidth).start()
+    print(f"Válasz: {len(body) / 2**20:.1f} MiB, sávszélesség {bandwidth / 2**20:.1f} MiB/s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old = measure("Régi út", run_buffered, server, os.path.join(tmp, "old.json.bz2"))
+        new = measure("Folyamatos", run_streaming, server, os.path.join(tmp, "new.bin"))
+    assert [row['stationuuid'] for row in old] == [row['stationuuid'] for row in new]
+    server.stop()
+
+if __name__ == "__main__":
+    main()
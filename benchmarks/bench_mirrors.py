@@ -0,0 +1,94 @@
+# Radio Browser tükrök benchmark helyi szerverekkel (injektált késleltetés és hibák):
+# felderítés + párhuzamos késleltetés mérés, a leggyorsabb kiválasztása, átállás kieső tükörnél,
+# valamint a lapozott szinkron kérések eloszlása az egészséges tükrök között.
+# Futtatás a projekt gyökeréből: python3 benchmarks/bench_mirrors.py [cache.json.bz2]
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from main import CatalogSync, HttpClient, MirrorManager
+from bench_sync import FakeRadioBrowser, load_records
+from standin import StandinServer
+
+# név -> (késleltetés mp, hibaarány)
+MIRRORS = {
+    "gyors": (0.01, 0.0),
+    "közepes": (0.05, 0.0),
+    "lassú": (0.4, 0.0),
+    "halott": (0.0, 1.0),
+}
+
+def requests_by_mirror(servers):
+    return ", ".join(f"{name} {server.requests}" for name, server in servers.items())
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "radios_cache.json.bz2")
+    base = load_records(path)[:5000]
+    fake = FakeRadioBrowser(base)
+
+    def stats(headers, p, query):
+        return 200, {"Content-Type": "application/json"}, b'{"stations": 5000}'
+
+    servers = {}
+    for name, (latency, fail_rate) in MIRRORS.items():
+        routes = dict(fake.routes(), **{"/json/stats": stats})
+        servers[name] = StandinServer(routes, latency=latency, fail_rate=fail_rate).start()
+    names = {server.url: name for name, server in servers.items()}
+    listing = json.dumps([{"name": server.url} for server in servers.values()]).encode()
+    discovery = StandinServer({"/json/servers": lambda h, p, q: (200, {"Content-Type": "application/json"}, listing)}).start()
+
+    http = HttpClient()
+    mirrors = MirrorManager(http, discovery_url=f"{discovery.url}/json/servers")
+    sync = CatalogSync(http, mirrors)
+
+    # Felderítés és mérés: párhuzamosan, így a lassú tükör nem adódik hozzá a többihez
+    start = time.perf_counter()
+    ranking = mirrors.probe()
+    probe_s = time.perf_counter() - start
+    serial_s = sum(latency for latency, _ in MIRRORS.values())
+    print(f"Felderítés + mérés: {probe_s * 1000:.0f} ms (egymás után legalább {serial_s * 1000:.0f} ms)")
+    print("Rangsor: " + ", ".join(f"{names[url]} {latency * 1000:.0f} ms" if latency is not None else f"{names[url]} hibás"
+                                  for url, latency in ranking))
+    assert names[mirrors.best()] == "gyors"
+
+    # Teljes letöltés a leggyorsabbról
+    catalog, state = sync.fetch_full_stream()
+    print(f"Teljes letöltés: {names[sync.last_stats['mirror']]} tükörről, {sync.last_stats['fetch_s'] * 1000:.0f} ms, {len(catalog)} állomás")
+
+    # A leggyorsabb kiesik: az első kérés hibája után a következő tükör veszi át
+    servers["gyors"].fail_rate = 1.0
+    catalog, _ = sync.fetch_full_stream()
+    print(f"Kiesés után:     {names[sync.last_stats['mirror']]} tükörről, {sync.last_stats['fetch_s'] * 1000:.0f} ms, "
+          f"{mirrors.stats()['failovers']} átállás")
+    assert names[sync.last_stats['mirror']] != "gyors"
+    servers["gyors"].fail_rate = 0.0
+
+    # Lapozott inkrementális szinkron: a lapok az egészséges tükrök között oszlanak el
+    for server in servers.values():
+        server.reset_counters()
+    mirrors.probe()
+    sync.PAGE_SIZE = 50
+    changes, removed, _ = sync.fetch_changes(CatalogSync.state_from_records(base))
+    print(f"Inkrementális (50-es lapok): {len(changes)} változás, {len(removed)} hibás, "
+          f"{sync.last_stats['fetch_s'] * 1000:.0f} ms; kérések: {requests_by_mirror(servers)}")
+    assert len(changes) == len(fake.log)
+    assert sum(1 for name in ("gyors", "közepes", "lassú") if servers[name].requests) > 1
+
+    # Összehasonlítás: egyetlen rögzített (most éppen halott) tükörrel a betöltés hibával áll le
+    single = CatalogSync(http, MirrorManager(http, servers=[servers["halott"].url]))
+    try:
+        single.fetch_full_stream()
+        print("Egyetlen tükör: sikerült")
+    except Exception as e:
+        print(f"Egyetlen halott tükör: hiba ({type(e).__name__}) - a régi viselkedés")
+
+    for server in list(servers.values()) + [discovery]:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
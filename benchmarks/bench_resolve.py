@@ -0,0 +1,82 @@
+# Playlist feloldás benchmark egy lassított helyi szerverrel (.pls playlistek + audio streamek):
+# kattintástól az első audio bájtig eltelt idő cache nélkül (minden kattintás felold),
+# a feloldott URL-ek cache-ével (ismételt lejátszás) és háttér előfeloldás után (látható kártyák).
+# A GStreamer indítása mindhárom esetben ugyanannyi, ezért az első audio bájtig mérünk.
+# Futtatás a projekt gyökeréből: python3 benchmarks/bench_resolve.py [késleltetés ms] [állomások]
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from main import HttpClient, StreamResolver
+from standin import StandinServer
+
+AUDIO = bytes(range(256)) * 256 # 64 KiB "audio"
+
+def first_audio(http, resolver, uuid, url, cached):
+    # Kattintás: feloldás (cache-sel vagy anélkül), majd az első audio bájt
+    start = time.perf_counter()
+    resolved = resolver.resolve(uuid, url) if cached else resolver.resolve_url(url)
+    resp = http.get(resolved, timeout=10, stream=True)
+    next(resp.iter_content(4096))
+    resp.close()
+    return time.perf_counter() - start
+
+def report(name, samples):
+    samples = sorted(samples)
+    print(f"{name:28s} medián {statistics.median(samples) * 1000:7.1f} ms, "
+          f"p90 {samples[int(len(samples) * 0.9) - 1] * 1000:7.1f} ms")
+
+def main():
+    latency = int(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.15
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 24
+    server = None
+
+    def playlist(headers, path, query):
+        i = path.rsplit('/', 1)[1].split('.')[0]
+        body = f"[playlist]\nNumberOfEntries=1\nFile1={server.url}/stream/{i}\n".encode()
+        return 200, {"Content-Type": "audio/x-scpls"}, body
+
+    def stream(headers, path, query):
+        return 200, {"Content-Type": "audio/mpeg"}, AUDIO
+
+    server = StandinServer({"/pls/": playlist, "/stream/": stream}, latency=latency, compress=False).start()
+    stations = [(f"uuid-{i}", f"{server.url}/pls/{i}.pls") for i in range(count)]
+    print(f"Szerver késleltetés {latency * 1000:.0f} ms/kérés, {count} állomás")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "resolved_streams.json")
+        http = HttpClient()
+        resolver = StreamResolver(http, path)
+
+        # Régi út: minden kattintás (az ismételt is) letölti a playlistet
+        report("Cache nélkül", [first_audio(http, resolver, uuid, url, False) for uuid, url in stations])
+
+        # Első kattintás cache-sel: ugyanaz, de az eredmény megmarad
+        report("Cache, első kattintás", [first_audio(http, resolver, uuid, url, True) for uuid, url in stations])
+        report("Cache, ismételt lejátszás", [first_audio(http, resolver, uuid, url, True) for uuid, url in stations])
+
+        # Új munkamenet: a cache lemezről töltődik
+        resolver.save()
+        resolver = StreamResolver(http, path)
+        report("Cache, új munkamenet", [first_audio(http, resolver, uuid, url, True) for uuid, url in stations])
+
+        # Előfeloldás: a "látható kártyák" playlistjei párhuzamosan, a kattintás előtt
+        resolver = StreamResolver(HttpClient(), os.path.join(tmp, "fresh.json"))
+        start = time.perf_counter()
+        resolver.prefetch('visible', stations)
+        while resolver.stats()['prefetched'] < count:
+            time.sleep(0.005)
+        prefetch_s = time.perf_counter() - start
+        report("Előfeloldás után", [first_audio(http, resolver, uuid, url, True) for uuid, url in stations])
+        print(f"Előfeloldás: {count} playlist {prefetch_s * 1000:.0f} ms alatt (egymás után ~{count * latency * 1000:.0f} ms)")
+        print(f"Statisztika: {resolver.stats()}")
+    server.stop()
+
+if __name__ == "__main__":
+    main()
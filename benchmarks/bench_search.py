@@ -0,0 +1,63 @@
+# Keresési benchmark: billentyűleütésenkénti késleltetés trigram indexszel vs. lineáris kereséssel
+# Futtatás a projekt gyökeréből: python3 benchmarks/bench_search.py [cache.json.bz2]
+import bz2
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from main import StationCatalog, SearchIndex
+
+QUERIES = ["rock", "jazz", "classic", "hungary", "radio 1", "bbc", "dance wave", "news"]
+
+def load_catalog(path):
+    with bz2.open(path, "rt") as f:
+        data = json.load(f)
+    records = data.get('radios', []) if isinstance(data, dict) else data
+    return StationCatalog.from_records(records)
+
+def linear_scan(catalog, query):
+    # A korábbi filter_radios keresése: minden leütésnél .lower() minden állomásra
+    names = catalog.column('name')
+    tags = catalog.column('tags')
+    return [i for i in range(len(catalog)) if query in names[i].lower() or query in tags[i].lower()]
+
+def type_query(search, word):
+    timings = []
+    result = None
+    for n in range(1, len(word) + 1):
+        start = time.perf_counter()
+        result = search(word[:n])
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, result
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "radios_cache.json.bz2")
+    catalog = load_catalog(path)
+    print(f"Katalógus: {len(catalog)} állomás")
+
+    start = time.perf_counter()
+    index = SearchIndex(catalog)
+    print(f"Index építése: {time.perf_counter() - start:.2f} s, {len(index.postings)} trigram")
+
+    print(f"{'lekérdezés':>12} | {'lineáris átl/max ms':>20} | {'index átl/max ms':>18} | találat")
+    scan_all = []
+    index_all = []
+    for word in QUERIES:
+        scan_times, scan_result = type_query(lambda q: linear_scan(catalog, q), word)
+        index.last_query = index.last_result = None # Új szó: nincs szűkíthető előző eredmény
+        index_times, index_result = type_query(index.search, word)
+        assert list(scan_result) == list(index_result), word
+        scan_all += scan_times
+        index_all += index_times
+        print(f"{word:>12} | {sum(scan_times) / len(scan_times):9.2f} / {max(scan_times):8.2f} | "
+              f"{sum(index_times) / len(index_times):8.2f} / {max(index_times):7.2f} | {len(index_result)}")
+
+    print(f"{'összesen':>12} | {sum(scan_all) / len(scan_all):9.2f} / {max(scan_all):8.2f} | "
+          f"{sum(index_all) / len(index_all):8.2f} / {max(index_all):7.2f} |")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# Indulási benchmark: a katalógus cache betöltése a régi bz2 JSON-ból vs. a bináris formátumból.
+# Minden mérés külön folyamatban fut (tiszta memória); a "hideg" mérés előtt a fájl kikerül
+# a lapgyorsítótárból (posix_fadvise DONTNEED, ahol elérhető). Az első képernyőhöz szükséges
+# oszlopok (név, logó, ország, kodek, bitráta) is betöltődnek.
+# Futtatás a projekt gyökeréből: python3 benchmarks/bench_startup.py [cache.json.bz2]
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FIRST_SCREEN = ('stationuuid', 'name', 'favicon', 'country', 'codec', 'bitrate')
+RUNS = 3
+
+def drop_cache(path):
+    # Hideg indítás közelítése: a fájl lapjainak eldobása az OS gyorsítótárából
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    with open(path, "rb") as f:
+        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+    return True
+
+def rss_kib():
+    # Aktuális RSS (Linux: /proc/self/statm), máshol a maximális RSS
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def child(kind, path):
+    # Gyermek folyamat: betöltés + az első képernyő oszlopai, majd idő és RSS növekmény kiírása
+    import time
+    from main import CatalogFile
+    base_rss = rss_kib()
+    start = time.perf_counter()
+    if kind == "bin":
+        catalog, _ = CatalogFile.load(path)
+    else:
+        catalog, _ = CatalogFile.migrate(path)
+    for key in FIRST_SCREEN:
+        catalog.column(key)
+    elapsed = time.perf_counter() - start
+    rss = rss_kib() - base_rss
+    print(f"{elapsed} {rss} {len(catalog)}")
+
+def measure(kind, path, cold):
+    times = []
+    for _ in range(RUNS):
+        if cold:
+            drop_cache(path)
+        out = subprocess.run([sys.executable, __file__, "--child", kind, path],
+                             capture_output=True, text=True, check=True).stdout.split()
+        times.append(float(out[0]))
+    return min(times), int(out[1]), int(out[2])
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3])
+        return
+    from main import CatalogFile
+
+    source = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "radios_cache.json.bz2")
+    with tempfile.TemporaryDirectory() as tmp:
+        binary = os.path.join(tmp, "radios_cache.bin")
+        catalog, state = CatalogFile.migrate(source)
+        CatalogFile.save(catalog, state, binary)
+        print(f"Méret: bz2 JSON {os.path.getsize(source) / 2**20:.1f} MiB, bináris {os.path.getsize(binary) / 2**20:.1f} MiB, "
+              f"{len(catalog)} állomás")
+        for label, kind, path in (("bz2 JSON", "json", source), ("Bináris", "bin", binary)):
+            for cold in (True, False):
+                elapsed, rss, count = measure(kind, path, cold)
+                assert count == len(catalog)
+                print(f"{label:9s} {'hideg' if cold else 'meleg':6s} {elapsed * 1000:8.1f} ms, RSS +{rss / 1024:6.1f} MiB")
+
+if __name__ == "__main__":
+    main()
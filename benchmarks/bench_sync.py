@@ -0,0 +1,110 @@
+# Katalógus szinkron benchmark egy helyi, hamis Radio Browser szerverrel:
+# teljes letöltés vs. inkrementális ('stations/changed') szinkron - átvitt bájtok és összefésülési idő.
+# Futtatás a projekt gyökeréből: python3 benchmarks/bench_sync.py [cache.json.bz2]
+import bz2
+import json
+import os
+import random
+import sys
+import uuid as uuidlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from main import CatalogSync, HttpClient, MirrorManager, StationCatalog
+from standin import StandinServer
+
+CHANGED = 500
+ADDED = 200
+BROKEN = 100
+
+def load_records(path):
+    with bz2.open(path, "rt") as f:
+        data = json.load(f)
+    return data.get('radios', []) if isinstance(data, dict) else data
+
+class FakeRadioBrowser:
+    # A 'base' állapot után CHANGED módosítás, ADDED új és BROKEN hibássá vált állomás
+    def __init__(self, base):
+        rng = random.Random(42)
+        self.base = base
+        latest = max(r.get('lastchangetime') or '' for r in base)
+        self.log = []
+        for i, radio in enumerate(rng.sample(base, CHANGED)):
+            changed = dict(radio, votes=radio.get('votes', 0) + 1000, name=radio.get('name', '') + " (új)")
+            self.log.append(self._stamp(changed, latest, i))
+        for i in range(ADDED):
+            added = dict(rng.choice(base), stationuuid=str(uuidlib.uuid4()), name=f"Új állomás {i}")
+            self.log.append(self._stamp(added, latest, CHANGED + i))
+        self.broken = [dict(radio, lastcheckok=0) for radio in rng.sample(base, BROKEN)]
+        self.positions = {change['changeuuid']: i for i, change in enumerate(self.log)}
+
+        current = {r['stationuuid']: r for r in base}
+        for change in self.log:
+            current[change['stationuuid']] = change
+        for radio in self.broken:
+            current[radio['stationuuid']] = radio
+        self.full = list(current.values())
+
+    @staticmethod
+    def _stamp(record, latest, i):
+        record['changeuuid'] = str(uuidlib.uuid4())
+        record['lastchangetime'] = f"{latest[:10]} 23:{i // 60 % 60:02d}:{i % 60:02d}" if latest else ""
+        return record
+
+    def routes(self):
+        def reply(payload):
+            return 200, {"Content-Type": "application/json"}, json.dumps(payload).encode()
+
+        def stations(headers, path, query):
+            if path.endswith("/changed"):
+                start = self.positions.get(query.get('lastchangeuuid'), -1) + 1
+                return reply(self.log[start:start + int(query.get('limit', 10000))])
+            if path.endswith("/broken"):
+                return reply(self.broken)
+            return reply(self.full[:int(query.get('limit', 100000))])
+        return {"/json/stations": stations}
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "radios_cache.json.bz2")
+    base = load_records(path)
+    fake = FakeRadioBrowser(base)
+    server = StandinServer(fake.routes()).start()
+    http = HttpClient()
+    sync = CatalogSync(http, MirrorManager(http, servers=[server.url]))
+
+    # Teljes letöltés (mint az első indításkor)
+    server.reset_counters()
+    full_catalog, _ = sync.fetch_full_stream()
+    full_bytes = server.bytes_sent
+    print(f"Teljes letöltés: {full_bytes / 1024:9.1f} KiB a hálózaton, letöltés és katalógus építés "
+          f"{sync.last_stats['fetch_s']:.2f} s, {len(full_catalog)} állomás")
+
+    # Inkrementális szinkron a régi állapotból
+    catalog = StationCatalog.from_records(base)
+    state = CatalogSync.state_from_records(base)
+    server.reset_counters()
+    merged, new_state = sync.sync(catalog, state)
+    stats = sync.last_stats
+    incremental_bytes = server.bytes_sent
+    print(f"Inkrementális:   {server.bytes_sent / 1024:9.1f} KiB a hálózaton, letöltés {stats['fetch_s']:.2f} s, "
+          f"összefésülés {stats['merge_s']:.2f} s, {stats['changes']} változás, {stats['removed']} hibás")
+
+    # Ellenőrzés: az összefésült katalógus egyezik a teljes letöltéssel
+    expected = {row['stationuuid']: row.to_dict() for row in full_catalog}
+    actual = {row['stationuuid']: row.to_dict() for row in merged}
+    assert expected.keys() == actual.keys(), "Eltérő állomás halmaz"
+    assert all(expected[key]['name'] == actual[key]['name'] and expected[key]['votes'] == actual[key]['votes'] for key in expected)
+    assert new_state['lastchangeuuid'] == fake.log[-1]['changeuuid']
+
+    # Második szinkron: nincs új változás
+    server.reset_counters()
+    again, _ = sync.sync(merged, new_state)
+    assert again is None or len(again) == len(merged)
+    print(f"Üres szinkron:   {server.bytes_sent / 1024:9.1f} KiB a hálózaton")
+    print(f"Megtakarítás: {100 * (1 - incremental_bytes / max(full_bytes, 1)):.1f}% átvitt bájt")
+    server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# Gyors csatornaváltás stressz teszt egy helyi stand-in szerverrel (.pls playlistek változó
+# késleltetéssel): több száz váltás egymás után, majd ellenőrzés, hogy a lejátszóhoz végül
+# a legutolsó kattintás állomása jutott-e el, és mennyi szál futott egyszerre.
+# Régi út: kattintásonként új szál, "aki utoljára végez, az nyer" - új út: PlaybackQueue.
+# Futtatás a projekt gyökeréből: python3 benchmarks/bench_zap.py [váltások] [körök]
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from main import HttpClient, PlaybackQueue, StreamResolver
+from standin import StandinServer
+
+STATIONS = 40
+
+class MainLoop:
+    # A GTK fő ciklus helyett: a dispatch-elt hívások ezen a szálon futnak le
+    def __init__(self):
+        self.calls = queue.Queue()
+
+    def dispatch(self, func, *args):
+        self.calls.put((func, args))
+
+    def run_pending(self, timeout=0.0):
+        try:
+            while True:
+                func, args = self.calls.get(timeout=timeout)
+                func(*args)
+                timeout = 0.0
+        except queue.Empty:
+            pass
+
+def client_threads():
+    # A (folyamaton belüli) stand-in szerver kapcsolatonkénti szálai nem számítanak
+    return sum(1 for thread in threading.enumerate() if "process_request" not in thread.name)
+
+class ThreadSampler:
+    def __init__(self):
+        self.baseline = client_threads()
+        self.peak = self.baseline
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while self.running:
+            self.peak = max(self.peak, client_threads())
+            time.sleep(0.001)
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+        return self.peak - self.baseline - 1 # a mintavevő szál nélkül
+
+def run_old(stations, zaps, resolver):
+    # Kattintásonként új szál (régi start_playback_async), a fő szálon az utolsó érkező nyer
+    loop = MainLoop()
+    played = []
+    sampler = ThreadSampler()
+    threads = []
+    for radio in zaps:
+        def work(radio=radio):
+            url = resolver.resolve_url(radio['url'])
+            loop.dispatch(played.append, (radio['stationuuid'], url))
+        thread = threading.Thread(target=work, daemon=True)
+        thread.start()
+        threads.append(thread)
+        loop.run_pending()
+        time.sleep(random.uniform(0, 0.004))
+    for thread in threads:
+        thread.join()
+    loop.run_pending()
+    return played[-1][0], sampler.stop(), len(played)
+
+def run_new(stations, zaps, resolver):
+    loop = MainLoop()
+    played = []
+
+    def prepare(radio, cancelled):
+        if cancelled():
+            return None
+        return resolver.resolve(radio['stationuuid'], radio['url'], cancelled)
+
+    playback = PlaybackQueue(prepare, lambda radio, url: played.append((radio['stationuuid'], url)), dispatch=loop.dispatch)
+    sampler = ThreadSampler()
+    for radio in zaps:
+        playback.request(radio)
+        loop.run_pending()
+        time.sleep(random.uniform(0, 0.004))
+    # Megvárjuk, amíg minden munkaszál végez
+    while True:
+        loop.run_pending(0.05)
+        if playback.pending is None and playback.busy == 0 and loop.calls.empty():
+            break
+    return (played[-1][0] if played else None), sampler.stop(), len(played), playback.stats()
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    server = None
+
+    def playlist(headers, path, query):
+        time.sleep(random.uniform(0.0, 0.2)) # Változó válaszidő: a kérések más sorrendben végeznek
+        i = path.rsplit('/', 1)[1].split('.')[0]
+        return 200, {"Content-Type": "audio/x-scpls"}, f"[playlist]\nFile1={server.url}/stream/{i}\n".encode()
+
+    server = StandinServer({"/pls/": playlist}, compress=False).start()
+    stations = [{'stationuuid': f"uuid-{i}", 'url': f"{server.url}/pls/{i}.pls"} for i in range(STATIONS)]
+    rng = random.Random(7)
+
+    for round_no in range(rounds):
+        zaps = [rng.choice(stations) for _ in range(count)]
+        expected = zaps[-1]['stationuuid']
+
+        final, threads, deliveries = run_old(stations, zaps, StreamResolver(HttpClient(), None, workers=0))
+        print(f"{round_no + 1}. kör, régi út: végül {'helyes' if final == expected else 'HIBÁS'} állomás, "
+              f"{deliveries} lejátszás indítás, csúcs {threads} extra szál")
+
+        final, threads, deliveries, stats = run_new(stations, zaps, StreamResolver(HttpClient(), None, workers=0))
+        print(f"{round_no + 1}. kör, új út:   végül {'helyes' if final == expected else 'HIBÁS'} állomás, "
+              f"{deliveries} lejátszás indítás, csúcs {threads} extra szál, {stats}")
+        assert final == expected, "Nem a legutolsó kattintás állomása szól"
+        assert threads <= PlaybackQueue.MAX_WORKERS, "Túl sok szál"
+    server.stop()
+
+if __name__ == "__main__":
+    main()
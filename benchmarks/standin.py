@@ -0,0 +1,105 @@
+# Helyi "stand-in" HTTP szerver a benchmarkokhoz: kapcsolat-, kérés- és bájtszámlálás,
+# opcionális késleltetés, sávszélesség korlát és hibainjektálás. Az útvonal kezelők (status, fejlécek, törzs) hármast adnak vissza.
+import gzip
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+class StandinServer:
+    def __init__(self, routes, latency=0.0, fail_rate=0.0, compress=True, bandwidth=0):
+        # routes: {útvonal előtag: kezelő(request_headers, path, query) -> (status, headers, body)}
+        # bandwidth: sávszélesség korlát bájt/mp-ben (0 = korlátlan), lassú hálózat szimulálásához
+        self.routes = routes
+        self.bandwidth = bandwidth
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.compress = compress
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.bytes_sent = 0
+        self.failures = 0
+        self.httpd = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, **deltas):
+        with self.lock:
+            for key, delta in deltas.items():
+                setattr(self, key, getattr(self, key) + delta)
+
+    def reset_counters(self):
+        with self.lock:
+            self.connections = self.requests = self.bytes_sent = self.failures = 0
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" # keep-alive
+
+            def setup(self):
+                super().setup()
+                server.count(connections=1)
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.count(requests=1)
+                if server.latency:
+                    time.sleep(server.latency)
+                if server.fail_rate and random.random() < server.fail_rate:
+                    server.count(failures=1)
+                    self.reply(503, {"Content-Type": "text/plain"}, b"unavailable")
+                    return
+                parts = urlsplit(self.path)
+                query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+                for prefix, handler in server.routes.items():
+                    if parts.path.startswith(prefix):
+                        status, headers, body = handler(self.headers, parts.path, query)
+                        self.reply(status, headers, body)
+                        return
+                self.reply(404, {"Content-Type": "text/plain"}, b"not found")
+
+            def reply(self, status, headers, body):
+                headers = dict(headers)
+                content_type = headers.get("Content-Type", "")
+                if (server.compress and body and "gzip" in self.headers.get("Accept-Encoding", "")
+                        and (content_type.startswith("text/") or "json" in content_type)):
+                    body = gzip.compress(body)
+                    headers["Content-Encoding"] = "gzip"
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if not server.bandwidth:
+                    self.wfile.write(body)
+                else:
+                    step = max(1024, server.bandwidth // 20)
+                    for offset in range(0, len(body), step):
+                        self.wfile.write(body[offset:offset + step])
+                        self.wfile.flush()
+                        time.sleep(step / server.bandwidth)
+                server.count(bytes_sent=len(body))
+
+        class Server(ThreadingHTTPServer):
+            def handle_error(self, request, client_address):
+                pass # A kliens bontása (pl. félbehagyott stream olvasás) nem hiba
+
+        self.httpd = Server(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
@@ -18,8 +18,24 @@ import os
 import sys
 import bz2
 import io
+import codecs
+import bisect
+import time
+import struct
+import mmap
+import zlib
+from array import array
+from collections import deque, OrderedDict
 from PIL import Image
-from concurrent.futures import ThreadPoolExecutor
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+import heapq
+import math
+import itertools
+from urllib.parse import urlsplit
+import socket
 
 # Alkalmazás nevének beállítása (hogy ne main.py legyen az ablak címe)
 GLib.set_prgname("gladeradio")
@@ -28,6 +44,18 @@ GLib.set_application_name("NetRadio & TV")
 # GStreamer debug üzenetek letiltása
 os.environ['GST_DEBUG'] = '0'
 
+# Teljesítmény napló (GLADERADIO_PERF=1 környezeti változóval kapcsolható be)
+PERF_LOG = bool(os.environ.get("GLADERADIO_PERF"))
+# Bitráta küszöbök a szűrő panelhez (kbps)
+BITRATE_STEPS = (64, 128, 192, 320)
+
+# Opcionális SQLite/FTS5 katalógus (GLADERADIO_STORE=sqlite)
+USE_SQLITE_STORE = os.environ.get("GLADERADIO_STORE") == "sqlite"
+
+def perf_log(message):
+    if PERF_LOG:
+        print(f"[perf] {message}")
+
 class ScrollingLabel(Gtk.ScrolledWindow):
     def __init__(self):
         super().__init__()
@@ -54,76 +82,3863 @@ class ScrollingLabel(Gtk.ScrolledWindow):
         self.timer_id = GLib.timeout_add(50, self._tick)
         self.connect("destroy", self.on_destroy)
 
-    def on_destroy(self, widget):
-        if self.timer_id:
-            GLib.source_remove(self.timer_id)
-            self.timer_id = None
+    def on_destroy(self, widget):
+        if self.timer_id:
+            GLib.source_remove(self.timer_id)
+            self.timer_id = None
+
+    def set_markup(self, text):
+        self.label.set_markup(text)
+        self.reset()
+
+    def set_text(self, text):
+        self.label.set_text(text)
+        self.reset()
+        
+    def reset(self):
+        self.scroll_pos = 0
+        self.direction = 1
+        self.wait_counter = 60
+        self.h_adj.set_value(0)
+
+    def _tick(self):
+        if not self.timer_id: return False
+        
+        upper = self.h_adj.get_upper()
+        page_size = self.h_adj.get_page_size()
+        max_scroll = upper - page_size
+        
+        if max_scroll <= 0:
+            return True
+            
+        if self.wait_counter > 0:
+            self.wait_counter -= 1
+            return True
+            
+        self.scroll_pos += self.direction
+        
+        if self.scroll_pos >= max_scroll:
+            self.scroll_pos = max_scroll
+            self.direction = -1
+            self.wait_counter = 60
+        elif self.scroll_pos <= 0:
+            self.scroll_pos = 0
+            self.direction = 1
+            self.wait_counter = 60
+            
+        self.h_adj.set_value(self.scroll_pos)
+        return True
+
+class StationCard(Gtk.Button):
+    # Újrahasznosítható állomás kártya: a rács egy fix készletből köti újra a sorokhoz
+    def __init__(self, on_activate):
+        super().__init__()
+        self.set_relief(Gtk.ReliefStyle.NONE)
+        self.get_style_context().add_class("radio-card")
+        self.set_size_request(140, 160) # Fix méret a kártyának
+        
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
+        self.add(box)
+
+        # Ikon
+        self.icon = Gtk.Image()
+        self.icon.set_pixel_size(64)
+        self.icon.set_halign(Gtk.Align.CENTER)
+        box.pack_start(self.icon, True, True, 0)
+
+        # Cím
+        self.lbl_name = Gtk.Label()
+        self.lbl_name.set_ellipsize(Pango.EllipsizeMode.END)
+        self.lbl_name.set_max_width_chars(15)
+        self.lbl_name.set_halign(Gtk.Align.CENTER)
+        self.lbl_name.get_style_context().add_class("card-title")
+        box.pack_start(self.lbl_name, False, False, 0)
+
+        # Ország / Info
+        self.lbl_info = Gtk.Label()
+        self.lbl_info.set_ellipsize(Pango.EllipsizeMode.END)
+        self.lbl_info.set_max_width_chars(15)
+        self.lbl_info.set_halign(Gtk.Align.CENTER)
+        self.lbl_info.get_style_context().add_class("dim-label")
+        box.pack_start(self.lbl_info, False, False, 0)
+
+        self.radio = None
+        self.logo_binding = -1 # Melyik kötéshez van már beállítva a logó
+        self.position = None # (x, y) a rácsban, hogy csak változáskor mozgassuk
+        # Minden újrakötésnél nő: a késve érkező logók ezzel ellenőrzik, hogy még aktuálisak-e
+        self.binding = 0
+
+        # Klikk esemény
+        self.connect("clicked", lambda b: self.radio is not None and on_activate(self.radio))
+
+    def bind(self, radio):
+        self.radio = radio
+        self.binding += 1
+        self.lbl_name.set_text(radio.get('name') or 'Névtelen')
+        self.lbl_info.set_text(radio.get('country') or '')
+        self.icon.set_from_icon_name("audio-x-generic", Gtk.IconSize.DIALOG)
+
+    def set_logo(self, binding, pixbuf):
+        if binding == self.binding:
+            self.icon.set_from_pixbuf(pixbuf)
+            self.logo_binding = binding
+        return False
+
+# Kontinensek (ISO 3166-1 alpha-2 országkódok) az oldalsáv csoportosításához, megjelenítési sorrendben
+CONTINENTS = (
+    ("Európa", "AD AL AT AX BA BE BG BY CH CY CZ DE DK EE ES FI FO FR GB GG GI GR HR HU IE IM IS IT JE LI LT LU LV "
+               "MC MD ME MK MT NL NO PL PT RO RS RU SE SI SJ SK SM UA VA XK"),
+    ("Ázsia", "AE AF AM AZ BD BH BN BT CN GE HK ID IL IN IQ IR JO JP KG KH KP KR KW KZ LA LB LK MM MN MO MV MY NP "
+              "OM PH PK PS QA SA SG SY TH TJ TL TM TR TW UZ VN YE"),
+    ("Afrika", "AO BF BI BJ BW CD CF CG CI CM CV DJ DZ EG EH ER ET GA GH GM GN GQ GW KE KM LR LS LY MA MG ML MR MU "
+               "MW MZ NA NE NG RE RW SC SD SH SL SN SO SS ST SZ TD TG TN TZ UG YT ZA ZM ZW"),
+    ("Észak-Amerika", "AG AI AW BB BL BM BQ BS BZ CA CR CU CW DM DO GD GL GP GT HN HT JM KN KY LC MF MQ MS MX NI PA "
+                      "PM PR SV SX TC TT US VC VG VI"),
+    ("Dél-Amerika", "AR BO BR CL CO EC FK GF GY PE PY SR UY VE"),
+    ("Óceánia", "AS AU CK FJ FM GU KI MH MP NC NF NR NU NZ PF PG PN PW SB TK TO TV UM VU WF WS"),
+    ("Antarktisz", "AQ BV GS HM TF"),
+)
+CONTINENT_OTHER = "Egyéb"
+CONTINENT_ORDER = [name for name, _ in CONTINENTS] + [CONTINENT_OTHER]
+COUNTRY_CONTINENT = {code: name for name, codes in CONTINENTS for code in codes.split()}
+
+class CategorySidebar(Gtk.Box):
+    # Kategória oldalsáv TreeView-val: a sorokat cellarenderelők rajzolják (nincs soronkénti widget),
+    # az országok kontinensenként csoportosítva, gépelésre szűrhetők. Frissítéskor csak a változott
+    # sorok íródnak (beszúrás/törlés/darabszám), a kijelölés megmarad.
+    COL_ID, COL_TITLE, COL_ICON, COL_COUNT = range(4)
+    FIXED = (("all", "Összes Rádió", "network-transmit-receive-symbolic"),
+             ("favorites", "Kedvencek", "starred-symbolic"),
+             ("tv", "ÉlőTv", "video-display-symbolic"))
+
+    def __init__(self, on_selected):
+        super().__init__(orientation=Gtk.Orientation.VERTICAL)
+        self.on_selected = on_selected
+        self.rows = {}              # sor id -> TreeIter (a TreeStore iterátorai tartósak)
+        self.counts = {}            # sor id -> kiírt darabszám
+        self.countries = {}         # ország -> kontinens
+        self.continent_countries = {} # kontinens -> rendezett országlista
+        self.filter_text = ""
+
+        self.filter_entry = Gtk.SearchEntry()
+        self.filter_entry.set_placeholder_text("Ország szűrése...")
+        self.filter_entry.set_margin_start(6)
+        self.filter_entry.set_margin_end(6)
+        self.filter_entry.set_margin_top(6)
+        self.filter_entry.set_margin_bottom(6)
+        self.filter_entry.connect("search-changed", self.on_filter_changed)
+        self.pack_start(self.filter_entry, False, False, 0)
+
+        self.store = Gtk.TreeStore(str, str, str, str)
+        self.filter_model = self.store.filter_new()
+        self.filter_model.set_visible_func(self.is_row_visible)
+
+        self.view = Gtk.TreeView(model=self.filter_model)
+        self.view.set_headers_visible(False)
+        self.view.set_enable_search(False)
+        self.view.get_style_context().add_class("sidebar-tree")
+        column = Gtk.TreeViewColumn()
+        icon = Gtk.CellRendererPixbuf()
+        column.pack_start(icon, False)
+        column.add_attribute(icon, "icon-name", self.COL_ICON)
+        title = Gtk.CellRendererText()
+        title.set_property("ellipsize", Pango.EllipsizeMode.END)
+        column.pack_start(title, True)
+        column.add_attribute(title, "text", self.COL_TITLE)
+        count = Gtk.CellRendererText()
+        count.set_property("foreground", "#888888")
+        count.set_property("xalign", 1.0)
+        column.pack_end(count, False)
+        column.add_attribute(count, "text", self.COL_COUNT)
+        self.view.append_column(column)
+
+        selection = self.view.get_selection()
+        selection.set_mode(Gtk.SelectionMode.SINGLE)
+        # A kontinens sorok csak csoportok, nem választhatók ki
+        selection.set_select_function(lambda sel, model, path, selected: not model[path][self.COL_ID].startswith("continent:"))
+        selection.connect("changed", self.on_selection_changed)
+
+        scroll = Gtk.ScrolledWindow()
+        scroll.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+        scroll.add(self.view)
+        self.pack_start(scroll, True, True, 0)
+
+        for id, title, icon_name in self.FIXED:
+            self.rows[id] = self.store.append(None, [id, title, icon_name, ""])
+
+    def selected_id(self):
+        model, it = self.view.get_selection().get_selected()
+        return model[it][self.COL_ID] if it is not None else "all"
+
+    def select(self, id):
+        it = self.rows.get(id)
+        if it is None:
+            return
+        ok, filter_it = self.filter_model.convert_child_iter_to_iter(it)
+        if ok:
+            self.view.get_selection().select_iter(filter_it)
+
+    def on_selection_changed(self, selection):
+        model, it = selection.get_selected()
+        if it is not None:
+            self.on_selected(model[it][self.COL_ID])
+
+    def on_filter_changed(self, entry):
+        self.filter_text = entry.get_text().strip().casefold()
+        self.filter_model.refilter()
+        if self.filter_text:
+            self.view.expand_all()
+
+    def is_row_visible(self, model, it, data=None):
+        if not self.filter_text:
+            return True
+        id = model[it][self.COL_ID]
+        if id.startswith("country:"):
+            return self.filter_text in model[it][self.COL_TITLE].casefold()
+        if id.startswith("continent:"):
+            child = model.iter_children(it)
+            while child is not None:
+                if self.filter_text in model[child][self.COL_TITLE].casefold():
+                    return True
+                child = model.iter_next(child)
+            return False
+        return True # A fix elemek mindig látszanak
+
+    def set_counts(self, counts):
+        # Csak a változott darabszámok íródnak; a kontinens sorok a gyerekeik összegét mutatják
+        touched = set()
+        for id, count in counts.items():
+            it = self.rows.get(id)
+            if it is None or self.counts.get(id) == count:
+                continue
+            self.counts[id] = count
+            self.store.set_value(it, self.COL_COUNT, "" if count is None else str(count))
+            if id.startswith("country:"):
+                touched.add(self.countries.get(id[8:]))
+        for continent in touched:
+            total = sum(self.counts.get(f"country:{country}") or 0 for country in self.continent_countries.get(continent, ()))
+            self.store.set_value(self.rows[f"continent:{continent}"], self.COL_COUNT, str(total) if total else "")
+
+    def add_countries(self, entries):
+        # entries: (ország, országkód) párok; csak a még hiányzók kerülnek be (folyamatos letöltéshez)
+        for country, code in entries:
+            if country and country not in self.countries:
+                self._insert_country(country, code)
+
+    def set_countries(self, entries, counts=None):
+        # entries: (ország, országkód) párok a teljes katalógusra; eltérés szerinti frissítés
+        wanted = {country: code for country, code in entries if country}
+        for country in [country for country in self.countries if country not in wanted]:
+            self._remove_country(country)
+        for country, code in wanted.items():
+            if country not in self.countries:
+                self._insert_country(country, code)
+        if counts:
+            self.set_counts(counts)
+
+    def _insert_country(self, country, code):
+        continent = COUNTRY_CONTINENT.get((code or "").upper(), CONTINENT_OTHER)
+        parent = self.rows.get(f"continent:{continent}")
+        if parent is None:
+            # A kontinens sor a meglévők közé, a fix elemek után
+            present = [name for name in CONTINENT_ORDER if name in self.continent_countries]
+            position = len(self.FIXED) + bisect.bisect_left([CONTINENT_ORDER.index(name) for name in present],
+                                                            CONTINENT_ORDER.index(continent))
+            parent = self.store.insert(None, position, [f"continent:{continent}", continent, "globe-symbolic", ""])
+            self.rows[f"continent:{continent}"] = parent
+            self.continent_countries[continent] = []
+        names = self.continent_countries[continent]
+        position = bisect.bisect_left(names, country)
+        names.insert(position, country)
+        self.countries[country] = continent
+        self.rows[f"country:{country}"] = self.store.insert(parent, position, [f"country:{country}", country, "mark-location-symbolic", ""])
+
+    def _remove_country(self, country):
+        continent = self.countries.pop(country)
+        self.store.remove(self.rows.pop(f"country:{country}"))
+        self.counts.pop(f"country:{country}", None)
+        names = self.continent_countries[continent]
+        names.remove(country)
+        if not names:
+            del self.continent_countries[continent]
+            self.store.remove(self.rows.pop(f"continent:{continent}"))
+
+class FacetPanel(Gtk.Box):
+    # Kombinált szűrők az oldalsávban (nyelv, kodek, címke, bitráta, HLS) élő darabszámokkal.
+    # Egy facet-en belül bármelyik kiválasztott érték elég, a facet-ek között mindegyik feltétel kell.
+    MAX_VALUES = 12 # Facet-enként ennyi leggyakoribb érték (+ a kiválasztottak)
+    SECTIONS = (('language', "Nyelv"), ('codec', "Kodek"), ('tag', "Címke"))
+
+    def __init__(self, on_changed):
+        super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=6)
+        self.set_margin_start(10)
+        self.set_margin_end(10)
+        self.set_margin_bottom(10)
+        self.on_changed = on_changed
+        self.values = {facet: [] for facet, _ in self.SECTIONS}
+        self.buttons = {}  # (facet, érték) -> ToggleButton
+        self.flows = {}
+        self.updating = False
+
+        for facet, title in self.SECTIONS:
+            label = Gtk.Label(xalign=0)
+            label.set_markup(f"<b>{title}</b>")
+            self.pack_start(label, False, False, 0)
+            flow = Gtk.FlowBox()
+            flow.set_selection_mode(Gtk.SelectionMode.NONE)
+            flow.set_max_children_per_line(3)
+            self.flows[facet] = flow
+            self.pack_start(flow, False, False, 0)
+
+        label = Gtk.Label(xalign=0)
+        label.set_markup("<b>Bitráta</b>")
+        self.pack_start(label, False, False, 0)
+        self.bitrate_buttons = {}
+        group = None
+        for step in (0,) + BITRATE_STEPS:
+            button = Gtk.RadioButton.new_with_label_from_widget(group, "Bármely" if not step else f"≥ {step} kbps")
+            group = group or button
+            button.connect("toggled", self.on_toggled)
+            self.bitrate_buttons[step] = button
+            self.pack_start(button, False, False, 0)
+
+        self.hls_button = Gtk.CheckButton(label="Csak HLS")
+        self.hls_button.connect("toggled", self.on_toggled)
+        self.pack_start(self.hls_button, False, False, 0)
+
+        clear = Gtk.Button(label="Szűrők törlése")
+        clear.connect("clicked", self.on_clear_clicked)
+        self.pack_start(clear, False, False, 0)
+
+    def set_options(self, facet_counts):
+        # facet_counts: {facet: {érték: darab}} a teljes katalógusra; a kiválasztás megmarad
+        selected = self.selection()
+        self.updating = True
+        for facet, _ in self.SECTIONS:
+            counts = facet_counts.get(facet, {})
+            values = sorted(counts, key=lambda value: -counts[value])[:self.MAX_VALUES]
+            values += [value for value in selected.get(facet, ()) if value not in values]
+            self.values[facet] = values
+            flow = self.flows[facet]
+            for child in flow.get_children():
+                flow.remove(child)
+            for value in values:
+                button = Gtk.ToggleButton(label=value)
+                button.set_active(value in selected.get(facet, ()))
+                button.connect("toggled", self.on_toggled)
+                button.facet_value = value
+                self.buttons[(facet, value)] = button
+                flow.add(button)
+        self.buttons = {key: button for key, button in self.buttons.items() if key[1] in self.values[key[0]]}
+        self.updating = False
+        self.show_all()
+
+    def selection(self):
+        selection = {}
+        for (facet, value), button in self.buttons.items():
+            if button.get_active():
+                selection.setdefault(facet, set()).add(value)
+        selection = {facet: frozenset(values) for facet, values in selection.items()}
+        for step, button in self.bitrate_buttons.items():
+            if step and button.get_active():
+                selection['min_bitrate'] = step
+        if self.hls_button.get_active():
+            selection['hls'] = True
+        return selection
+
+    def options(self):
+        # Amire élő darabszám kell
+        options = {facet: list(values) for facet, values in self.values.items()}
+        options['bitrate'] = BITRATE_STEPS
+        options['hls'] = True
+        return options
+
+    def set_counts(self, counts):
+        for (facet, value), button in self.buttons.items():
+            count = counts.get(facet, {}).get(value)
+            if count is None:
+                continue
+            button.set_label(f"{value} ({count})")
+            button.set_sensitive(bool(count) or button.get_active())
+        for step, count in counts.get('bitrate', {}).items():
+            self.bitrate_buttons[step].set_label(f"≥ {step} kbps ({count})")
+        if 'hls' in counts:
+            self.hls_button.set_label(f"Csak HLS ({counts['hls']})")
+
+    def on_toggled(self, button):
+        # A rádiógomb csoport váltáskor kettőt jelez (ki + be), csak a bekapcsolt számít
+        if self.updating or (isinstance(button, Gtk.RadioButton) and not button.get_active()):
+            return
+        self.on_changed()
+
+    def on_clear_clicked(self, button):
+        self.updating = True
+        for toggle in self.buttons.values():
+            toggle.set_active(False)
+        self.bitrate_buttons[0].set_active(True)
+        self.hls_button.set_active(False)
+        self.updating = False
+        self.on_changed()
+
+class StationList:
+    # Sorindex lista megjelenítése a katalógus sornézeteiként (a rács modellje)
+    __slots__ = ('catalog', 'ids', 'counts')
+
+    def __init__(self, catalog, ids, counts=None):
+        self.catalog = catalog
+        self.ids = ids
+        self.counts = counts # Élő facet darabszámok (kombinált szűrésnél)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        return self.catalog[self.ids[i]]
+
+class StationGrid(Gtk.Layout):
+    # Virtualizált kártyarács: csak a látható (és az átfedési) sorokhoz van widget,
+    # görgetéskor a kártyák egy fix készletből kapnak új tartalmat.
+    PAGE_SIZE = 50      # Végtelen görgetés: ennyi elemmel bővül a lista alján
+    OVERSCAN_ROWS = 1   # Ennyi plusz sor a látható terület alatt/felett
+    SPACING = 10
+
+    PREFETCH_ROWS = 2   # A logó előtöltéshez ennyi sort adunk át a látható terület alatt
+
+    def __init__(self, on_activate, on_viewport_changed=None, on_shown_changed=None):
+        super().__init__()
+        self.on_activate = on_activate
+        self.on_viewport_changed = on_viewport_changed
+        self.on_shown_changed = on_shown_changed
+        self.items = []
+        self.shown = 0
+        self.columns = 1
+        self.cell_width = 0
+        self.cell_height = 0
+        self.pool = []
+        self.bound = {} # elem index -> kártya
+        self.refresh_id = None
+
+        self.connect("size-allocate", self.on_size_allocate)
+        self.connect("notify::vadjustment", self.on_vadjustment_set)
+
+    def on_vadjustment_set(self, *args):
+        vadj = self.get_vadjustment()
+        if vadj:
+            vadj.connect("value-changed", lambda adj: self.queue_refresh())
+
+    def on_size_allocate(self, widget, allocation):
+        self.queue_refresh()
+
+    def set_items(self, items, keep_position=False, rebind=False):
+        # keep_position: a lista csak a végén bővült, a meglévő kötések és a pozíció maradhat
+        # rebind: a görgetési pozíció marad, de minden kártya újra kötődik (pl. szinkron utáni új katalógus)
+        self.items = items
+        if keep_position:
+            self.shown = min(len(items), max(self.shown, self.PAGE_SIZE))
+            if rebind:
+                self.bound = {}
+            else:
+                # Csak azok a kötések maradnak, amelyek helyén ugyanaz az állomás áll
+                self.bound = {index: card for index, card in self.bound.items()
+                              if index < len(items) and card.radio.get('stationuuid') == items[index].get('stationuuid')}
+        else:
+            self.shown = min(len(items), self.PAGE_SIZE)
+            # Minden kötés érvénytelen, a kártyák visszakerülnek a készletbe
+            self.bound = {}
+            vadj = self.get_vadjustment()
+            if vadj:
+                vadj.set_value(0)
+        self.refresh()
+        if self.on_shown_changed:
+            self.on_shown_changed(self.shown, len(self.items))
+
+    def visible_range(self):
+        # A ténylegesen látható elemek index tartománya (átfedés nélkül)
+        vadj = self.get_vadjustment()
+        if not vadj or not self.cell_height:
+            return range(0)
+        first_row = int(vadj.get_value() // self.cell_height)
+        last_row = int((vadj.get_value() + vadj.get_page_size()) // self.cell_height) + 1
+        return range(first_row * self.columns, min(last_row * self.columns, self.shown))
+
+    def queue_refresh(self):
+        if not self.refresh_id:
+            self.refresh_id = GLib.idle_add(self._idle_refresh)
+
+    def _idle_refresh(self):
+        self.refresh_id = None
+        self.refresh()
+        return False
+
+    def _new_card(self):
+        card = StationCard(self.on_activate)
+        card.show_all()
+        card.hide()
+        self.put(card, 0, 0)
+        self.pool.append(card)
+        return card
+
+    def _measure_cells(self):
+        if self.cell_width:
+            return
+        card = self.pool[0] if self.pool else self._new_card()
+        _, natural = card.get_preferred_size()
+        self.cell_width = max(natural.width, 140) + self.SPACING
+        self.cell_height = max(natural.height, 160) + self.SPACING
+
+    def refresh(self):
+        self._measure_cells()
+        width = self.get_allocated_width()
+        self.columns = max(1, (width - self.SPACING) // self.cell_width)
+
+        total_rows = (self.shown + self.columns - 1) // self.columns
+        height = total_rows * self.cell_height + self.SPACING
+        self.set_size(width, height)
+
+        vadj = self.get_vadjustment()
+        top = vadj.get_value() if vadj else 0
+        page = vadj.get_page_size() if vadj else 0
+
+        # Végtelen görgetés: ha a lista aljához közel vagyunk, bővítünk
+        if self.shown < len(self.items) and top + page * 2 >= height:
+            self.shown = min(len(self.items), self.shown + self.PAGE_SIZE)
+            if self.on_shown_changed:
+                self.on_shown_changed(self.shown, len(self.items))
+            self.queue_refresh()
+
+        first_row = max(0, int(top // self.cell_height) - self.OVERSCAN_ROWS)
+        last_row = min(total_rows, int((top + page) // self.cell_height) + 1 + self.OVERSCAN_ROWS)
+        wanted = range(first_row * self.columns, min(last_row * self.columns, self.shown))
+
+        # A látható tartományon kívül eső kártyák felszabadulnak
+        kept = {}
+        free = []
+        bound_cards = set()
+        for index, card in self.bound.items():
+            if index in wanted:
+                kept[index] = card
+                bound_cards.add(card)
+        for card in self.pool:
+            if card not in bound_cards:
+                free.append(card)
+
+        for index in wanted:
+            card = kept.get(index)
+            if card is None:
+                card = free.pop() if free else self._new_card()
+                card.bind(self.items[index])
+                kept[index] = card
+            row, col = divmod(index, self.columns)
+            position = (self.SPACING + col * self.cell_width, self.SPACING + row * self.cell_height)
+            if card.position != position:
+                self.move(card, *position)
+                card.position = position
+            card.show()
+
+        for card in free:
+            card.hide()
+        self.bound = kept
+
+        if self.on_viewport_changed:
+            # Látható kártyák, az átfedési sorok kártyái és az utánuk következő elemek
+            visible = self.visible_range()
+            visible_cards = [card for index, card in kept.items() if index in visible]
+            near_cards = [card for index, card in kept.items() if index not in visible]
+            ahead_end = min(len(self.items), wanted.stop + self.PREFETCH_ROWS * self.columns)
+            ahead = [self.items[i] for i in range(wanted.stop, ahead_end)]
+            self.on_viewport_changed(visible_cards, near_cards, ahead)
+
+# Ismert működő stream helyettesítések (ha az API hibás/audio linket ad)
+STREAM_OVERRIDES = {
+    "CCTV-1": "http://ivi.bupt.edu.cn/hls/cctv1hd.m3u8",
+    "CCTV-2": "http://ivi.bupt.edu.cn/hls/cctv2hd.m3u8",
+    "CCTV-3": "http://ivi.bupt.edu.cn/hls/cctv3hd.m3u8",
+    "CCTV-4": "http://ivi.bupt.edu.cn/hls/cctv4hd.m3u8",
+    "CCTV-5": "http://ivi.bupt.edu.cn/hls/cctv5hd.m3u8",
+    "CCTV-5+": "http://ivi.bupt.edu.cn/hls/cctv5phd.m3u8",
+    "CCTV-6": "http://ivi.bupt.edu.cn/hls/cctv6hd.m3u8",
+    "CCTV-7": "http://ivi.bupt.edu.cn/hls/cctv7hd.m3u8",
+    "CCTV-8": "http://ivi.bupt.edu.cn/hls/cctv8hd.m3u8",
+    "CCTV-9": "http://ivi.bupt.edu.cn/hls/cctv9hd.m3u8",
+    "CCTV-10": "http://ivi.bupt.edu.cn/hls/cctv10hd.m3u8",
+    "CCTV-11": "http://ivi.bupt.edu.cn/hls/cctv11hd.m3u8",
+    "CCTV-12": "http://ivi.bupt.edu.cn/hls/cctv12hd.m3u8",
+    "CCTV-13": "http://ivi.bupt.edu.cn/hls/cctv13hd.m3u8",
+    "CCTV-14": "http://ivi.bupt.edu.cn/hls/cctv14hd.m3u8",
+    "CCTV-15": "http://ivi.bupt.edu.cn/hls/cctv15hd.m3u8",
+    "CETV-1": "http://ivi.bupt.edu.cn/hls/cetv1.m3u8",
+    "CETV-2": "http://ivi.bupt.edu.cn/hls/cetv2.m3u8",
+    "CETV-3": "http://ivi.bupt.edu.cn/hls/cetv3.m3u8",
+    "CETV-4": "http://ivi.bupt.edu.cn/hls/cetv4.m3u8",
+}
+
+# A katalógusban tárolt mezők - az API ~35 mezőjéből csak ezeket használja az app
+CATALOG_STRING_FIELDS = ('stationuuid', 'name', 'url', 'url_resolved', 'favicon', 'tags', 'country', 'countrycode', 'codec', 'language')
+CATALOG_INT_FIELDS = ('bitrate', 'hls', 'votes', 'clickcount', 'clicktrend')
+CATALOG_FLOAT_FIELDS = ('geo_lat', 'geo_long')
+CATALOG_FIELDS = CATALOG_STRING_FIELDS + CATALOG_INT_FIELDS + CATALOG_FLOAT_FIELDS
+
+# Alacsony kardinalitású oszlopok: ezeknél az interning sok duplikált stringet spórol meg
+CATALOG_INTERNED_FIELDS = ('tags', 'country', 'countrycode', 'codec', 'language')
+
+# Betöltéskor egyszer számolt állomás jelzők és facet táblák (a katalógus oszlopai mellett, 'facet:' előtaggal):
+#   facet:is_tv - array('b') TV jelző, facet:tags / facet:codec - normalizált címkék és kodek,
+#   facet:by_<facet> - {érték: array('I') sorindexek}, a darabszám a lista hossza
+FACET_FIELDS = ('country', 'language', 'codec', 'tag')
+FACET_COLUMNS = ('facet:is_tv', 'facet:tags', 'facet:codec') + tuple(f"facet:by_{facet}" for facet in FACET_FIELDS)
+
+def _to_int(value):
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+def _to_float(value):
+    try:
+        return float(value) if value is not None else float('nan')
+    except (TypeError, ValueError):
+        return float('nan')
+
+class StationRow:
+    # Könnyű, dict-szerű nézet a katalógus egy sorára (nem másolja az adatokat)
+    __slots__ = ('catalog', 'index')
+
+    def __init__(self, catalog, index):
+        self.catalog = catalog
+        self.index = index
+
+    def get(self, key, default=None):
+        column = self.catalog.columns.get(key)
+        if column is None:
+            return default
+        value = column[self.index]
+        if key in CATALOG_FLOAT_FIELDS and value != value: # NaN = nincs adat
+            return default
+        return value
+
+    def __getitem__(self, key):
+        if key not in self.catalog.columns:
+            raise KeyError(key)
+        return self.get(key)
+
+    def __contains__(self, key):
+        return key in self.catalog.columns
+
+    def keys(self):
+        return CATALOG_FIELDS
+
+    def to_dict(self):
+        return {key: self.get(key) for key in CATALOG_FIELDS}
+
+    def __repr__(self):
+        return f"StationRow({self.index}, {self.get('name')!r})"
+
+class StationCatalog:
+    # Oszlopos állomáskatalógus: stringek listákban (internálva), számok array-ekben.
+    # ~100k állomásnál a dict-listához képest töredék memóriát használ.
+    __slots__ = ('columns', 'count', '_derived')
+
+    def __init__(self):
+        self._derived = {} # Származtatott gyorsítótárak (nem oszlopok, nem perzisztáltak)
+        self.columns = {}
+        for key in CATALOG_STRING_FIELDS:
+            self.columns[key] = []
+        for key in CATALOG_INT_FIELDS:
+            self.columns[key] = array('i')
+        for key in CATALOG_FLOAT_FIELDS:
+            self.columns[key] = array('d')
+        self.count = 0
+
+    @classmethod
+    def from_records(cls, records):
+        # Deduplikálás és szűrés (csak működő) egyetlen menetben
+        catalog = cls()
+        seen = set()
+        for radio in records:
+            catalog.ingest(radio, seen)
+        return catalog
+
+    def ingest(self, radio, seen):
+        # Csak ha a lastcheckok 1 (működő), vagy nincs ilyen mező
+        if 'lastcheckok' in radio and str(radio['lastcheckok']) == '0':
+            return False
+        uuid = radio.get('stationuuid')
+        if not uuid or uuid in seen:
+            return False
+        seen.add(uuid)
+        self.append(radio)
+        return True
+
+    def append(self, radio):
+        columns = self.columns
+        for key in CATALOG_STRING_FIELDS:
+            value = radio.get(key) or ''
+            if not isinstance(value, str):
+                value = str(value)
+            if key in CATALOG_INTERNED_FIELDS:
+                value = sys.intern(value)
+            elif key == 'url_resolved' and value == columns['url'][-1]:
+                value = columns['url'][-1] # Gyakran azonos az url-lel, közös objektum
+            columns[key].append(value)
+        for key in CATALOG_INT_FIELDS:
+            columns[key].append(_to_int(radio.get(key)))
+        for key in CATALOG_FLOAT_FIELDS:
+            columns[key].append(_to_float(radio.get(key)))
+        self.count += 1
+
+    def merged(self, changes, removed=()):
+        # Új katalógus a változások (upsert) és a törölt/hibás állomások alapján.
+        # A sorrend megmarad, az új állomások a végére kerülnek.
+        updates = {}
+        for change in changes:
+            uuid = change.get('stationuuid')
+            if uuid:
+                updates[uuid] = change # Ugyanarra az állomásra a legutolsó változás számít
+        removed = set(removed)
+
+        catalog = StationCatalog()
+        for row in self:
+            uuid = row['stationuuid']
+            if uuid in removed:
+                continue
+            change = updates.pop(uuid, None)
+            if change is None:
+                catalog.append(row)
+                continue
+            if 'lastcheckok' in change and str(change['lastcheckok']) == '0':
+                continue
+            record = row.to_dict()
+            record.update({key: value for key, value in change.items() if key in CATALOG_FIELDS and value is not None})
+            catalog.append(record)
+
+        for uuid, change in updates.items():
+            if uuid in removed or ('lastcheckok' in change and str(change['lastcheckok']) == '0'):
+                continue
+            catalog.append(change)
+        return catalog
+
+    def column(self, key):
+        return self.columns[key]
+
+    def materialize(self):
+        # Minden oszlop betöltése (fájlból leképezett katalógusnál lezárja a leképezést)
+        for key in CATALOG_FIELDS:
+            self.columns[key]
+        if self.has_facets():
+            for key in FACET_COLUMNS:
+                self.columns[key]
+
+    def derived(self, key, build):
+        # Lustán, katalógusonként egyszer számolt segédstruktúra (pl. bitset index, rangsoroló)
+        value = self._derived.get(key)
+        if value is None:
+            value = self._derived[key] = build()
+        return value
+
+    def has_facets(self):
+        return 'facet:is_tv' in self.columns
+
+    def build_facets(self):
+        # Egyetlen menet: TV jelző, normalizált címkék/kodek és a facet táblák.
+        # Háttérszálon hívandó, mielőtt a katalógus a fő szálhoz kerül.
+        is_tv = array('b')
+        norm_tags = []
+        norm_codecs = []
+        postings = {facet: {} for facet in FACET_FIELDS}
+        normalized = {} # Az internált eredeti string -> normalizált alak (sok az ismétlődés)
+
+        def add(facet, value, i):
+            ids = postings[facet].get(value)
+            if ids is None:
+                ids = postings[facet][value] = array('I')
+            ids.append(i)
+
+        columns = self.columns
+        for i, (tags, codec, country, language) in enumerate(zip(columns['tags'], columns['codec'], columns['country'], columns['language'])):
+            entry = normalized.get(tags)
+            if entry is None:
+                tag_list = []
+                for tag in tags.lower().split(','):
+                    tag = tag.strip()
+                    if tag and tag not in tag_list:
+                        tag_list.append(tag)
+                entry = normalized[tags] = (sys.intern(','.join(tag_list)), tuple(sys.intern(tag) for tag in tag_list))
+            codec_norm = normalized.get(('codec', codec))
+            if codec_norm is None:
+                codec_norm = normalized[('codec', codec)] = sys.intern(codec.strip().upper())
+            norm_tags.append(entry[0])
+            norm_codecs.append(codec_norm)
+            is_tv.append(1 if is_tv_station(tags, codec) else 0)
+
+            if country:
+                add('country', country, i)
+            if codec_norm:
+                add('codec', codec_norm, i)
+            for lang in language.lower().split(','):
+                lang = lang.strip()
+                if lang:
+                    add('language', lang, i)
+            for tag in entry[1]:
+                add('tag', tag, i)
+
+        for facet in FACET_FIELDS:
+            columns[f"facet:by_{facet}"] = postings[facet]
+        columns['facet:tags'] = norm_tags
+        columns['facet:codec'] = norm_codecs
+        columns['facet:is_tv'] = is_tv # Utoljára: a has_facets() csak a teljes eredményt látja
+
+    def facets(self):
+        return CatalogFacets(self) if self.has_facets() else None
+
+    def to_records(self):
+        return [self[i].to_dict() for i in range(self.count)]
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return StationRow(self, index)
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield StationRow(self, i)
+
+class CatalogFacets:
+    # Nézet a katalógus előre számolt facet oszlopaira: kategória váltáskor keresés helyett kikeresés
+    __slots__ = ('catalog',)
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def is_tv(self, i):
+        return bool(self.catalog.columns['facet:is_tv'][i])
+
+    def tv_rows(self):
+        return self.rows('tv', True)
+
+    def rows(self, facet, value):
+        # Sorindexek növekvő sorrendben ('tv' facet: a TV jelzőből, egyszer számolva)
+        if facet == 'tv':
+            flags = self.catalog.columns['facet:is_tv']
+            return self.catalog.derived('tv_rows', lambda: array('I', itertools.compress(range(len(flags)), flags)))
+        return self.catalog.columns[f"facet:by_{facet}"].get(value, ())
+
+    def counts(self, facet):
+        return {value: len(ids) for value, ids in self.catalog.columns[f"facet:by_{facet}"].items()}
+
+    def bitset_index(self):
+        # A kombinált szűrés bitset indexe (nem perzisztált, a szűrő munkaszálon épül lustán)
+        return self.catalog.derived('bitset_index', lambda: FacetIndex(self.catalog))
+
+    def values(self, facet):
+        return sorted(self.catalog.columns[f"facet:by_{facet}"])
+
+# Bájt -> a beállított bitek pozíciói (bitset -> sorindex lista átalakításhoz)
+_BYTE_BITS = tuple(tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256))
+
+if hasattr(int, 'bit_count'):
+    def _popcount(bits):
+        return bits.bit_count()
+else:
+    def _popcount(bits):
+        return bin(bits).count('1')
+
+class FacetIndex:
+    # Bitset index a kombinált szűréshez: facet értékenként egy Python int (bit i = i. sor).
+    # A bitsetek a posting listákból lustán készülnek (csak a használt értékekhez), a szűrés
+    # facet-en belül VAGY, facet-ek között ÉS; a darabszámok a többi facet szűrőjével számolódnak.
+    # Csak a szűrő munkaszálról használt (nem szálbiztos).
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.facets = catalog.facets()
+        self.size = len(catalog)
+        self.all = (1 << self.size) - 1
+        self.bitsets = {}
+
+    def from_rows(self, rows):
+        # Sorindexek (növekvő vagy tetszőleges sorrend) -> bitset
+        buf = bytearray((self.size + 7) >> 3)
+        for i in rows:
+            buf[i >> 3] |= 1 << (i & 7)
+        return int.from_bytes(buf, 'little')
+
+    def to_rows(self, bits):
+        # Bitset -> növekvő sorindexek; csak a nem nulla bájtokat bontjuk
+        rows = array('I')
+        data = bits.to_bytes((self.size + 7) >> 3, 'little')
+        for offset, byte in enumerate(data):
+            if byte:
+                base = offset << 3
+                rows.extend(base + bit for bit in _BYTE_BITS[byte])
+        return rows
+
+    def bitset(self, facet, value):
+        key = (facet, value)
+        bits = self.bitsets.get(key)
+        if bits is None:
+            if facet == 'bitrate':
+                bitrates = self.catalog.column('bitrate')
+                bits = self.from_rows(i for i in range(self.size) if bitrates[i] >= value)
+            elif facet == 'hls':
+                bits = self.from_rows(itertools.compress(range(self.size), self.catalog.column('hls')))
+            else:
+                bits = self.from_rows(self.facets.rows(facet, value))
+            self.bitsets[key] = bits
+        return bits
+
+    def facet_bits(self, selection, facet):
+        # Egy facet szűrője (VAGY az értékek között); None ha nincs rá szűrés
+        if facet == 'bitrate':
+            step = selection.get('min_bitrate')
+            return self.bitset('bitrate', step) if step else None
+        if facet == 'hls':
+            return self.bitset('hls', 1) if selection.get('hls') else None
+        values = selection.get(facet)
+        if not values:
+            return None
+        bits = 0
+        for value in values:
+            bits |= self.bitset(facet, value)
+        return bits
+
+    def filter(self, selection, base=None, skip=None):
+        # A kiválasztott facet-ek ÉS kapcsolata (a skip facet kihagyásával), base-re szűkítve
+        bits = self.all if base is None else base
+        for facet in FACET_FIELDS + ('bitrate', 'hls'):
+            if facet == skip:
+                continue
+            facet_bits = self.facet_bits(selection, facet)
+            if facet_bits is not None:
+                bits &= facet_bits
+        return bits
+
+    def counts(self, selection, base, options):
+        # Élő darabszámok: minden facet értékhez a többi facet (és a base) szűrőjével
+        counts = {}
+        for facet, values in options.items():
+            rest = self.filter(selection, base, skip=facet)
+            if facet == 'bitrate':
+                counts[facet] = {step: _popcount(rest & self.bitset('bitrate', step)) for step in values}
+            elif facet == 'hls':
+                counts[facet] = _popcount(rest & self.bitset('hls', 1))
+            else:
+                counts[facet] = {value: _popcount(rest & self.bitset(facet, value)) for value in values}
+        return counts
+
+# A népszerűség [0, POPULARITY_SPAN] közé skálázva kerül a keresési pontszámba: ez kisebb, mint az
+# egyezési szintek közötti legkisebb különbség, így csak egy szinten belül dönt a sorrendről.
+# A nyers (log) pontszám POPULARITY_CAP felett telítődik (~ 10^6 szavazat és kattintás).
+POPULARITY_SPAN = 0.9
+POPULARITY_CAP = 22.0
+
+def station_popularity(votes, clickcount, clicktrend, bitrate):
+    # Népszerűségi pontszám (log skálán, hogy a néhány óriás állomás ne nyomjon el mindent)
+    score = 1.0 * math.log1p(max(votes, 0)) + 0.5 * math.log1p(max(clickcount, 0))
+    score += 0.3 * math.copysign(math.log1p(abs(clicktrend)), clicktrend)
+    score += 0.5 * min(max(bitrate, 0), 320) / 320
+    return POPULARITY_SPAN * min(max(score, 0.0), POPULARITY_CAP) / POPULARITY_CAP
+
+class RankedList:
+    # Rangsorolt találati lista a rács modelljeként: a jelöltek kupacban (heapify, O(n)),
+    # és csak annyi kerül rendezve kivételre, amennyit a rács (görgetéskor lapozva) elkér
+    __slots__ = ('catalog', 'heap', 'order', 'counts')
+
+    def __init__(self, catalog, scored, counts=None):
+        # scored: (-pontszám, sorindex) párok
+        self.catalog = catalog
+        self.heap = list(scored)
+        heapq.heapify(self.heap)
+        self.order = array('I')
+        self.counts = counts
+
+    def __len__(self):
+        return len(self.order) + len(self.heap)
+
+    def fill(self, count):
+        # Az első count elem rendezett kivétele a kupacból
+        heap = self.heap
+        while len(self.order) < count and heap:
+            self.order.append(heapq.heappop(heap)[1])
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        if i >= len(self.order):
+            self.fill(i + StationGrid.PAGE_SIZE) # Egy lapnyit előre
+        return self.catalog[self.order[i]]
+
+class StationRanker:
+    # Relevancia sorrend kereséshez: az egyezés minősége (teljes név, név eleje, szó eleje,
+    # részszöveg a névben, címke) + a népszerűség (szavazat, kattintás, trend, bitráta).
+    # A szintek legkisebb különbsége (1.0) nagyobb a népszerűség tartományánál (POPULARITY_SPAN).
+    # A nem működő (lastcheckok=0) állomások már a betöltéskor kiesnek.
+    NAME_EXACT = 12.0
+    NAME_PREFIX = 8.0
+    WORD_PREFIX = 6.0
+    NAME_SUBSTRING = 4.0
+    TAG_EXACT = 3.0
+    TAG_SUBSTRING = 1.0
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.popularity = array('d', map(station_popularity, catalog.column('votes'), catalog.column('clickcount'),
+                                         catalog.column('clicktrend'), catalog.column('bitrate')))
+
+    @classmethod
+    def for_catalog(cls, catalog):
+        # Katalógusonként egyszer számolva (a szűrő munkaszálon)
+        return catalog.derived('ranker', lambda: cls(catalog))
+
+    def match_quality(self, query, name, tags):
+        if query in name:
+            if name == query:
+                return self.NAME_EXACT
+            if name.startswith(query):
+                return self.NAME_PREFIX
+            if (' ' + query) in name:
+                return self.WORD_PREFIX
+            return self.NAME_SUBSTRING
+        if query in tags.split(','):
+            return self.TAG_EXACT
+        return self.TAG_SUBSTRING
+
+    def rank(self, rows, query, first_page, counts=None):
+        # Az első lap még itt (a munkaszálon) rendeződik, a többi görgetéskor
+        catalog = self.catalog
+        names = catalog.column('name')
+        # Normalizált (kisbetűs) címkék a facet oszlopból, ha már elkészült
+        tags = catalog.column('facet:tags') if catalog.has_facets() else [tag.lower() for tag in catalog.column('tags')]
+        popularity = self.popularity
+        match_quality = self.match_quality
+        scored = [(-(match_quality(query, names[i].lower(), tags[i]) + popularity[i]), i) for i in rows]
+        ranked = RankedList(self.catalog, scored, counts)
+        ranked.fill(first_page)
+        return ranked
+
+class SearchIndex:
+    # Trigram (inverz) index a normalizált névre és a vesszővel bontott címkékre.
+    # A posting listák sorindexeket tartalmaznak növekvő (API) sorrendben.
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.names = [name.lower() for name in catalog.column('name')]
+        self.tags = [sys.intern(tags.lower()) for tags in catalog.column('tags')]
+        self.postings = {}
+        self.last_query = None
+        self.last_result = None
+
+        postings = self.postings
+        for i in range(len(catalog)):
+            grams = set()
+            for text in (self.names[i], *self.tags[i].split(',')):
+                for j in range(len(text) - 2):
+                    grams.add(text[j:j + 3])
+            for gram in grams:
+                posting = postings.get(gram)
+                if posting is None:
+                    posting = postings[gram] = array('I')
+                posting.append(i)
+
+    def matches(self, i, query):
+        return query in self.names[i] or query in self.tags[i]
+
+    def search(self, query):
+        # query: már kisbetűs keresőszöveg; a visszatérési érték rendezett sorindex lista
+        if not query:
+            return range(len(self.catalog))
+
+        # Ha az előző lekérdezés része az újnak, elég az előző találatokat szűkíteni
+        candidates = None
+        if self.last_query and self.last_query in query:
+            candidates = self.last_result
+
+        # A vesszőn átnyúló trigramokat nem indexeljük (a címkéket vesszőnél bontjuk)
+        grams = {query[j:j + 3] for j in range(len(query) - 2)}
+        grams = [gram for gram in grams if ',' not in gram]
+        if grams:
+            posting = min((self.postings.get(gram, ()) for gram in grams), key=len)
+            if candidates is None or len(posting) < len(candidates):
+                candidates = posting
+
+        if candidates is None:
+            candidates = range(len(self.catalog)) # Rövid lekérdezés: lineáris keresés
+
+        names = self.names
+        tags = self.tags
+        result = [i for i in candidates if query in names[i] or query in tags[i]]
+        self.last_query = query
+        self.last_result = result
+        return result
+
+def _filter_chunked(indices, predicate, is_cancelled, chunk=4096):
+    # Darabonkénti szűrés, hogy egy újabb kérés félbe tudja szakítani a régit
+    result = []
+    for start in range(0, len(indices), chunk):
+        if is_cancelled():
+            return None
+        result.extend([i for i in indices[start:start + chunk] if predicate(i)])
+    return result
+
+class FilterPipeline:
+    # Háttérszálas szűrés: debounce, generációs megszakítás, csak friss eredmény jut vissza.
+    # compute(params, is_cancelled) a munkaszálon, deliver(params, result) a GTK fő szálán fut.
+    def __init__(self, compute, deliver, debounce_ms=80):
+        self.compute = compute
+        self.deliver = deliver
+        self.debounce_ms = debounce_ms
+        self.generation = 0
+        self.debounce_id = None
+        self.pending = None
+        self.cond = threading.Condition()
+
+        # Mérések: mennyi ideig blokkolja lekérdezésenként a fő szálat
+        self.timings = deque(maxlen=200)
+        self.cancelled = 0
+        self.stale = 0
+
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def submit(self, params, debounce=False):
+        start = time.perf_counter()
+        with self.cond:
+            self.generation += 1
+            generation = self.generation
+        if self.debounce_id:
+            GLib.source_remove(self.debounce_id)
+            self.debounce_id = None
+        submit_ms = (time.perf_counter() - start) * 1000
+        if debounce:
+            self.debounce_id = GLib.timeout_add(self.debounce_ms, self._enqueue, generation, params, submit_ms)
+        else:
+            self._enqueue(generation, params, submit_ms)
+
+    def is_current(self, generation):
+        return generation == self.generation
+
+    def _enqueue(self, generation, params, submit_ms):
+        self.debounce_id = None
+        with self.cond:
+            if self.pending is not None:
+                self.cancelled += 1 # Még el sem kezdődött, felülírjuk
+            self.pending = (generation, params, submit_ms, time.perf_counter())
+            self.cond.notify()
+        return False
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while self.pending is None:
+                    self.cond.wait()
+                generation, params, submit_ms, queued_at = self.pending
+                self.pending = None
+
+            start = time.perf_counter()
+            try:
+                result = self.compute(params, lambda: not self.is_current(generation))
+            except Exception as e:
+                print(f"Szűrési hiba: {e}")
+                continue
+            worker_ms = (time.perf_counter() - start) * 1000
+
+            if result is None or not self.is_current(generation):
+                self.cancelled += 1
+                continue
+            GLib.idle_add(self._deliver, generation, params, result, submit_ms, worker_ms, queued_at)
+
+    def _deliver(self, generation, params, result, submit_ms, worker_ms, queued_at):
+        if not self.is_current(generation):
+            self.stale += 1
+            return False
+        start = time.perf_counter()
+        self.deliver(params, result)
+        deliver_ms = (time.perf_counter() - start) * 1000
+
+        timing = {
+            'query': params.get('query'),
+            'category': params.get('category'),
+            'results': len(result),
+            'worker_ms': worker_ms,
+            'main_blocked_ms': submit_ms + deliver_ms,
+            'latency_ms': (time.perf_counter() - queued_at) * 1000,
+        }
+        self.timings.append(timing)
+        perf_log(f"szűrés {timing['category']!r}/{timing['query']!r}: {timing['results']} találat, "
+                 f"munkaszál {worker_ms:.1f} ms, fő szál blokkolva {timing['main_blocked_ms']:.1f} ms, "
+                 f"teljes {timing['latency_ms']:.1f} ms (megszakítva: {self.cancelled}, elavult: {self.stale})")
+        return False
+
+class PixbufCache:
+    # Korlátos (bájt alapú) LRU a kész, 64x64-es logó pixbufokhoz.
+    # Kulcs: (stationuuid, favicon URL), így a favicon cseréje új bejegyzést jelent.
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def pixbuf_size(pixbuf):
+        try:
+            return pixbuf.get_byte_length()
+        except Exception:
+            return pixbuf.get_rowstride() * pixbuf.get_height()
+
+    def get(self, key, count_miss=True):
+        # count_miss=False: a nézet minden frissítéskor újra rákérdez a még töltődő logókra;
+        # ilyenkor a hiány csak a tényleges betöltésnél számít (miss())
+        with self.lock:
+            pixbuf = self.entries.get(key)
+            if pixbuf is None:
+                if count_miss:
+                    self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return pixbuf
+
+    def miss(self):
+        with self.lock:
+            self.misses += 1
+
+    def put(self, key, pixbuf):
+        nbytes = self.pixbuf_size(pixbuf)
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= self.pixbuf_size(old)
+            self.entries[key] = pixbuf
+            self.size += nbytes
+            while self.size > self.max_bytes and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= self.pixbuf_size(evicted)
+                self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+            }
+
+# A logók normalizált mérete (a pack tár és a kártyák is ezt használják)
+THUMB_SIZE = 64
+# Ennél régebbi bélyegképeknél feltételes kéréssel (ETag/Last-Modified) ellenőrizzük a favicont
+LOGO_REVALIDATE_AGE = 7 * 24 * 3600
+
+class ThumbnailStore:
+    # Előre méretezett RGBA logók néhány hozzáfűzéses pack fájlban, memóriában tartott indexszel.
+    # Olvasás mmap-en keresztül; méretkorlát felett a legrégebben használtak törlődnek,
+    # a sok halott bájtot tartalmazó packokat pedig tömörítés írja újra.
+    MAGIC = b'GRTH'
+    HEADER = struct.Struct('<4sHHH') # magic, szélesség, magasság, kulcs hossz
+    PACK_LIMIT = 8 * 1024 * 1024
+    SAVE_INTERVAL = 10
+
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.index_path = os.path.join(directory, "index.json")
+        self.max_bytes = max_bytes
+        self.lock = threading.RLock()
+        self.index = {} # uuid -> [pack, offset, szélesség, magasság, url crc, utolsó használat, tárolás ideje]
+        self.maps = {}  # pack -> mmap
+        self.live_bytes = 0
+        self.file_bytes = 0
+        self.current_pack = 1
+        self.dirty = False
+        self.last_save = time.time()
+
+        self.reads = 0
+        self.writes = 0
+        self.evictions = 0
+        self.compactions = 0
+
+        self._load_index()
+
+    def _pack_path(self, pack):
+        return os.path.join(self.directory, f"pack-{pack:05d}.bin")
+
+    def _list_packs(self):
+        packs = []
+        for name in os.listdir(self.directory):
+            if name.startswith("pack-") and name.endswith(".bin"):
+                try:
+                    packs.append(int(name[5:-4]))
+                except ValueError:
+                    pass
+        return sorted(packs)
+
+    @staticmethod
+    def _url_key(url):
+        return zlib.crc32(url.encode('utf-8', 'replace'))
+
+    def _record_size(self, uuid, entry):
+        return self.HEADER.size + len(uuid.encode()) + entry[2] * entry[3] * 4
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r") as f:
+                self.index = json.load(f)
+        except Exception:
+            self.index = {}
+
+        packs = self._list_packs()
+        sizes = {pack: os.path.getsize(self._pack_path(pack)) for pack in packs}
+        self.index = {uuid: entry for uuid, entry in self.index.items() if entry[0] in sizes}
+        used = {entry[0] for entry in self.index.values()}
+
+        # Index nélküli (pl. összeomlás után árván maradt) packok törlése
+        for pack in packs:
+            if pack not in used and sizes[pack]:
+                try:
+                    os.remove(self._pack_path(pack))
+                    del sizes[pack]
+                except OSError:
+                    pass
+
+        self.file_bytes = sum(sizes.values())
+        self.live_bytes = sum(self._record_size(uuid, entry) for uuid, entry in self.index.items())
+        self.current_pack = max(sizes) if sizes else 1
+
+    def _read(self, pack, offset, length):
+        mm = self.maps.get(pack)
+        if mm is None or len(mm) < offset + length:
+            # A pack azóta nőtt (vagy még nincs leképezve): újra mmap-eljük
+            if mm is not None:
+                mm.close()
+                del self.maps[pack]
+            try:
+                with open(self._pack_path(pack), "rb") as f:
+                    if os.fstat(f.fileno()).st_size < offset + length:
+                        return None
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                return None
+            self.maps[pack] = mm
+        return mm[offset:offset + length]
+
+    def contains(self, uuid, url):
+        with self.lock:
+            entry = self.index.get(uuid)
+            return entry is not None and entry[4] == self._url_key(url)
+
+    def get(self, uuid, url):
+        with self.lock:
+            entry = self.index.get(uuid)
+            if entry is None or entry[4] != self._url_key(url):
+                return None
+            pack, offset, width, height = entry[:4]
+            key = uuid.encode()
+            record = self._read(pack, offset, self._record_size(uuid, entry))
+            if record is None or record[:4] != self.MAGIC or record[self.HEADER.size:self.HEADER.size + len(key)] != key:
+                self._drop(uuid)
+                return None
+            entry[5] = int(time.time())
+            self.dirty = True
+            self.reads += 1
+            return width, height, record[self.HEADER.size + len(key):]
+
+    def is_stale(self, uuid, max_age):
+        with self.lock:
+            entry = self.index.get(uuid)
+            if entry is None:
+                return False
+            stored = entry[6] if len(entry) > 6 else entry[5]
+            return time.time() - stored > max_age
+
+    def mark_fresh(self, uuid):
+        with self.lock:
+            entry = self.index.get(uuid)
+            if entry is not None:
+                if len(entry) > 6:
+                    entry[6] = int(time.time())
+                else:
+                    entry.append(int(time.time()))
+                self.dirty = True
+
+    def put(self, uuid, url, width, height, rgba):
+        key = uuid.encode()
+        record = self.HEADER.pack(self.MAGIC, width, height, len(key)) + key + rgba
+        with self.lock:
+            path = self._pack_path(self.current_pack)
+            if os.path.exists(path) and os.path.getsize(path) + len(record) > self.PACK_LIMIT:
+                self.current_pack += 1
+                path = self._pack_path(self.current_pack)
+            with open(path, "ab") as f:
+                f.seek(0, os.SEEK_END)
+                offset = f.tell()
+                f.write(record)
+
+            self._drop(uuid)
+            now = int(time.time())
+            self.index[uuid] = [self.current_pack, offset, width, height, self._url_key(url), now, now]
+            self.live_bytes += len(record)
+            self.file_bytes += len(record)
+            self.writes += 1
+            self.dirty = True
+
+            self._evict()
+            if self.file_bytes > self.PACK_LIMIT and self.file_bytes > 2 * self.live_bytes:
+                self.compact()
+            elif time.time() - self.last_save > self.SAVE_INTERVAL:
+                self.save()
+
+    def _drop(self, uuid):
+        entry = self.index.pop(uuid, None)
+        if entry is not None:
+            self.live_bytes -= self._record_size(uuid, entry)
+            self.dirty = True
+
+    def _evict(self):
+        # Méretkorlát: a legrégebben használt bejegyzések törlése a keret 90%-áig
+        if self.live_bytes <= self.max_bytes:
+            return
+        for uuid, entry in sorted(self.index.items(), key=lambda item: item[1][5]):
+            if self.live_bytes <= self.max_bytes * 0.9:
+                break
+            self._drop(uuid)
+            self.evictions += 1
+
+    def compact(self):
+        # Az élő rekordok átírása új packokba, utána a régiek törlése
+        with self.lock:
+            old_packs = self._list_packs()
+            new_pack = (max(old_packs) if old_packs else 0) + 1
+            new_index = {}
+            out = open(self._pack_path(new_pack), "wb")
+            try:
+                for uuid, entry in sorted(self.index.items(), key=lambda item: (item[1][0], item[1][1])):
+                    record = self._read(entry[0], entry[1], self._record_size(uuid, entry))
+                    if record is None:
+                        continue
+                    if out.tell() + len(record) > self.PACK_LIMIT:
+                        out.close()
+                        new_pack += 1
+                        out = open(self._pack_path(new_pack), "wb")
+                    new_index[uuid] = [new_pack, out.tell()] + entry[2:]
+                    out.write(record)
+            finally:
+                out.close()
+
+            self.index = new_index
+            self.current_pack = new_pack
+            self.dirty = True
+            self.save() # Előbb az új index, csak utána töröljük a régi packokat
+
+            for pack in old_packs:
+                mm = self.maps.pop(pack, None)
+                if mm is not None:
+                    mm.close()
+                try:
+                    os.remove(self._pack_path(pack))
+                except OSError:
+                    pass
+            self.live_bytes = sum(self._record_size(uuid, entry) for uuid, entry in self.index.items())
+            self.file_bytes = sum(os.path.getsize(self._pack_path(pack)) for pack in self._list_packs())
+            self.compactions += 1
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            tmp_path = self.index_path + ".tmp"
+            try:
+                with open(tmp_path, "w") as f:
+                    json.dump(self.index, f, separators=(',', ':'))
+                os.replace(tmp_path, self.index_path)
+                self.dirty = False
+            except OSError as e:
+                print(f"Logó index mentési hiba: {e}")
+            self.last_save = time.time()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.index),
+                'live_bytes': self.live_bytes,
+                'file_bytes': self.file_bytes,
+                'packs': len(self._list_packs()),
+                'reads': self.reads,
+                'writes': self.writes,
+                'evictions': self.evictions,
+                'compactions': self.compactions,
+            }
+
+class NegativeCache:
+    # Tartós negatív cache a hibás URL-ekhez (pl. halott faviconok): okonkénti TTL,
+    # ismétlődő hibánál exponenciálisan növekvő tiltási idő.
+    MINUTE = 60
+    HOUR = 60 * MINUTE
+    DAY = 24 * HOUR
+    TTLS = {
+        'html': 7 * DAY,        # Kép helyett HTML oldal jön
+        'not_found': 3 * DAY,   # 404 / 410
+        'http_error': 6 * HOUR, # Egyéb nem-200 válasz
+        'timeout': 30 * MINUTE,
+        'network': HOUR,        # DNS, kapcsolat, SSL hiba
+        'decode': 7 * DAY,      # Egyik dekóder sem ismeri
+    }
+    MAX_TTL = 30 * DAY
+    SAVE_INTERVAL = 30
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {} # url -> [ok, hibák száma, tiltás vége]
+        self.dirty = False
+        self.last_save = time.time()
+        self.avoided = 0
+        self.recorded = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                entries = json.load(f)
+        except Exception:
+            entries = {}
+        # A rég lejárt bejegyzéseket (és a visszalépési számlálójukat) elfelejtjük
+        now = time.time()
+        self.entries = {url: entry for url, entry in entries.items() if entry[2] + self.MAX_TTL > now}
+
+    def should_skip(self, url):
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is not None and entry[2] > time.time():
+                self.avoided += 1
+                return True
+            return False
+
+    def record_failure(self, url, reason):
+        with self.lock:
+            entry = self.entries.get(url)
+            failures = entry[1] + 1 if entry else 1
+            ttl = min(self.TTLS.get(reason, self.HOUR) * 2 ** (failures - 1), self.MAX_TTL)
+            self.entries[url] = [reason, failures, int(time.time() + ttl)]
+            self.recorded += 1
+            self.dirty = True
+        if time.time() - self.last_save > self.SAVE_INTERVAL:
+            self.save()
+
+    def record_success(self, url):
+        with self.lock:
+            if self.entries.pop(url, None) is not None:
+                self.dirty = True
+
+    def save(self):
+        with self.lock:
+            self.last_save = time.time()
+            if not self.dirty:
+                return
+            entries = dict(self.entries)
+            self.dirty = False
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(entries, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Negatív cache mentési hiba: {e}")
+
+    def stats(self):
+        with self.lock:
+            now = time.time()
+            return {
+                'entries': len(self.entries),
+                'blocking': sum(1 for entry in self.entries.values() if entry[2] > now),
+                'avoided_fetches': self.avoided,
+                'recorded_failures': self.recorded,
+            }
+
+class HttpClient:
+    # Közös HTTP réteg: hostonkénti keep-alive poolok, korlátozott összes párhuzamos kérés,
+    # gzip, valamint ETag / Last-Modified alapú feltételes újraellenőrzés (304 esetén nincs újratöltés).
+    USER_AGENT = "GladeRadio/1.0 (+https://github.com/szaturnusz/GladeRadio)"
+    BODY_CACHE_LIMIT = 64 * 1024 # Ekkora válaszokat (pl. playlistek) a memóriában is megtartunk
+    SAVE_INTERVAL = 30
+
+    def __init__(self, validators_path=None, max_connections=16, per_host=4, host_pools=32):
+        self.session = requests.Session()
+        self.adapter = requests.adapters.HTTPAdapter(pool_connections=host_pools, pool_maxsize=per_host, pool_block=True, max_retries=0)
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+        self.session.headers["User-Agent"] = self.USER_AGENT
+        self.session.headers["Accept-Encoding"] = "gzip, deflate"
+        self.slots = threading.BoundedSemaphore(max_connections)
+
+        self.validators_path = validators_path
+        self.lock = threading.Lock()
+        self.validators = {} # url -> [etag, last-modified]
+        self.bodies = OrderedDict() # url -> kis válaszok tartalma (feltételes lekéréshez)
+        self.dirty = False
+        self.last_save = time.time()
+
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_received = 0
+
+        if validators_path:
+            try:
+                with open(validators_path, "r") as f:
+                    self.validators = json.load(f)
+            except Exception:
+                self.validators = {}
+
+    def get(self, url, timeout=5, revalidate=False, stream=False, headers=None):
+        # revalidate=True: ha van tárolt ETag/Last-Modified, feltételes kérést küldünk
+        request_headers = dict(headers or {})
+        if revalidate:
+            with self.lock:
+                validator = self.validators.get(url)
+            if validator:
+                if validator[0]:
+                    request_headers["If-None-Match"] = validator[0]
+                if validator[1]:
+                    request_headers["If-Modified-Since"] = validator[1]
+
+        if stream:
+            # Folyamatos letöltés (pl. a teljes katalógus): a hely a válasz lezárásáig (close) foglalt
+            self.slots.acquire()
+            try:
+                resp = self.session.get(url, timeout=timeout, headers=request_headers, stream=True)
+            except Exception:
+                self.slots.release()
+                raise
+            self._release_on_close(resp)
+        else:
+            with self.slots:
+                resp = self.session.get(url, timeout=timeout, headers=request_headers)
+                self._count_bytes(resp)
+
+        with self.lock:
+            self.requests += 1
+            if resp.status_code == 304:
+                self.not_modified += 1
+            elif resp.status_code == 200:
+                etag = resp.headers.get("ETag")
+                last_modified = resp.headers.get("Last-Modified")
+                if etag or last_modified:
+                    self.validators[url] = [etag, last_modified]
+                    self.dirty = True
+        self.save()
+        return resp
+
+    def _release_on_close(self, resp):
+        # A válasz close() hívása (a with blokk vége is ezt hívja) egyszer adja vissza a helyet
+        close = resp.close
+        released = [False]
+
+        def close_and_release():
+            try:
+                close()
+            finally:
+                with self.lock:
+                    release = not released[0]
+                    released[0] = True
+                if release:
+                    self.slots.release()
+        resp.close = close_and_release
+
+    def _count_bytes(self, resp):
+        # A hálózaton ténylegesen átjött (tömörített) bájtok, ha a urllib3 ismeri
+        try:
+            received = resp.raw.tell()
+        except Exception:
+            received = 0
+        with self.lock:
+            self.bytes_received += received or len(resp.content)
+
+    def fetch_text(self, url, timeout=5):
+        # Kis szöveges erőforrás (pl. playlist) feltételes lekérése; 304 esetén a tárolt tartalom jön vissza
+        with self.lock:
+            cached = self.bodies.get(url)
+        resp = self.get(url, timeout=timeout, revalidate=cached is not None)
+        if resp.status_code == 304 and cached is not None:
+            return cached
+        if resp.status_code != 200:
+            return None
+        text = resp.text
+        if len(text) <= self.BODY_CACHE_LIMIT and url in self.validators:
+            with self.lock:
+                self.bodies[url] = text
+                self.bodies.move_to_end(url)
+                while len(self.bodies) > 256:
+                    self.bodies.popitem(last=False)
+        return text
+
+    def forget(self, url):
+        with self.lock:
+            if self.validators.pop(url, None) is not None:
+                self.dirty = True
+            self.bodies.pop(url, None)
+
+    def connections_opened(self):
+        # Az összes host poolban eddig nyitott kapcsolatok száma
+        total = 0
+        try:
+            pools = self.adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    total += pool.num_connections
+        except Exception:
+            pass
+        return total
+
+    def save(self, force=False):
+        if not self.validators_path:
+            return
+        with self.lock:
+            if not self.dirty or (not force and time.time() - self.last_save < self.SAVE_INTERVAL):
+                return
+            validators = dict(self.validators)
+            self.dirty = False
+            self.last_save = time.time()
+        tmp_path = self.validators_path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(validators, f, separators=(',', ':'))
+            os.replace(tmp_path, self.validators_path)
+        except OSError as e:
+            print(f"HTTP validátor mentési hiba: {e}")
+
+    def stats(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'not_modified': self.not_modified,
+                'bytes_received': self.bytes_received,
+                'connections_opened': self.connections_opened(),
+                'validators': len(self.validators),
+            }
+
+class LazyColumns(dict):
+    # Oszlopok igény szerinti dekódolása a memóriába leképezett katalógus fájlból.
+    # Ha minden oszlop betöltődött, a leképezés lezárul (a fájl felülírható).
+    # A dekódolás zár alatt fut: több szál (szűrés, keresőindex, szinkron) is kérheti
+    # ugyanazt az oszlopot, és a leképezés csak az utolsó dekódolás végén zárulhat le.
+    # RLock, mert a 'same' oszlop betöltése a hivatkozott oszlopot is kérheti.
+    def __init__(self, loaders, mapping):
+        super().__init__()
+        self.loaders = loaders
+        self.mapping = mapping
+        self.lock = threading.RLock()
+
+    def __missing__(self, key):
+        with self.lock:
+            if dict.__contains__(self, key):
+                return dict.__getitem__(self, key)
+            loader = self.loaders.get(key)
+            if loader is None:
+                raise KeyError(key)
+            value = loader()
+            self[key] = value
+            del self.loaders[key]
+            if not self.loaders and self.mapping is not None:
+                self.mapping.close()
+                self.mapping = None
+            return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        if dict.__contains__(self, key):
+            return True
+        with self.lock:
+            return dict.__contains__(self, key) or key in self.loaders
+
+class CatalogFile:
+    # Bináris katalógus formátum: fejléc (magic, verzió, sorok száma, crc32), JSON szakasz tábla
+    # (szinkron állapot + oszlopok helye), majd az oszlopok:
+    #   str      - NUL-lal elválasztott UTF-8 stringek (egyetlen decode + split)
+    #   interned - 'I' indextömb, utána az egyedi stringek táblája (str formában)
+    #   same     - mint a str, de a '\x01' jelzi, hogy az érték azonos a hivatkozott oszlopéval
+    #   i / d / b - array nyers bájtjai
+    #   postings - facet tábla: 'I' eltolás tömb (értékenként), 'I' sorindexek, majd az értékek (str formában)
+    MAGIC = b'GRCB'
+    VERSION = 4
+    HEADER = struct.Struct('<4sHHII') # magic, verzió, foglalt, tábla hossza, crc32 (a fejléc után mindenre)
+
+    @classmethod
+    def save(cls, catalog, state, path):
+        sections = []
+        blobs = []
+        offset = 0
+
+        def add(name, kind, data, extra=None):
+            nonlocal offset
+            sections.append([name, kind, offset, len(data), extra])
+            blobs.append(data)
+            offset += len(data)
+
+        def join(values):
+            return '\0'.join(value.replace('\0', '') for value in values).encode('utf-8', 'replace')
+
+        if not catalog.has_facets():
+            catalog.build_facets()
+
+        for key in CATALOG_STRING_FIELDS + ('facet:tags', 'facet:codec'):
+            column = catalog.column(key)
+            if key in CATALOG_INTERNED_FIELDS or key.startswith('facet:'):
+                table = {}
+                indices = array('I', (table.setdefault(value, len(table)) for value in column)).tobytes()
+                add(key, 'interned', indices + join(table), len(indices))
+            elif key == 'url_resolved':
+                urls = catalog.column('url')
+                add(key, 'same', join('\x01' if value and value == url else value for value, url in zip(column, urls)), 'url')
+            else:
+                add(key, 'str', join(column))
+        for key in CATALOG_INT_FIELDS + CATALOG_FLOAT_FIELDS + ('facet:is_tv',):
+            add(key, catalog.column(key).typecode, catalog.column(key).tobytes())
+        for facet in FACET_FIELDS:
+            postings = catalog.column(f"facet:by_{facet}")
+            offsets = array('I', [0])
+            ids = array('I')
+            for values in postings.values():
+                ids.extend(values)
+                offsets.append(len(ids))
+            offsets = offsets.tobytes()
+            ids = ids.tobytes()
+            add(f"facet:by_{facet}", 'postings', offsets + ids + join(postings), [len(offsets), len(ids)])
+
+        table = json.dumps({'count': len(catalog), 'byteorder': sys.byteorder, 'sync': state,
+                            'sections': sections}).encode('utf-8')
+        crc = zlib.crc32(table)
+        for blob in blobs:
+            crc = zlib.crc32(blob, crc)
+
+        tmp_file = path + ".tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, 0, len(table), crc))
+            f.write(table)
+            for blob in blobs:
+                f.write(blob)
+        os.replace(tmp_file, path)
+
+    @classmethod
+    def load(cls, path):
+        # (katalógus, szinkron állapot); hibás vagy más verziójú fájlnál ValueError
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(mapping) < cls.HEADER.size:
+                raise ValueError("Csonka katalógus fájl")
+            magic, version, _, table_len, crc = cls.HEADER.unpack_from(mapping)
+            if magic != cls.MAGIC or version != cls.VERSION:
+                raise ValueError(f"Ismeretlen katalógus formátum (verzió {version})")
+            view = memoryview(mapping)
+            body = view[cls.HEADER.size:]
+            valid = zlib.crc32(body) == crc
+            body.release()
+            view.release()
+            if not valid:
+                raise ValueError("Sérült katalógus fájl (crc32)")
+            start = cls.HEADER.size + table_len
+            meta = json.loads(mapping[cls.HEADER.size:start])
+        except:
+            mapping.close()
+            raise
+
+        count = meta['count']
+        swap = meta['byteorder'] != sys.byteorder
+        columns = LazyColumns({}, mapping)
+
+        def split(data):
+            return data.decode('utf-8').split('\0') if count else []
+
+        def loader(name, kind, offset, length, extra):
+            begin = start + offset
+            if kind == 'str':
+                return lambda: split(mapping[begin:begin + length])
+            if kind == 'same':
+                def load_same():
+                    refs = columns[extra]
+                    return [ref if value == '\x01' else value for value, ref in zip(split(mapping[begin:begin + length]), refs)]
+                return load_same
+            if kind == 'interned':
+                def load_interned():
+                    table = [sys.intern(value) for value in split(mapping[begin + extra:begin + length])]
+                    indices = array('I')
+                    indices.frombytes(mapping[begin:begin + extra])
+                    if swap:
+                        indices.byteswap()
+                    return list(map(table.__getitem__, indices))
+                return load_interned
+            if kind == 'postings':
+                def load_postings():
+                    offsets = array('I')
+                    offsets.frombytes(mapping[begin:begin + extra[0]])
+                    ids = array('I')
+                    ids.frombytes(mapping[begin + extra[0]:begin + extra[0] + extra[1]])
+                    if swap:
+                        offsets.byteswap()
+                        ids.byteswap()
+                    values = mapping[begin + extra[0] + extra[1]:begin + length]
+                    values = values.decode('utf-8').split('\0') if len(offsets) > 1 else []
+                    return {value: ids[offsets[n]:offsets[n + 1]] for n, value in enumerate(values)}
+                return load_postings
+            def load_array():
+                values = array(kind)
+                values.frombytes(mapping[begin:begin + length])
+                if swap:
+                    values.byteswap()
+                return values
+            return load_array
+
+        for section in meta['sections']:
+            columns.loaders[section[0]] = loader(*section)
+        catalog = StationCatalog()
+        catalog.columns = columns
+        catalog.count = count
+        return catalog, meta.get('sync')
+
+    @staticmethod
+    def migrate(path):
+        # Régi, az alkalmazás által írt bz2 JSON cache beolvasása: (katalógus, szinkron állapot) vagy None
+        if not os.path.exists(path):
+            return None
+        try:
+            with bz2.open(path, "rt") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Régi cache nem olvasható ({path}): {e}")
+            return None
+        state = None
+        if isinstance(data, dict):
+            records = data.get('radios', [])
+            state = data.get('sync')
+        else:
+            records = data
+        if state is None and records and 'changeuuid' in records[0]:
+            # Régi cache nyers API rekordokkal: a vízjel visszafejthető
+            state = CatalogSync.state_from_records(records, now=os.path.getmtime(path))
+        if state:
+            # Az átvett lista kora ismeretlen: a következő szinkron teljes letöltés legyen
+            state = dict(state, last_full=0)
+        return StationCatalog.from_records(records), state
+
+def is_tv_station(tags, codec):
+    # TV csatorna felismerése címkék ÉS kodek alapján
+    tags = tags.lower()
+    codec = codec.lower()
+    # Címke alapú szűrés
+    if 'tv' in tags.split(',') or 'video' in tags or 'television' in tags:
+        return True
+    # Kodek alapú szűrés (ha a címke hiányozna)
+    if 'h.264' in codec or 'h.265' in codec or 'mp4' in codec or 'vp8' in codec or 'vp9' in codec:
+        return True
+    return False
+
+class StationQuery:
+    # Egy szűrt nézet a SQLite katalógusból a rács modelljeként: a darabszámot egyszer kérdezi le,
+    # a sorokat oldalanként (LIMIT/OFFSET) tölti be, az utolsó néhány oldalt megtartva
+    PAGE_SIZE = 100
+    MAX_PAGES = 16
+    counts = None # Élő facet darabszámok csak a memóriabeli katalógusnál
+
+    def __init__(self, db, where, args, order=" ORDER BY id", order_args=()):
+        self.db = db
+        self.where = where
+        self.args = args
+        self.order = order
+        self.order_args = order_args
+        self.count = db.count(where, args)
+        self.pages = OrderedDict()
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        number, offset = divmod(i, self.PAGE_SIZE)
+        page = self.pages.get(number)
+        if page is None:
+            page = self.db.page(self.where, self.args, self.order, self.order_args, self.PAGE_SIZE, number * self.PAGE_SIZE)
+            self.pages[number] = page
+            if len(self.pages) > self.MAX_PAGES:
+                self.pages.popitem(last=False)
+        else:
+            self.pages.move_to_end(number)
+        return page[offset]
+
+class CatalogDB:
+    # Opcionális SQLite katalógus (GLADERADIO_STORE=sqlite): FTS5 trigram index a névre és a címkékre,
+    # indexek az országra, kodekre, nyelvre, hls-re és a TV jelzőre, kedvencek tábla.
+    # A kategória nézetek és a keresés indexelt lekérdezések; a teljes lista nem kerül a memóriába.
+    COLUMNS = CATALOG_FIELDS + ('is_tv', 'popularity')
+    SCHEMA_VERSION = 5 # PRAGMA user_version; eltérésnél az állomás táblák újraépülnek
+
+    def __init__(self, path):
+        if sqlite3 is None:
+            raise RuntimeError("Az sqlite3 modul nem elérhető")
+        self.lock = threading.Lock() # Író kapcsolat (szinkron szál)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] != self.SCHEMA_VERSION:
+                for trigger in ('stations_ai', 'stations_ad', 'stations_au'):
+                    self.conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+                self.conn.execute("DROP TABLE IF EXISTS stations_fts")
+                self.conn.execute("DROP TABLE IF EXISTS stations")
+                self.conn.execute("DROP TABLE IF EXISTS meta")
+                self.conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            self.conn.execute("""CREATE TABLE IF NOT EXISTS stations (
+                id INTEGER PRIMARY KEY,
+                stationuuid TEXT UNIQUE NOT NULL,
+                name TEXT, url TEXT, url_resolved TEXT, favicon TEXT, tags TEXT, country TEXT, countrycode TEXT, codec TEXT, language TEXT,
+                bitrate INTEGER, hls INTEGER, votes INTEGER, clickcount INTEGER, clicktrend INTEGER, geo_lat REAL, geo_long REAL,
+                is_tv INTEGER NOT NULL DEFAULT 0, popularity REAL NOT NULL DEFAULT 0)""")
+            for column in ('country', 'codec', 'language', 'hls', 'is_tv'):
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS stations_{column} ON stations({column})")
+            # Trigram tokenizer: részszöveg keresés, mint a memóriabeli SearchIndex (SQLite >= 3.34)
+            self.conn.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS stations_fts USING fts5(
+                name, tags, content='stations', content_rowid='id', tokenize='trigram')""")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS favorites (stationuuid TEXT PRIMARY KEY)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self._create_triggers()
+        # Külön olvasó kapcsolat a rácsnak (GTK szál): WAL módban a teljes csere tranzakciója alatt
+        # is az utolsó véglegesített állapotot látja, és nem vár az író zárjára
+        self.read_lock = threading.Lock()
+        self.reader = sqlite3.connect(path, check_same_thread=False)
+        self.reader.row_factory = sqlite3.Row
+
+    def _create_triggers(self):
+        # Az FTS tábla követi a stations tábla változásait
+        self.conn.executescript("""
+            CREATE TRIGGER IF NOT EXISTS stations_ai AFTER INSERT ON stations BEGIN
+                INSERT INTO stations_fts(rowid, name, tags) VALUES (new.id, new.name, new.tags);
+            END;
+            CREATE TRIGGER IF NOT EXISTS stations_ad AFTER DELETE ON stations BEGIN
+                INSERT INTO stations_fts(stations_fts, rowid, name, tags) VALUES ('delete', old.id, old.name, old.tags);
+            END;
+            CREATE TRIGGER IF NOT EXISTS stations_au AFTER UPDATE ON stations BEGIN
+                INSERT INTO stations_fts(stations_fts, rowid, name, tags) VALUES ('delete', old.id, old.name, old.tags);
+                INSERT INTO stations_fts(rowid, name, tags) VALUES (new.id, new.name, new.tags);
+            END;""")
+
+    @staticmethod
+    def _values(radio):
+        # Ugyanaz a normalizálás, mint a StationCatalog.append-ben
+        values = []
+        for key in CATALOG_STRING_FIELDS:
+            value = radio.get(key) or ''
+            values.append(value if isinstance(value, str) else str(value))
+        for key in CATALOG_INT_FIELDS:
+            values.append(_to_int(radio.get(key)))
+        for key in CATALOG_FLOAT_FIELDS:
+            value = _to_float(radio.get(key))
+            values.append(None if value != value else value)
+        values.append(1 if is_tv_station(values[CATALOG_FIELDS.index('tags')], values[CATALOG_FIELDS.index('codec')]) else 0)
+        values.append(station_popularity(*(values[CATALOG_FIELDS.index(key)] for key in ('votes', 'clickcount', 'clicktrend', 'bitrate'))))
+        return values
+
+    def replace_catalog(self, catalog, state):
+        # Teljes csere (első betöltés / teljes frissítés): triggerek nélkül, az FTS index egyben épül
+        placeholders = ", ".join("?" * len(self.COLUMNS))
+        with self.lock, self.conn:
+            for trigger in ('stations_ai', 'stations_ad', 'stations_au'):
+                self.conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            self.conn.execute("DELETE FROM stations")
+            self.conn.executemany(f"INSERT INTO stations ({', '.join(self.COLUMNS)}) VALUES ({placeholders})",
+                                  (self._values(row) for row in catalog))
+            self.conn.execute("INSERT INTO stations_fts(stations_fts) VALUES ('rebuild')")
+            self._create_triggers()
+            self._set_state(state)
+
+    def apply_changes(self, changes, removed, state):
+        # Inkrementális szinkron: upsert a változásokra, törlés a hibás/kikapcsolt állomásokra.
+        # Visszaadja, hogy változott-e a katalógus.
+        upserts = {}
+        removed = set(removed)
+        for change in changes:
+            uuid = change.get('stationuuid')
+            if not uuid:
+                continue
+            if 'lastcheckok' in change and str(change['lastcheckok']) == '0':
+                removed.add(uuid)
+                upserts.pop(uuid, None)
+            else:
+                upserts[uuid] = change # Ugyanarra az állomásra a legutolsó változás számít
+                removed.discard(uuid)
+        placeholders = ", ".join("?" * len(self.COLUMNS))
+        updates = ", ".join(f"{column} = excluded.{column}" for column in self.COLUMNS if column != 'stationuuid')
+        with self.lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany("DELETE FROM stations WHERE stationuuid = ?", ((uuid,) for uuid in removed))
+            self.conn.executemany(f"INSERT INTO stations ({', '.join(self.COLUMNS)}) VALUES ({placeholders}) "
+                                  f"ON CONFLICT(stationuuid) DO UPDATE SET {updates}",
+                                  (self._values(change) for change in upserts.values()))
+            changed = self.conn.total_changes != before
+            self._set_state(state)
+        return changed
+
+    def _set_state(self, state):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('sync', ?)", (json.dumps(state),))
+
+    def sync_state(self):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'sync'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_favorites(self, favorites):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM favorites")
+            self.conn.executemany("INSERT INTO favorites (stationuuid) VALUES (?)", ((uuid,) for uuid in favorites))
+
+    def set_favorite(self, uuid, favorite):
+        with self.lock, self.conn:
+            if favorite:
+                self.conn.execute("INSERT OR IGNORE INTO favorites (stationuuid) VALUES (?)", (uuid,))
+            else:
+                self.conn.execute("DELETE FROM favorites WHERE stationuuid = ?", (uuid,))
+
+    def country_counts(self):
+        # [(ország, országkód, állomások száma)] az országindexből
+        with self.read_lock:
+            return [tuple(row) for row in self.reader.execute(
+                "SELECT country, MAX(countrycode), COUNT(*) FROM stations WHERE country != '' GROUP BY country ORDER BY country")]
+
+    def station_count(self):
+        return self.count("", ())
+
+    def where(self, category, query):
+        # (WHERE feltétel, paraméterek) a sidebar kategóriához és a keresőszöveghez
+        clauses = []
+        args = []
+        if category == "favorites":
+            clauses.append("stationuuid IN (SELECT stationuuid FROM favorites)")
+        elif category == "tv":
+            clauses.append("is_tv = 1")
+        elif category.startswith("country:"):
+            clauses.append("country = ?")
+            args.append(category.split(":", 1)[1])
+        if len(query) >= 3:
+            clauses.append("id IN (SELECT rowid FROM stations_fts WHERE stations_fts MATCH ?)")
+            args.append('"' + query.replace('"', '""') + '"')
+        elif query:
+            # Trigramnál rövidebb lekérdezés: LIKE (SQLite-on belül, a listát nem töltjük be)
+            pattern = "%" + self._like_escape(query) + "%"
+            clauses.append("(name LIKE ? ESCAPE '\\' OR tags LIKE ? ESCAPE '\\')")
+            args += [pattern, pattern]
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", tuple(args)
+
+    @staticmethod
+    def _like_escape(text):
+        return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+    def order(self, query):
+        # (ORDER BY, paraméterek): kereséskor a StationRanker súlyai szerint (egyezés + népszerűség),
+        # a LIMIT miatt az SQLite csak a kért lap méretű top-k rendezést végzi
+        if not query:
+            return " ORDER BY id", ()
+        escaped = self._like_escape(query)
+        order = (" ORDER BY (CASE WHEN lower(name) = ? THEN ? WHEN lower(name) LIKE ? ESCAPE '\\' THEN ?"
+                 " WHEN lower(name) LIKE ? ESCAPE '\\' THEN ? WHEN lower(name) LIKE ? ESCAPE '\\' THEN ?"
+                 " WHEN (',' || replace(lower(tags), ', ', ',') || ',') LIKE ? ESCAPE '\\' THEN ? ELSE ? END) + popularity DESC, id")
+        args = (query, StationRanker.NAME_EXACT, escaped + "%", StationRanker.NAME_PREFIX,
+                "% " + escaped + "%", StationRanker.WORD_PREFIX, "%" + escaped + "%", StationRanker.NAME_SUBSTRING,
+                "%," + escaped + ",%", StationRanker.TAG_EXACT, StationRanker.TAG_SUBSTRING)
+        return order, args
+
+    def count(self, where, args):
+        with self.read_lock:
+            return self.reader.execute(f"SELECT COUNT(*) FROM stations{where}", args).fetchone()[0]
+
+    def page(self, where, args, order, order_args, limit, offset):
+        # Egy oldal sor dict-ként (a kártyák és a lejátszó dict-szerű állomást várnak)
+        with self.read_lock:
+            rows = self.reader.execute(f"SELECT {', '.join(CATALOG_FIELDS)} FROM stations{where}{order} LIMIT ? OFFSET ?",
+                                     args + order_args + (limit, offset)).fetchall()
+        return [dict(row) for row in rows]
+
+    def query(self, category, query):
+        where, args = self.where(category, query)
+        return StationQuery(self, where, args, *self.order(query))
+
+    def close(self):
+        with self.read_lock:
+            self.reader.close()
+        with self.lock:
+            self.conn.close()
+
+# Radio Browser API szerver (alapértelmezett tükör) és a tükrök felderítése
+RADIO_BROWSER_API = "https://de1.api.radio-browser.info"
+RADIO_BROWSER_DISCOVERY = "https://all.api.radio-browser.info/json/servers"
+RADIO_BROWSER_DNS = "all.api.radio-browser.info"
+# Katalógus cache (bináris, verziózott formátum) és a régi bz2 JSON cache az átálláshoz
+CATALOG_CACHE_FILE = "radios_cache.bin"
+LEGACY_CATALOG_FILE = "radios_cache_v2.json.bz2" # Csak a saját korábbi cache, a repóban lévő pillanatkép nem
+
+def iter_json_array(chunks):
+    # Egy JSON tömb elemei, ahogy a bájtok megérkeznek (a teljes válasz bevárása nélkül)
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')('replace')
+    buf = ''
+    pos = 0
+    started = False
+    for chunk in chunks:
+        buf = buf[pos:] + text_decoder.decode(chunk)
+        pos = 0
+        n = len(buf)
+        while True:
+            while pos < n and buf[pos] in ' \t\r\n,':
+                pos += 1
+            if pos >= n:
+                break
+            if not started:
+                if buf[pos] != '[':
+                    raise ValueError("A válasz nem JSON tömb")
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == ']':
+                return
+            try:
+                item, pos = decoder.raw_decode(buf, pos)
+            except ValueError:
+                break # Hiányos elem: több adat kell
+            yield item
+    # A tömb lezárása nélkül véget ért válasz (megszakadt letöltés) hiba
+    raise ValueError("Hiányos JSON válasz")
+
+class MirrorManager:
+    # Radio Browser API tükrök: felderítés (/json/servers, ennek hibájakor DNS), párhuzamos
+    # késleltetés mérés, a leggyorsabb használata, hibánál átállás a következőre,
+    # a lapozott kérések körbeforgó elosztása az egészséges tükrök között.
+    PROBE_PATH = "/json/stats"
+    PROBE_TIMEOUT = 3
+    REPROBE_INTERVAL = 6 * 3600 # Ennyi idő után újramérjük a tükröket
+    BACKOFF = 60                # Hibás tükör tiltása (ismétlődő hibánál duplázódik)
+    MAX_BACKOFF = 3600
+    SPREAD_FACTOR = 3           # Elosztásnál a leggyorsabbnál legfeljebb ennyiszer lassabb tükrök...
+    SPREAD_SLACK = 0.05         # ...plusz ennyi mp vesznek részt
+
+    def __init__(self, http, state_path=None, servers=None, discovery_url=RADIO_BROWSER_DISCOVERY,
+                 dns_name=RADIO_BROWSER_DNS, fallback=(RADIO_BROWSER_API,)):
+        # servers: rögzített tükörlista (felderítés nélkül, pl. helyi teszt szerverek)
+        self.http = http
+        self.state_path = state_path
+        self.static = list(servers) if servers else None
+        self.discovery_url = discovery_url
+        self.dns_name = dns_name
+        self.fallback = list(fallback)
+        self.lock = threading.Lock()
+        self.mirrors = {} # url -> {'latency': mp vagy None, 'failures': n, 'down_until': időpont}
+        self.probed_at = 0
+        self.turn = itertools.count()
+        self.requests = {} # url -> sikeres kérések száma (stats())
+        self.failovers = 0
+        self._load()
+
+    def _load(self):
+        if not self.state_path:
+            return
+        try:
+            with open(self.state_path, "r") as f:
+                state = json.load(f)
+            self.mirrors = {url: dict(entry) for url, entry in state['mirrors'].items()}
+            self.probed_at = state.get('probed_at', 0)
+        except Exception:
+            self.mirrors = {}
+            self.probed_at = 0
+
+    def save(self):
+        if not self.state_path:
+            return
+        with self.lock:
+            state = {'mirrors': {url: dict(entry) for url, entry in self.mirrors.items()}, 'probed_at': self.probed_at}
+        tmp_path = self.state_path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            print(f"Tükörlista mentési hiba: {e}")
+
+    @staticmethod
+    def _base_url(name):
+        name = name.rstrip('/')
+        return name if '://' in name else f"https://{name}"
+
+    def discover(self):
+        # Az elérhető API szerverek listája; hiba esetén DNS, végül a beépített tartalék
+        if self.static:
+            return list(self.static)
+        try:
+            resp = self.http.get(self.discovery_url, timeout=self.PROBE_TIMEOUT)
+            resp.raise_for_status()
+            urls = sorted({self._base_url(server['name']) for server in resp.json() if server.get('name')})
+            if urls:
+                return urls
+        except Exception as e:
+            print(f"Tükörlista lekérési hiba: {e}")
+        try:
+            # A Radio Browser ajánlása: a közös név IP-címei, azokból fordított feloldással a hostnevek
+            names = set()
+            for info in socket.getaddrinfo(self.dns_name, 443, proto=socket.IPPROTO_TCP):
+                try:
+                    names.add(socket.gethostbyaddr(info[4][0])[0])
+                except OSError:
+                    pass
+            if names:
+                return sorted(self._base_url(name) for name in names)
+        except OSError as e:
+            print(f"Tükör DNS felderítési hiba: {e}")
+        return list(self.fallback)
+
+    def _probe_one(self, url, results):
+        start = time.perf_counter()
+        try:
+            resp = self.http.get(f"{url}{self.PROBE_PATH}", timeout=self.PROBE_TIMEOUT)
+            resp.raise_for_status()
+            results[url] = time.perf_counter() - start
+        except Exception:
+            results[url] = None
+
+    def probe(self, urls=None):
+        # Párhuzamos mérés: az összes tükör együtt legfeljebb egy időkorlátnyi ideig tart
+        urls = list(urls) if urls is not None else self.discover()
+        results = {}
+        threads = [threading.Thread(target=self._probe_one, args=(url, results), daemon=True) for url in urls]
+        if len(urls) > 1: # Egyetlen tükörnél nincs mit rangsorolni
+            for thread in threads:
+                thread.start()
+            deadline = time.perf_counter() + self.PROBE_TIMEOUT + 1
+            for thread in threads:
+                thread.join(max(0, deadline - time.perf_counter()))
+
+        now = time.time()
+        with self.lock:
+            mirrors = {}
+            for url in urls:
+                entry = self.mirrors.get(url, {'latency': None, 'failures': 0, 'down_until': 0})
+                latency = results.get(url)
+                if len(urls) == 1:
+                    mirrors[url] = entry
+                elif latency is not None:
+                    mirrors[url] = {'latency': latency, 'failures': 0, 'down_until': 0}
+                else:
+                    failures = entry['failures'] + 1
+                    mirrors[url] = {'latency': None, 'failures': failures,
+                                    'down_until': now + min(self.BACKOFF * 2 ** (failures - 1), self.MAX_BACKOFF)}
+            self.mirrors = mirrors
+            self.probed_at = now
+        perf_log(f"tükrök: {self.ranking()}")
+        self.save()
+        return self.ranking()
+
+    def ensure_probed(self):
+        if not self.mirrors or time.time() - self.probed_at > self.REPROBE_INTERVAL:
+            self.probe()
+
+    def _ranked(self):
+        # (url, késleltetés) a gyorsabbtól; a nem mért / hibás tükrök a végén (a hívó fogja a zárat)
+        return sorted(((url, entry['latency']) for url, entry in self.mirrors.items()),
+                      key=lambda item: (item[1] is None, item[1] or 0, item[0]))
+
+    def ranking(self):
+        with self.lock:
+            return self._ranked()
+
+    def candidates(self, spread=False):
+        # Kipróbálási sorrend: egészséges tükrök késleltetés szerint (spread: körbeforgatva),
+        # utánuk a tiltottak, hogy végső esetben azok is sorra kerüljenek
+        self.ensure_probed()
+        now = time.time()
+        with self.lock:
+            healthy = [url for url, _ in self._ranked() if self.mirrors[url]['down_until'] <= now]
+            down = sorted((url for url in self.mirrors if url not in healthy), key=lambda url: self.mirrors[url]['down_until'])
+        if spread and len(healthy) > 1:
+            # Csak a leggyorsabbhoz közeli tükrök között forgatunk, a lassúak hátul maradnak
+            best = self.mirrors[healthy[0]]['latency'] or 0
+            near = [url for url in healthy if (self.mirrors[url]['latency'] or 0) <= best * self.SPREAD_FACTOR + self.SPREAD_SLACK]
+            shift = next(self.turn) % len(near)
+            healthy = near[shift:] + near[:shift] + [url for url in healthy if url not in near]
+        return healthy + down or list(self.fallback)
+
+    def best(self):
+        return self.candidates()[0]
+
+    def mark_failed(self, url):
+        now = time.time()
+        with self.lock:
+            entry = self.mirrors.setdefault(url, {'latency': None, 'failures': 0, 'down_until': 0})
+            entry['failures'] += 1
+            entry['down_until'] = now + min(self.BACKOFF * 2 ** (entry['failures'] - 1), self.MAX_BACKOFF)
+            self.failovers += 1
+        self.save()
+
+    def mark_ok(self, url):
+        with self.lock:
+            self.requests[url] = self.requests.get(url, 0) + 1
+            entry = self.mirrors.get(url)
+            if entry is not None and entry['failures']:
+                entry['failures'] = 0
+                entry['down_until'] = 0
+
+    def request(self, path, spread=False, **kwargs):
+        # Kérés a legjobb tükörre; hálózati hibánál vagy hibás státusznál a következővel próbálkozunk
+        error = None
+        for url in self.candidates(spread):
+            try:
+                resp = self.http.get(f"{url}{path}", **kwargs)
+                resp.raise_for_status()
+            except requests.RequestException as e:
+                print(f"Tükör hiba ({url}): {e}")
+                self.mark_failed(url)
+                error = e
+                continue
+            self.mark_ok(url)
+            return resp
+        raise error or requests.ConnectionError("Nincs elérhető Radio Browser tükör")
+
+    def stats(self):
+        with self.lock:
+            return {
+                'mirrors': len(self.mirrors),
+                'healthy': sum(1 for entry in self.mirrors.values() if entry['down_until'] <= time.time()),
+                'requests': dict(self.requests),
+                'failovers': self.failovers,
+            }
+
+class CatalogSync:
+    # Inkrementális katalógus szinkron: a legutóbbi változás (lastchangeuuid / lastchangetime)
+    # vízjele után csak a változott és a hibássá vált állomásokat töltjük le.
+    PAGE_SIZE = 10000
+    SYNC_INTERVAL = 6 * 3600          # Ennyi idő után kérünk változásokat
+    FULL_REFRESH_INTERVAL = 30 * 86400 # Ennyi idő után teljes letöltés (pl. törölt állomások miatt)
+
+    def __init__(self, http, mirrors=None):
+        self.http = http
+        self.mirrors = mirrors or MirrorManager(http)
+        self.last_stats = {}
+
+    @staticmethod
+    def state_from_records(records, now=None):
+        # Vízjel egy teljes letöltésből: a legutoljára módosított állomás változás azonosítója
+        now = now or time.time()
+        latest = max(records, key=lambda r: r.get('lastchangetime') or '', default=None)
+        return {
+            'lastchangeuuid': latest.get('changeuuid') if latest else None,
+            'lastchangetime': latest.get('lastchangetime') if latest else None,
+            'last_sync': now,
+            'last_full': now,
+        }
+
+    def is_due(self, state, now=None):
+        now = now or time.time()
+        return not state or now - state.get('last_sync', 0) > self.SYNC_INTERVAL
+
+    def needs_full(self, state, now=None):
+        now = now or time.time()
+        return not state or not state.get('lastchangeuuid') or now - state.get('last_full', 0) > self.FULL_REFRESH_INTERVAL
+
+    def _get_json(self, path, timeout=15):
+        # A lapozott kérések az egészséges tükrök között oszlanak el
+        resp = self.mirrors.request(path, spread=True, timeout=timeout)
+        self.last_stats['bytes'] = self.last_stats.get('bytes', 0) + len(resp.content)
+        return resp.json()
+
+    def fetch_full_stream(self, on_chunk=None, first_chunk=200, chunk_size=2000):
+        # Teljes letöltés folyamatos feldolgozással: a katalógus menet közben épül,
+        # az on_chunk értesít a már beérkezett állomásokról.
+        # Ha egy tükör menet közben elakad, a következőről elölről kezdjük (új katalógussal).
+        self.last_stats = {'mode': 'full'}
+        start = time.perf_counter()
+        error = None
+        for url in self.mirrors.candidates():
+            try:
+                result = self._fetch_full_from(url, on_chunk, first_chunk, chunk_size, start)
+            except (requests.RequestException, ValueError) as e:
+                print(f"Tükör hiba ({url}): {e}")
+                self.mirrors.mark_failed(url)
+                error = e
+                continue
+            self.mirrors.mark_ok(url)
+            self.last_stats['mirror'] = url
+            return result
+        raise error or requests.ConnectionError("Nincs elérhető Radio Browser tükör")
+
+    def _fetch_full_from(self, base_url, on_chunk, first_chunk, chunk_size, start):
+        # API hívás - Növelt limit (50.000 helyett 100.000 a biztonság kedvéért)
+        resp = self.http.get(f"{base_url}/json/stations?limit=100000", timeout=15, stream=True)
+        try:
+            resp.raise_for_status()
+        except requests.RequestException:
+            resp.close()
+            raise
+
+        catalog = StationCatalog()
+        seen = set()
+        latest = ('', None) # (lastchangetime, changeuuid) a vízjelhez
+        received = [0]
+
+        def chunks():
+            for chunk in resp.iter_content(64 * 1024):
+                received[0] += len(chunk)
+                yield chunk
+
+        try:
+            pending = 0
+            next_chunk = first_chunk
+            for radio in iter_json_array(chunks()):
+                changetime = radio.get('lastchangetime') or ''
+                if changetime > latest[0]:
+                    latest = (changetime, radio.get('changeuuid'))
+                if catalog.ingest(radio, seen):
+                    pending += 1
+                    if pending >= next_chunk:
+                        if 'first_chunk_s' not in self.last_stats:
+                            self.last_stats['first_chunk_s'] = time.perf_counter() - start
+                        if on_chunk:
+                            on_chunk(catalog)
+                        pending = 0
+                        next_chunk = chunk_size
+        finally:
+            resp.close()
+
+        now = time.time()
+        state = {'lastchangeuuid': latest[1], 'lastchangetime': latest[0] or None, 'last_sync': now, 'last_full': now}
+        self.last_stats['bytes'] = self.last_stats.get('bytes', 0) + received[0]
+        self.last_stats['fetch_s'] = time.perf_counter() - start
+        return catalog, state
+
+    def fetch_changes(self, state):
+        # Lapozás a változásokon a vízjeltől; az utolsó kapott rekord lesz az új vízjel
+        self.last_stats = {'mode': 'incremental'}
+        start = time.perf_counter()
+        changes = []
+        new_state = dict(state)
+        while True:
+            page = self._get_json(f"/json/stations/changed?limit={self.PAGE_SIZE}&lastchangeuuid={new_state['lastchangeuuid']}")
+            if not page:
+                break
+            changes.extend(page)
+            new_state['lastchangeuuid'] = page[-1].get('changeuuid') or new_state['lastchangeuuid']
+            new_state['lastchangetime'] = page[-1].get('lastchangetime') or new_state['lastchangetime']
+            if len(page) < self.PAGE_SIZE:
+                break
+        # A hibássá vált állomásokat az app nem mutatja, ezeket töröltként kezeljük
+        broken = self._get_json(f"/json/stations/broken?limit={self.PAGE_SIZE * 10}")
+        removed = [r.get('stationuuid') for r in broken if r.get('stationuuid')]
+        new_state['last_sync'] = time.time()
+        self.last_stats['fetch_s'] = time.perf_counter() - start
+        self.last_stats['changes'] = len(changes)
+        self.last_stats['removed'] = len(removed)
+        return changes, removed, new_state
+
+    def sync(self, catalog, state):
+        # Háttérszálon: (új katalógus vagy None ha nincs változás, új állapot)
+        changes, removed, new_state = self.fetch_changes(state)
+        start = time.perf_counter()
+        current = set(catalog.column('stationuuid'))
+        if not changes and not current.intersection(removed):
+            self.last_stats['merge_s'] = 0.0
+            return None, new_state
+        merged = catalog.merged(changes, removed)
+        self.last_stats['merge_s'] = time.perf_counter() - start
+        return merged, new_state
+
+def is_playlist_url(url):
+    # Kézzel feloldandó playlist (.m3u, .pls); a HLS/DASH és videó formátumokat a GStreamer kezeli
+    return url.lower().endswith(('.m3u', '.pls'))
+
+class StreamResolver:
+    # Playlistek feloldott stream URL-jeinek tartós, TTL-es cache-e (állomás uuid szerint),
+    # és háttér előfeloldás párhuzamos munkaszálakkal (látható kártyák, kedvencek),
+    # hogy kattintáskor a lejátszás hálózati kérés nélkül indulhasson.
+    TTL = 12 * 3600
+    TIMEOUT = 5
+    SAVE_INTERVAL = 30
+    PREFETCH_GROUPS = ('visible', 'favorites') # Prioritási sorrend
+
+    def __init__(self, http, path=None, workers=4):
+        self.http = http
+        self.path = path
+        self.cond = threading.Condition()
+        self.entries = {}  # uuid -> [playlist URL, feloldott URL, lejárat]
+        self.inflight = {} # uuid -> threading.Event, amíg a feloldás fut
+        self.pending = {}  # csoport -> deque((uuid, url))
+        self.dirty = False
+        self.last_save = time.time()
+        self.hits = 0
+        self.misses = 0
+        self.prefetched = 0
+        self._load()
+        for _ in range(workers):
+            threading.Thread(target=self._run, daemon=True).start()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                entries = json.load(f)
+        except Exception:
+            entries = {}
+        now = time.time()
+        self.entries = {uuid: entry for uuid, entry in entries.items() if entry[2] > now}
+
+    def save(self):
+        with self.cond:
+            self.last_save = time.time()
+            if not self.dirty or not self.path:
+                return
+            entries = dict(self.entries)
+            self.dirty = False
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(entries, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Stream cache mentési hiba: {e}")
+
+    def _fresh(self, uuid, url):
+        # A hívó fogja a zárat; az állomás URL-jének változása (szinkron) érvényteleníti a bejegyzést
+        entry = self.entries.get(uuid)
+        if entry is not None and entry[0] == url and entry[2] > time.time():
+            return entry[1]
+        return None
+
+    def cached(self, uuid, url):
+        # Kattintáskor hálózat nélkül indulhat-e a lejátszás
+        if not is_playlist_url(url):
+            return True
+        with self.cond:
+            return self._fresh(uuid, url) is not None
+
+    def resolve(self, uuid, url, cancelled=None):
+        # Feloldott URL; cache találat esetén azonnal, folyamatban lévő előfeloldást megvárunk.
+        # cancelled(): ha közben újabb kérés érkezett, None-nal visszalépünk (nem indul letöltés)
+        if not is_playlist_url(url) or not uuid:
+            return self.resolve_url(url)
+        with self.cond:
+            resolved = self._fresh(uuid, url)
+            event = self.inflight.get(uuid)
+        if resolved is None and event is not None:
+            deadline = time.time() + self.TIMEOUT
+            while not event.wait(0.1) and time.time() < deadline:
+                if cancelled and cancelled():
+                    return None
+            with self.cond:
+                resolved = self._fresh(uuid, url)
+        if resolved is not None:
+            with self.cond:
+                self.hits += 1
+            return resolved
+        if cancelled and cancelled():
+            return None
+        with self.cond:
+            self.misses += 1
+        return self._resolve_and_store(uuid, url) or self.resolve_url(url, fetch=False)
+
+    def _resolve_and_store(self, uuid, url):
+        with self.cond:
+            event = self.inflight.setdefault(uuid, threading.Event())
+        try:
+            resolved = self._resolve_playlist(self.resolve_url(url, fetch=False))
+            if resolved is not None:
+                with self.cond:
+                    self.entries[uuid] = [url, resolved, int(time.time() + self.TTL)]
+                    self.dirty = True
+            return resolved
+        finally:
+            with self.cond:
+                if self.inflight.get(uuid) is event:
+                    del self.inflight[uuid]
+            event.set()
+            if time.time() - self.last_save > self.SAVE_INTERVAL:
+                self.save()
+
+    def forget(self, uuid):
+        # Lejátszási hiba után a következő kattintás újra felold (elavult lehet a cél)
+        with self.cond:
+            if self.entries.pop(uuid, None) is not None:
+                self.dirty = True
+
+    def prefetch(self, group, stations):
+        # stations: (uuid, url) párok; a csoport még el nem kezdett korábbi kérései lecserélődnek
+        with self.cond:
+            jobs = deque((uuid, url) for uuid, url in stations
+                         if uuid and url and is_playlist_url(url) and self._fresh(uuid, url) is None)
+            if not jobs and not self.pending.get(group):
+                return
+            self.pending[group] = jobs
+            self.cond.notify_all()
+
+    def _next_job(self):
+        for group in self.PREFETCH_GROUPS:
+            jobs = self.pending.get(group)
+            while jobs:
+                uuid, url = jobs.popleft()
+                if uuid not in self.inflight and self._fresh(uuid, url) is None:
+                    return uuid, url
+        return None
+
+    def _run(self):
+        while True:
+            with self.cond:
+                job = self._next_job()
+                while job is None:
+                    self.cond.wait()
+                    job = self._next_job()
+            if self._resolve_and_store(*job) is not None:
+                with self.cond:
+                    self.prefetched += 1
+
+    def stats(self):
+        with self.cond:
+            return {
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'prefetched': self.prefetched,
+                'pending': sum(len(jobs) for jobs in self.pending.values()),
+            }
+
+    def resolve_url(self, url, fetch=True):
+        # Playlist fájlok (.m3u, .pls) manuális feloldása, 
+        # mert a GStreamer néha elhasal rajtuk (text/uri-list hiba)
+        # DE: Modern streaming formátumokat (HLS, DASH, Video) NE bántsuk!
+        
+        # Ázsiai TV javítás (AliCDN audio-only paraméterek eltávolítása)
+        if "myalicdn.com" in url and ("BR=audio" in url or "adapt=0" in url):
+            url = url.replace("BR=audio", "").replace("adapt=0", "").replace("?&", "?").replace("&&", "&").strip("?&")
+            # Ha az URL vége ? vagy &, vágjuk le
+            if url.endswith("?") or url.endswith("&"):
+                url = url[:-1]
+        if fetch:
+            return self._resolve_playlist(url) or url
+        return url
+
+    def _resolve_playlist(self, url):
+        # A playlist első stream URL-je (HLS esetén maga az URL); hiba esetén None
+        if not is_playlist_url(url):
+            return url
+        try:
+            content = self.http.fetch_text(url, timeout=self.TIMEOUT)
+            if content is not None:
+                # HLS detektálás: Ha HLS tagek vannak benne, hagyjuk a GStreamerre
+                # Mert a manuális sor-kiválasztás elronthatja a relatív linkeket vagy a sávszélesség-választást
+                if "#EXT-X-STREAM-INF" in content or "#EXT-X-TARGETDURATION" in content:
+                    return url
+
+                lines = content.splitlines()
+                
+                # PLS formátum
+                if 'pls' in url.lower() or '[playlist]' in content.lower():
+                    for line in lines:
+                        if line.lower().strip().startswith('file1='):
+                            return line.split('=', 1)[1].strip()
+                
+                # M3U formátum (első érvényes URL)
+                for line in lines:
+                    line = line.strip()
+                    if line and not line.startswith('#') and line.startswith('http'):
+                        return line
+        except Exception as e:
+            print(f"Playlist feloldási hiba: {e}")
+        return None
+
+class BufferPolicy:
+    # Adásonkénti pufferelés: a kiinduló érték az állomás bitrátájából, kodekjéből és HLS
+    # jelzőjéből jön (a kis bitrátájú rádió hamar indulhat, a videónak több tartalék kell),
+    # majd a megfigyelt újrapufferelések és puffer szintek alapján állomásonként hangolódik.
+    # A hangolás (szorzó) munkamenetek között megmarad.
+    SECOND = 1000000000
+    DEFAULT = (3.0, 4 * 1024 * 1024) # (mp, bájt) ismeretlen bitrátánál (a korábbi fix érték)
+    MIN_SCALE = 0.5
+    MAX_SCALE = 4.0
+    REBUFFER_GROWTH = 1.5   # Újrapufferelés után ennyivel több tartalék
+    LOW_LEVEL = 30          # Lejátszás közben ez alatti puffer szint: "majdnem" kifogyott
+    LOW_LEVEL_GROWTH = 1.2
+    CLEAN_SESSION = 300     # Ennyi mp zavartalan lejátszás után óvatosan csökkentünk
+    CLEAN_DECAY = 0.9
+    MAX_AGE = 90 * 86400
+    SAVE_INTERVAL = 30
+
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {} # uuid -> [szorzó, újrapufferelések, munkamenetek, utolsó frissítés]
+        self.dirty = False
+        self.last_save = time.time()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                entries = json.load(f)
+        except Exception:
+            entries = {}
+        now = time.time()
+        self.entries = {uuid: entry for uuid, entry in entries.items() if entry[3] + self.MAX_AGE > now}
+
+    def save(self):
+        with self.lock:
+            self.last_save = time.time()
+            if not self.dirty or not self.path:
+                return
+            entries = dict(self.entries)
+            self.dirty = False
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(entries, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Pufferelési beállítások mentési hiba: {e}")
+
+    @staticmethod
+    def seed(radio):
+        # Kiinduló (mp, bájt) az állomás adataiból
+        bitrate = int(radio.get('bitrate') or 0)
+        video = is_tv_station(radio.get('tags') or '', radio.get('codec') or '')
+        hls = bool(radio.get('hls'))
+        if video:
+            # A HLS szegmensekben érkezik: legalább egy-két szegmensnyi tartalék kell
+            return (8.0 if hls else 6.0), 16 * 1024 * 1024
+        if not bitrate:
+            return BufferPolicy.DEFAULT
+        if hls:
+            seconds = 3.0
+        elif bitrate <= 64:
+            seconds = 1.0
+        elif bitrate <= 192:
+            seconds = 1.5
+        else:
+            seconds = 2.0
+        # A méret a bitrátából, bőséges ráhagyással (a duration legyen a szűk keresztmetszet)
+        size = max(64 * 1024, int(bitrate * 1000 / 8 * seconds * 4))
+        return seconds, size
+
+    def settings(self, radio):
+        # (buffer-duration ns, buffer-size bájt) a hangolással együtt
+        seconds, size = self.seed(radio)
+        with self.lock:
+            entry = self.entries.get(radio.get('stationuuid'))
+        scale = entry[0] if entry else 1.0
+        return int(seconds * scale * self.SECOND), int(size * max(scale, 1.0))
+
+    def _update(self, uuid, factor, rebuffers=0, session=False):
+        if not uuid:
+            return
+        with self.lock:
+            entry = self.entries.get(uuid) or [1.0, 0, 0, 0]
+            entry[0] = min(self.MAX_SCALE, max(self.MIN_SCALE, entry[0] * factor))
+            entry[1] += rebuffers
+            entry[2] += 1 if session else 0
+            entry[3] = int(time.time())
+            self.entries[uuid] = entry
+            self.dirty = True
+        if time.time() - self.last_save > self.SAVE_INTERVAL:
+            self.save()
+
+    def record_rebuffer(self, uuid):
+        # Lejátszás közbeni kifogyás: a következő indításnál (és előtöltésnél) több tartalék
+        self._update(uuid, self.REBUFFER_GROWTH, rebuffers=1)
+
+    def record_session(self, uuid, played, rebuffers, min_level):
+        # Munkamenet vége: zavartalan, hosszú lejátszás után kisebb puffer (gyorsabb indulás),
+        # alacsony szintek esetén kicsit nagyobb
+        if rebuffers:
+            factor = 1.0 # Már növeltük
+        elif min_level is not None and min_level < self.LOW_LEVEL:
+            factor = self.LOW_LEVEL_GROWTH
+        elif played >= self.CLEAN_SESSION:
+            factor = self.CLEAN_DECAY
+        else:
+            return
+        self._update(uuid, factor, session=True)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'tuned_stations': len(self.entries),
+                'rebuffers': sum(entry[1] for entry in self.entries.values()),
+            }
+
+class PlayerEngine:
+    # A lejátszó pipeline-ok gazdája. Előre felépített playbin-ek kis készlete: állomásváltáskor
+    # nem kell új pipeline-t építeni és a jelzéseket újra bekötni; a valószínű következő állomások
+    # (előző/következő) a háttérben előtöltődnek (PAUSED), váltáskor azonnal PLAYING-be kapcsolhatók.
+    # Az állapotváltások (és URI beállítások) munkaszálon, pipeline-onként sorrendben futnak, így a
+    # GTK fő ciklus sosem vár a GStreamerre, és egy régi pipeline beragadt lebontása sem tartja fel
+    # az új adást; a felület a bus üzenetekből (state-changed, async-done) frissített logikai
+    # állapotot látja, a beragadt váltásokat időkorlát (watchdog) zárja le.
+    POOL_SIZE = 2     # Tartalék, NULL állapotú pipeline-ok
+    PREROLL_SLOTS = 2 # Egyszerre előtöltött állomások
+    TRANSITION_TIMEOUT = 15 # Ennyi mp alatt el kell indulnia az adásnak (illetve előtöltődnie)
+    PREROLL_MAX_AGE = 30    # Ennél régebbi előtöltés eldobva: a szerver a nem olvasó klienst bontja
+    REBUFFER_GRACE = 1.0    # Az indulás után ennyi mp-en belüli kifogyás még nem újrapufferelés
+    PLAY_FLAG_VIDEO = 1 << 0 # GstPlayFlags (régi playbin 'flags'): videó megjelenítés
+
+    # Logikai állapotok (a felület ezt látja, nem kérdezi le a pipeline-t)
+    STOPPED = 'stopped'
+    CONNECTING = 'connecting'
+    PLAYING = 'playing'
+    PAUSED = 'paused'
+    BUFFERING = 'buffering' # Lejátszás közbeni kifogyás, a puffer töltődik
+    ERROR = 'error'
+
+    def __init__(self, setup, on_state=None, policy=None):
+        # setup(playbin): jelzések bekötése (source-setup, bus üzenetek)
+        # on_state(állapot, részletek): fő szálon hívódik a logikai állapot változásakor
+        # policy: BufferPolicy az adásonkénti pufferelési beállításokhoz
+        self.setup = setup
+        self.on_state = on_state
+        self.policy = policy
+        self.idle = []
+        self.prerolled = OrderedDict() # feloldott URL -> PAUSED playbin
+        self.preroll_started = {}      # feloldott URL -> indítás ideje (amíg nincs PAUSED-ben)
+        self.preroll_time = {}         # feloldott URL -> indítás ideje (a lejárathoz)
+        self.active = None
+        self.active_reusable = True
+        self.active_url = None
+        self.active_radio = None
+        self.active_prerolled = False # Előtöltésből jött: hibánál egyszer friss pipeline-nal próbáljuk
+        self.state = self.STOPPED
+        self.target = Gst.State.NULL
+        # Az aktív munkamenet pufferelése: élő forrás (nincs preroll), éppen tölt-e, megfigyelések
+        self.active_key = None
+        self.live = False
+        self.buffering = False
+        self.session_start = None
+        self.session_rebuffers = 0
+        self.session_min_level = None
+        self.rebuffers = 0
+        self.deadline = None
+        self.volume = 1.0
+        self.video_enabled = True # Csak hang módban (rejtett videó ablak) a videó ág ki van kapcsolva
+        self.video_factory = self.pipeline_factory() # A rádiók mindig a régi playbin-en szólnak
+        self.streams = {} # playbin3 (csak TV) -> {'collection': GstStreamCollection, 'selected': [GstStream]}
+        self.refill_id = None
+        self.watchdog_id = None
+        self.built = 0
+        self.preroll_hits = 0
+        self.preroll_misses = 0
+        self.timeouts = 0
+        self.expired = 0
+        self.retries = 0
+
+        self.cond = threading.Condition()
+        self.ops = {} # playbin -> deque(műveletek), amíg a pipeline munkaszála fut
+        self.slowest_op = 0.0
+        self.fill_pool()
+
+    def _run(self, playbin):
+        # Egy pipeline munkaszála: a műveletei (set_state, uri) sorrendben; a NULL-ba váltás
+        # (pl. egy nem válaszoló HTTP forrás lebontása) csak a saját sorát tartja fel.
+        # Üres sornál a szál kilép, a következő művelet újat indít.
+        while True:
+            with self.cond:
+                queue = self.ops[playbin]
+                if not queue:
+                    del self.ops[playbin]
+                    return
+                op = queue.popleft()
+            start = time.perf_counter()
+            try:
+                op()
+            except Exception as e:
+                print(f"Lejátszó hiba: {e}")
+            with self.cond:
+                self.slowest_op = max(self.slowest_op, time.perf_counter() - start)
+
+    def _submit(self, playbin, op):
+        with self.cond:
+            queue = self.ops.get(playbin)
+            if queue is not None:
+                queue.append(op)
+                return
+            self.ops[playbin] = deque([op])
+        threading.Thread(target=self._run, args=(playbin,), daemon=True).start()
+
+    def _start(self, playbin, url, state, buffering=None):
+        # buffering: (buffer-duration ns, buffer-size bájt), csak NULL állapotú pipeline-ra
+        def op():
+            if buffering is not None:
+                playbin.set_property("buffer-duration", buffering[0])
+                playbin.set_property("buffer-size", buffering[1])
+            if url is not None:
+                playbin.set_property("uri", url)
+            if playbin.set_state(state) == Gst.StateChangeReturn.NO_PREROLL and playbin is self.active:
+                self.live = True # Élő forrás: a pufferelés miatt nem szüneteltetünk
+        self._submit(playbin, op)
+
+    @staticmethod
+    def pipeline_factory():
+        # A TV adások pipeline-ja. playbin3 (GStreamer >= 1.22, itt már stabil): csak hang módban a
+        # videó folyam kiválasztása megszűnik (select-streams), a decodebin3 a videó dekódert is
+        # lebontja. A régi playbin csak a videó kimenetet kapcsolja ki, a dekóder tovább fut.
+        # GLADERADIO_PLAYBIN=playbin: TV-hez is a régi.
+        forced = os.environ.get("GLADERADIO_PLAYBIN")
+        if forced in ("playbin", "playbin3"):
+            return forced
+        if Gst.version() >= (1, 22) and Gst.ElementFactory.find("playbin3"):
+            return "playbin3"
+        return "playbin"
+
+    def _make(self, factory="playbin"):
+        # A pufferelést (buffer-duration ns, buffer-size) adásonként a BufferPolicy adja indításkor
+        playbin = Gst.ElementFactory.make(factory, None)
+        self.setup(playbin)
+        bus = playbin.get_bus()
+        bus.connect("message::state-changed", self.on_state_changed)
+        bus.connect("message::async-done", self.on_async_done)
+        bus.connect("message::buffering", self.on_buffering)
+        if factory == "playbin3":
+            self.streams[playbin] = {'collection': None, 'selected': []}
+            bus.connect("message::stream-collection", self.on_stream_collection)
+            bus.connect("message::streams-selected", self.on_streams_selected)
+        self.built += 1
+        return playbin
+
+    def fill_pool(self):
+        self.refill_id = None
+        while len(self.idle) < self.POOL_SIZE:
+            self.idle.append(self._make())
+        return False
+
+    def _take(self):
+        playbin = self.idle.pop() if self.idle else self._make()
+        # A készlet pótlása ráér: a fő ciklus következő üres idejében
+        if self.refill_id is None:
+            self.refill_id = GLib.idle_add(self.fill_pool)
+        return playbin
+
+    def _release(self, playbin, reusable=True):
+        # NULL állapotba a pipeline saját munkaszálán; a készletbe csak a lebontás után kerül vissza,
+        # így egy beragadt lebontás sosem kerül egy új adás indítása elé
+        self.streams.pop(playbin, None) # A következő adás saját folyam listát kap
+        def op():
+            playbin.set_state(Gst.State.NULL)
+            GLib.idle_add(self._recycle, playbin, reusable)
+        self._submit(playbin, op)
+
+    def _recycle(self, playbin, reusable):
+        # Fő szálon: újrahasznosítható, ha van hely (a videós pipeline-t eldobjuk, a videó ablak
+        # újranyitásához tiszta pipeline kell)
+        if reusable and len(self.idle) < self.POOL_SIZE:
+            self.idle.append(playbin)
+        else:
+            playbin.get_bus().remove_signal_watch()
+        return False
+
+    def owns(self, bus):
+        return self.active is not None and bus == self.active.get_bus()
+
+    def _playbin_for(self, bus):
+        for playbin in itertools.chain((self.active,) if self.active is not None else (), self.prerolled.values(), self.idle):
+            if bus == playbin.get_bus():
+                return playbin
+        return None
+
+    def _set_logical(self, state, detail=None):
+        if state == self.state and detail is None:
+            return
+        self.state = state
+        if self.on_state:
+            self.on_state(state, detail)
+
+    def _arm_watchdog(self):
+        if self.watchdog_id is None:
+            self.watchdog_id = GLib.timeout_add_seconds(1, self._watchdog)
+
+    def play(self, url, reusable=True, radio=None, video=False):
+        # Váltás: előtöltött pipeline esetén azonnal, egyébként egy kész, üres pipeline-nal.
+        # video: TV adás, saját (nem előtöltött, nem a készletből jövő) pipeline a video_factory-ből
+        playbin = None if video else self.prerolled.pop(url, None)
+        self.preroll_started.pop(url, None)
+        self.preroll_time.pop(url, None)
+        self.active_url = url
+        self.active_radio = radio
+        self.active_prerolled = playbin is not None
+        buffering = None
+        if playbin is not None:
+            self.preroll_hits += 1
+            url = None # Az URI és a pufferelés már be van állítva
+        else:
+            self.preroll_misses += 1
+            playbin = self._make(self.video_factory) if video else self._take()
+            buffering = self._buffering(radio)
+        if self.active is not None:
+            self._end_session()
+            self._release(self.active, self.active_reusable)
+        self.active = playbin
+        self.active_reusable = reusable
+        self.active_key = radio.get('stationuuid') if radio else None
+        self.live = False
+        self.buffering = False
+        playbin.set_property("volume", self.volume)
+        self.target = Gst.State.PLAYING
+        self.deadline = time.time() + self.TRANSITION_TIMEOUT
+        self._set_logical(self.CONNECTING)
+        # Új adás mindig videóval indul (a készletből jövő pipeline lehet csak hang módban hagyva)
+        self.video_enabled = True
+        self._submit(playbin, lambda: self._apply_video(playbin, True))
+        self._start(playbin, url, Gst.State.PLAYING, buffering)
+        self._arm_watchdog()
+        return playbin
+
+    def retry(self):
+        # Az előtöltésből átvett pipeline hibája (pl. a szerver közben bontotta a várakozó kapcsolatot):
+        # egyszer újraindítjuk egy friss pipeline-nal. Visszaadja az új pipeline-t (vagy None-t).
+        if not self.active_prerolled or self.target != Gst.State.PLAYING:
+            return None
+        self.retries += 1
+        return self.play(self.active_url, self.active_reusable, self.active_radio)
+
+    def _buffering(self, radio):
+        if self.policy is None or radio is None:
+            return int(BufferPolicy.DEFAULT[0] * BufferPolicy.SECOND), BufferPolicy.DEFAULT[1]
+        return self.policy.settings(radio)
+
+    def _end_session(self):
+        # Az aktív adás megfigyeléseinek átadása a hangolásnak
+        if self.policy is not None and self.session_start is not None:
+            self.policy.record_session(self.active_key, time.time() - self.session_start,
+                                       self.session_rebuffers, self.session_min_level)
+        self.session_start = None
+        self.session_rebuffers = 0
+        self.session_min_level = None
+
+    def on_buffering(self, bus, msg):
+        # Nem élő forrásnál a puffer kifogyásakor szünet, feltöltődéskor folytatás;
+        # a lejátszás közbeni kifogyás (újrapufferelés) és a puffer szintek a hangoláshoz kellenek
+        if not self.owns(bus) or self.live or self.target != Gst.State.PLAYING:
+            return
+        percent = msg.parse_buffering()
+        if self.state == self.PLAYING and not self.buffering:
+            self.session_min_level = percent if self.session_min_level is None else min(self.session_min_level, percent)
+        if percent < 100 and not self.buffering:
+            self.buffering = True
+            # Az indulás utáni első pillanat még a kezdeti töltéshez tartozik
+            if self.state == self.PLAYING and time.time() - self.session_start > self.REBUFFER_GRACE:
+                self.rebuffers += 1
+                self.session_rebuffers += 1
+                if self.policy is not None:
+                    self.policy.record_rebuffer(self.active_key)
+                self.deadline = time.time() + self.TRANSITION_TIMEOUT
+                self._set_logical(self.BUFFERING, percent)
+                self._arm_watchdog()
+            self._start(self.active, None, Gst.State.PAUSED)
+        elif percent >= 100 and self.buffering:
+            self.buffering = False
+            self._start(self.active, None, Gst.State.PLAYING)
+
+    def pause(self):
+        if self.active is None:
+            return
+        self.target = Gst.State.PAUSED
+        self.deadline = None
+        self._set_logical(self.PAUSED)
+        self._start(self.active, None, Gst.State.PAUSED)
+
+    def resume(self):
+        if self.active is None:
+            return
+        self.buffering = False
+        self.target = Gst.State.PLAYING
+        self.deadline = time.time() + self.TRANSITION_TIMEOUT
+        self._set_logical(self.CONNECTING)
+        self._start(self.active, None, Gst.State.PLAYING)
+        self._arm_watchdog()
+
+    def stop(self):
+        self._end_session()
+        self.target = Gst.State.NULL
+        self.deadline = None
+        if self.active is not None:
+            self._start(self.active, None, Gst.State.NULL)
+        self._set_logical(self.STOPPED)
+
+    def fail(self, detail=None):
+        # Lejátszási hiba az aktív pipeline-on: leállítjuk, a felület hibát mutat
+        self._end_session()
+        self.target = Gst.State.NULL
+        self.deadline = None
+        if self.active is not None:
+            self._start(self.active, None, Gst.State.NULL)
+        self._set_logical(self.ERROR, detail)
+
+    def playing(self):
+        # A felhasználó szándéka szerint szól-e (a play/szünet gombhoz)
+        return self.target == Gst.State.PLAYING
+
+    def on_state_changed(self, bus, msg):
+        # Fő szálon (bus jelzés): csak a pipeline-ok saját (nem az elemeik) váltásai érdekelnek
+        _, new, _ = msg.parse_state_changed()
+        if self.active is not None and msg.src == self.active:
+            if new == Gst.State.PLAYING and self.target == Gst.State.PLAYING:
+                self.deadline = None
+                if self.session_start is None:
+                    self.session_start = time.time()
+                self._set_logical(self.PLAYING)
+            return
+        if new == Gst.State.PAUSED:
+            for url, playbin in self.prerolled.items():
+                if msg.src == playbin:
+                    self.preroll_started.pop(url, None)
+                    break
+
+    def on_async_done(self, bus, msg):
+        # Szünetre váltás (preroll) befejeződött az aktív pipeline-on
+        if self.owns(bus) and self.target == Gst.State.PAUSED:
+            self._set_logical(self.PAUSED)
+
+    def _watchdog(self):
+        now = time.time()
+        if self.deadline is not None and now > self.deadline and self.state in (self.CONNECTING, self.BUFFERING):
+            self.timeouts += 1
+            self.fail("timeout")
+        for url, started in list(self.preroll_started.items()):
+            if now - started > self.TRANSITION_TIMEOUT:
+                # Be nem töltődő előtöltés: felszabadítjuk
+                del self.preroll_started[url]
+                self.preroll_time.pop(url, None)
+                playbin = self.prerolled.pop(url, None)
+                if playbin is not None:
+                    self.timeouts += 1
+                    self._release(playbin, False)
+        for url, started in list(self.preroll_time.items()):
+            if now - started > self.PREROLL_MAX_AGE:
+                # Túl régóta várakozó előtöltés: a kapcsolata már halott lehet, váltáskor frissen indul
+                del self.preroll_time[url]
+                self.expired += 1
+                self._release(self.prerolled.pop(url))
+        if self.deadline is None and not self.preroll_time:
+            self.watchdog_id = None
+            return False
+        return True
+
+    def preroll(self, stations):
+        # A kívánt előtöltések teljes listája ((feloldott URL, állomás) párok): ami kimaradt, felszabadul
+        stations = [(url, radio) for url, radio in stations if url][:self.PREROLL_SLOTS]
+        urls = [url for url, _ in stations]
+        for url in list(self.prerolled):
+            if url not in urls:
+                self.preroll_started.pop(url, None)
+                self.preroll_time.pop(url, None)
+                self._release(self.prerolled.pop(url))
+        for url, radio in stations:
+            if url in self.prerolled:
+                continue
+            playbin = self._take()
+            playbin.set_property("volume", self.volume)
+            self._start(playbin, url, Gst.State.PAUSED, self._buffering(radio))
+            self.prerolled[url] = playbin
+            self.preroll_started[url] = self.preroll_time[url] = time.time()
+        if self.preroll_time:
+            self._arm_watchdog()
+        return False
+
+    def discard(self, bus):
+        # Hibás előtöltés eldobása (pl. halott adás), hogy váltáskor ne ezt kapjuk
+        for url, playbin in list(self.prerolled.items()):
+            if bus == playbin.get_bus():
+                del self.prerolled[url]
+                self.preroll_started.pop(url, None)
+                self.preroll_time.pop(url, None)
+                self._release(playbin, False)
+                return True
+        return False
+
+    def set_video(self, enabled):
+        # Csak hang mód: lejátszás közben a videó ág lekapcsolása, a hang megszakítás nélkül
+        # szól tovább; visszakapcsoláskor a videó folyam újra kiválasztódik (új dekóder és sink)
+        self.video_enabled = enabled
+        if self.active is not None:
+            playbin = self.active
+            self._submit(playbin, lambda: self._apply_video(playbin, enabled))
+
+    def on_stream_collection(self, bus, msg):
+        # playbin3: az adás folyamai (hang, videó, felirat); a kiválasztás ebből dolgozik
+        playbin = self._playbin_for(bus)
+        if playbin is not None:
+            self.streams.setdefault(playbin, {'selected': []})['collection'] = msg.parse_stream_collection()
+
+    def on_streams_selected(self, bus, msg):
+        # playbin3: az éppen kiválasztott folyamok. Csak hang módban egy újra kiválasztott
+        # videó folyam (pl. új folyam lista HLS variáns váltás után) azonnal lekapcsolódik.
+        playbin = self._playbin_for(bus)
+        if playbin is None:
+            return
+        selected = [msg.streams_selected_get_stream(i) for i in range(msg.streams_selected_get_size())]
+        self.streams.setdefault(playbin, {'collection': None})['selected'] = selected
+        if playbin is self.active and not self.video_enabled and any(self._is_video(stream) for stream in selected):
+            self._submit(playbin, lambda: self._apply_video(playbin, False))
+
+    @staticmethod
+    def _is_video(stream):
+        return bool(stream.get_stream_type() & Gst.StreamType.VIDEO)
+
+    def _apply_video(self, playbin, enabled):
+        # Munkaszálon
+        if playbin in self.streams:
+            self._select_streams(playbin, enabled)
+            return
+        flags = int(playbin.get_property("flags"))
+        new_flags = flags | self.PLAY_FLAG_VIDEO if enabled else flags & ~self.PLAY_FLAG_VIDEO
+        if new_flags != flags:
+            playbin.set_property("flags", new_flags)
+
+    def _select_streams(self, playbin, enabled):
+        # A kiválasztott nem videó folyamok maradnak; videó nélkül a dekóder is lebomlik.
+        # Ha még nincs folyam lista, a kiválasztás a streams-selected üzenetnél történik.
+        entry = self.streams.get(playbin)
+        if not entry or entry.get('collection') is None:
+            return
+        selected = entry['selected']
+        video = [stream for stream in selected if self._is_video(stream)]
+        if not selected or enabled == bool(video):
+            return
+        if enabled:
+            collection = entry['collection']
+            streams = [collection.get_stream(i) for i in range(collection.get_size())]
+            video = [stream for stream in streams if self._is_video(stream)][:1]
+            if not video:
+                return
+        else:
+            video = []
+        keep = [stream for stream in selected if not self._is_video(stream)]
+        playbin.send_event(Gst.Event.new_select_streams([stream.get_stream_id() for stream in keep + video]))
+
+    def set_volume(self, volume):
+        self.volume = volume
+        if self.active is not None:
+            self.active.set_property("volume", volume)
+
+    def stats(self):
+        with self.cond:
+            queued = sum(len(queue) for queue in self.ops.values())
+        return {
+            'state': self.state,
+            'idle': len(self.idle),
+            'prerolled': len(self.prerolled),
+            'built': self.built,
+            'preroll_hits': self.preroll_hits,
+            'preroll_misses': self.preroll_misses,
+            'queued_ops': queued,
+            'slowest_op_ms': round(self.slowest_op * 1000),
+            'timeouts': self.timeouts,
+            'expired_prerolls': self.expired,
+            'preroll_retries': self.retries,
+            'rebuffers': self.rebuffers,
+            'video': self.video_enabled,
+            'video_pipeline': self.video_factory,
+        }
+
+def classify_player_error(message, debug):
+    # Lejátszási hiba típusa (a metrikákhoz) és felhasználóbarát szövege
+    debug = debug or ""
+    if "Not Found" in message or "404" in debug:
+        return 'not_found', "Az adás nem elérhető (404 - Offline)"
+    if "Forbidden" in message or "403" in debug:
+        return 'forbidden', "Hozzáférés megtagadva (403)"
+    if "Connection refused" in message or "connection refused" in debug:
+        return 'refused', "A szerver nem válaszol"
+    if "GstTypeFindElement" in debug or "missing plugin" in debug.lower():
+        return 'missing_plugin', "Hiányzó kodek! (gstreamer-plugins-ugly/bad)"
+    if "Internal data stream error" in message:
+        return 'stream_error', "Adatfolyam hiba (Lehet, hogy offline)"
+    return 'other', message
+
+def _quantile(values, q):
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+def _prom_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+class PlaybackMetrics:
+    # Lejátszási minőség (QoS) mérése: kattintás -> feloldás -> PLAYING -> első audio puffer
+    # időbélyegek, újrapufferelések száma és ideje, hibák típus szerint, GStreamer QoS üzenetek
+    # (eldobott pufferek). Állomásonként összesít, és egy gördülő JSON, valamint egy Prometheus
+    # szöveges fájlba exportál (pl. a node_exporter textfile collectorához).
+    WINDOW = 200          # Ennyi legutóbbi munkamenet kerül a JSON-ba és a kvantilisekbe
+    STATION_SAMPLES = 20  # Állomásonként ennyi legutóbbi első hang idő
+    MAX_STATIONS = 500
+    EXPORT_INTERVAL = 60
+    ERROR_KINDS = ('not_found', 'forbidden', 'refused', 'missing_plugin', 'stream_error', 'timeout', 'unresolved', 'other')
+    TIMINGS = (('resolve_s', 'gladeradio_resolve_seconds', "Kattintástól a feloldott stream URL-ig"),
+               ('playing_s', 'gladeradio_time_to_playing_seconds', "Kattintástól a PLAYING állapotig"),
+               ('first_buffer_s', 'gladeradio_time_to_first_audio_seconds', "Kattintástól az első audio pufferig"))
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.sessions = deque(maxlen=self.WINDOW)
+        self.stations = OrderedDict() # uuid -> összesítés
+        self.totals = {'sessions': 0, 'rebuffers': 0, 'rebuffer_s': 0.0, 'played_s': 0.0,
+                       'qos_messages': 0, 'dropped': 0}
+        self.totals.update((f"{key}_sum", 0.0) for key, _, _ in self.TIMINGS)
+        self.totals.update((f"{key}_count", 0) for key, _, _ in self.TIMINGS)
+        self.errors = dict.fromkeys(self.ERROR_KINDS, 0)
+        self.current = None
+        self.seq = itertools.count(1)
+        self.armed = None # (pad, probe azonosító, [lefutott]) az első puffer méréséhez
+        self.dirty = False
+        self._load()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name) if self.directory else None
+
+    def _load(self):
+        try:
+            with open(self._path("playback_metrics.json"), "r") as f:
+                state = json.load(f)
+            self.sessions.extend(state.get('sessions', []))
+            self.totals.update(state.get('totals', {}))
+            self.errors.update(state.get('errors', {}))
+            for uuid, station in state.get('stations', {}).items():
+                station['first_buffer'] = deque(station.get('first_buffer', []), maxlen=self.STATION_SAMPLES)
+                self.stations[uuid] = station
+        except Exception:
+            pass
+
+    # --- Munkamenet események (fő szálon) ---
+
+    def click(self, radio):
+        self.end('switched')
+        self.current = {
+            'id': next(self.seq), 'station': radio.get('stationuuid'), 'name': radio.get('name'),
+            'start': time.time(), 'click': time.perf_counter(),
+            'resolve_s': None, 'cache_hit': None, 'playing_s': None, 'first_buffer_s': None,
+            'rebuffers': 0, 'rebuffer_s': 0.0, 'played_s': 0.0, 'error': None,
+            'qos_messages': 0, 'dropped': {}, 'bitrate': None, 'codec': None,
+            'buffering_since': None, 'played_since': None,
+        }
+
+    def resolved(self, hit):
+        if self.current is not None:
+            self.current['resolve_s'] = time.perf_counter() - self.current['click']
+            self.current['cache_hit'] = hit
+
+    def state(self, state, detail=None):
+        session = self.current
+        if session is None:
+            return
+        now = time.perf_counter()
+        if session['played_since'] is not None and state != PlayerEngine.PLAYING:
+            session['played_s'] += now - session['played_since']
+            session['played_since'] = None
+        if state == PlayerEngine.PLAYING:
+            if session['playing_s'] is None:
+                session['playing_s'] = now - session['click']
+                perf_log(f"első hang: {session['playing_s'] * 1000:.0f} ms "
+                         f"(feloldás cache-ből: {'igen' if session['cache_hit'] else 'nem'})")
+            if session['buffering_since'] is not None:
+                session['rebuffer_s'] += now - session['buffering_since']
+                session['buffering_since'] = None
+            if session['played_since'] is None:
+                session['played_since'] = now
+        elif state == PlayerEngine.BUFFERING:
+            session['rebuffers'] += 1
+            session['buffering_since'] = now
+        elif state == PlayerEngine.ERROR and detail == "timeout":
+            self.error('timeout')
+        elif state == PlayerEngine.STOPPED:
+            self.end('stopped')
+
+    def arm_first_buffer(self, playbin):
+        # Egyszeri pad probe az audio ágon (identity audio-filter): az első puffer ideje
+        session = self.current
+        element = playbin.get_property("audio-filter") if session is not None else None
+        pad = element.get_static_pad("src") if element is not None else None
+        if pad is None:
+            return
+        if self.armed is not None and not self.armed[2][0]:
+            self.armed[0].remove_probe(self.armed[1])
+        fired = [False]
+        session_id = session['id']
+
+        def on_buffer(pad, info):
+            fired[0] = True
+            GLib.idle_add(self.first_buffer, session_id, time.perf_counter())
+            return Gst.PadProbeReturn.REMOVE
+        self.armed = (pad, pad.add_probe(Gst.PadProbeType.BUFFER, on_buffer), fired)
+
+    def first_buffer(self, session_id, at):
+        session = self.current
+        if session is not None and session['id'] == session_id and session['first_buffer_s'] is None:
+            session['first_buffer_s'] = at - session['click']
+        return False
+
+    def tags(self, bitrate=None, codec=None):
+        if self.current is not None:
+            self.current['bitrate'] = bitrate or self.current['bitrate']
+            self.current['codec'] = codec or self.current['codec']
+
+    def qos(self, source, processed, dropped):
+        # A sinkek QoS üzenetei: az eldobott pufferek száma forrásonként halmozott
+        if self.current is not None:
+            self.current['qos_messages'] += 1
+            self.current['dropped'][source] = dropped
+
+    def error(self, kind):
+        if self.current is not None:
+            self.current['error'] = kind
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+        self.dirty = True
+        self.end('error')
+
+    def end(self, reason):
+        session = self.current
+        if session is None:
+            return
+        self.current = None
+        now = time.perf_counter()
+        if session['played_since'] is not None:
+            session['played_s'] += now - session['played_since']
+        if session['buffering_since'] is not None:
+            session['rebuffer_s'] += now - session['buffering_since']
+        record = {key: value for key, value in session.items() if key not in ('click', 'buffering_since', 'played_since', 'dropped')}
+        record['dropped'] = sum(session['dropped'].values())
+        record['end'] = reason
+        self.sessions.append(record)
+
+        totals = self.totals
+        totals['sessions'] += 1
+        for key in ('rebuffers', 'rebuffer_s', 'played_s', 'qos_messages', 'dropped'):
+            totals[key] += record[key]
+        for key, _, _ in self.TIMINGS:
+            if record[key] is not None:
+                totals[f"{key}_sum"] += record[key]
+                totals[f"{key}_count"] += 1
+
+        uuid = record['station']
+        station = self.stations.pop(uuid, None) or {
+            'name': record['name'], 'sessions': 0, 'errors': 0, 'rebuffers': 0, 'rebuffer_s': 0.0,
+            'played_s': 0.0, 'dropped': 0, 'first_buffer': deque(maxlen=self.STATION_SAMPLES)}
+        station['sessions'] += 1
+        station['errors'] += 1 if record['error'] else 0
+        for key in ('rebuffers', 'rebuffer_s', 'played_s', 'dropped'):
+            station[key] += record[key]
+        if record['first_buffer_s'] is not None:
+            station['first_buffer'].append(record['first_buffer_s'])
+        station['last'] = record['start']
+        self.stations[uuid] = station
+        while len(self.stations) > self.MAX_STATIONS:
+            self.stations.popitem(last=False)
+        self.dirty = True
+
+    # --- Export ---
+
+    def snapshot(self):
+        stations = {uuid: dict(station, first_buffer=list(station['first_buffer'])) for uuid, station in self.stations.items()}
+        return {'updated': time.time(), 'totals': dict(self.totals), 'errors': dict(self.errors),
+                'sessions': list(self.sessions), 'stations': stations}
+
+    def prometheus(self):
+        totals = self.totals
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{_prom_label(val)}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value:.6g}" if label_text else f"{name} {value:.6g}")
+
+        metric("gladeradio_playback_sessions_total", "counter", "Lejátszási munkamenetek", [({}, totals['sessions'])])
+        for key, name, help_text in self.TIMINGS:
+            values = [record[key] for record in self.sessions if record.get(key) is not None]
+            # Kvantilisek a gördülő ablakból, összeg és darabszám a teljes élettartamra
+            metric(name, "summary", help_text, [({'quantile': q}, _quantile(values, q)) for q in (0.5, 0.9, 0.99) if values])
+            lines.append(f"{name}_sum {totals[f'{key}_sum']:.6g}")
+            lines.append(f"{name}_count {totals[f'{key}_count']}")
+        metric("gladeradio_rebuffer_events_total", "counter", "Lejátszás közbeni újrapufferelések", [({}, totals['rebuffers'])])
+        metric("gladeradio_rebuffer_seconds_total", "counter", "Újrapuffereléssel töltött idő", [({}, totals['rebuffer_s'])])
+        metric("gladeradio_played_seconds_total", "counter", "Lejátszással töltött idő", [({}, totals['played_s'])])
+        watched = totals['rebuffer_s'] + totals['played_s']
+        metric("gladeradio_rebuffer_ratio", "gauge", "Újrapufferelés aránya a teljes lejátszási időhöz",
+               [({}, totals['rebuffer_s'] / watched if watched else 0.0)])
+        metric("gladeradio_playback_errors_total", "counter", "Lejátszási hibák típus szerint",
+               [({'kind': kind}, count) for kind, count in self.errors.items()])
+        metric("gladeradio_qos_messages_total", "counter", "GStreamer QoS üzenetek", [({}, totals['qos_messages'])])
+        metric("gladeradio_qos_dropped_total", "counter", "A sinkek által eldobott pufferek", [({}, totals['dropped'])])
+        recent = [(uuid, station) for uuid, station in self.stations.items() if station['first_buffer']][-50:]
+        metric("gladeradio_station_time_to_first_audio_seconds", "gauge", "Állomásonként az első hang idejének mediánja",
+               [({'station': uuid, 'name': station['name'] or ''}, _quantile(station['first_buffer'], 0.5)) for uuid, station in recent])
+        metric("gladeradio_station_errors_total", "counter", "Állomásonkénti hibák",
+               [({'station': uuid, 'name': station['name'] or ''}, station['errors'])
+                for uuid, station in list(self.stations.items())[-50:] if station['errors']])
+        return "\n".join(lines) + "\n"
+
+    def export(self, force=False):
+        if not self.directory or not (self.dirty or force):
+            return True
+        self.dirty = False
+        for name, content in (("playback_metrics.json", json.dumps(self.snapshot(), separators=(',', ':'))),
+                              ("playback_metrics.prom", self.prometheus())):
+            path = self._path(name)
+            try:
+                with open(path + ".tmp", "w") as f:
+                    f.write(content)
+                os.replace(path + ".tmp", path)
+            except OSError as e:
+                print(f"Metrika export hiba: {e}")
+        return True
+
+    def stats(self):
+        values = [record['first_buffer_s'] for record in self.sessions if record.get('first_buffer_s') is not None]
+        median = _quantile(values, 0.5)
+        return {
+            'sessions': self.totals['sessions'],
+            'first_audio_p50_ms': round(median * 1000) if median is not None else None,
+            'rebuffers': self.totals['rebuffers'],
+            'errors': sum(self.errors.values()),
+        }
+
+class PlaybackQueue:
+    # Egyetlen lejátszási kérés sor generáció számlálóval: gyors egymás utáni kattintásoknál
+    # a még el nem kezdett kérések összevonódnak, a folyamatban lévők (override keresés,
+    # playlist feloldás) az újabb kérésnél visszalépnek, és csak a legutolsó szándék jut el
+    # a lejátszóig. A munkaszálak száma korlátos (egy elavult, lassú feloldás nem tartja fel
+    # a legújabbat, de kattintásonként sem indul új szál).
+    MAX_WORKERS = 3
+
+    def __init__(self, prepare, deliver, dispatch=GLib.idle_add, fail=None):
+        # prepare(radio, cancelled) -> eredmény vagy None (munkaszálon)
+        # deliver(radio, eredmény): a fő szálon (dispatch), csak a legfrissebb kérésre
+        # fail(radio): a fő szálon, ha a legfrissebb kérésre nincs eredmény (nincs cím, sikertelen feloldás)
+        self.prepare = prepare
+        self.deliver = deliver
+        self.dispatch = dispatch
+        self.fail = fail
+        self.cond = threading.Condition()
+        self.generation = 0
+        self.pending = None
+        self.workers = 0
+        self.busy = 0
+        self.requested = 0
+        self.coalesced = 0
+        self.cancelled = 0
+        self.delivered = 0
+        self.failed = 0
+
+    def request(self, radio):
+        with self.cond:
+            self.generation += 1
+            self.requested += 1
+            if self.pending is not None:
+                self.coalesced += 1
+            self.pending = (self.generation, radio)
+            if self.busy == self.workers and self.workers < self.MAX_WORKERS:
+                self.workers += 1
+                threading.Thread(target=self._run, daemon=True).start()
+            self.cond.notify()
+            return self.generation
+
+    def is_current(self, generation):
+        return generation == self.generation
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while self.pending is None:
+                    self.cond.wait()
+                generation, radio = self.pending
+                self.pending = None
+                self.busy += 1
+            try:
+                result = self.prepare(radio, lambda: generation != self.generation)
+            except Exception as e:
+                print(f"Lejátszás előkészítési hiba: {e}")
+                result = None
+            with self.cond:
+                self.busy -= 1
+                if generation != self.generation:
+                    self.cancelled += 1
+                    continue
+            self.dispatch(self._deliver, generation, radio, result)
+
+    def _deliver(self, generation, radio, result):
+        # Fő szálon: közben érkezett újabb kérés esetén ez már elavult
+        with self.cond:
+            if generation != self.generation:
+                self.cancelled += 1
+                return False
+            if result is None:
+                self.failed += 1
+            else:
+                self.delivered += 1
+        if result is not None:
+            self.deliver(radio, result)
+        elif self.fail is not None:
+            self.fail(radio)
+        return False
+
+    def stats(self):
+        with self.cond:
+            return {
+                'requested': self.requested,
+                'coalesced': self.coalesced,
+                'cancelled': self.cancelled,
+                'delivered': self.delivered,
+                'failed': self.failed,
+                'workers': self.workers,
+            }
+
+class LogoJob:
+    # Egy logó betöltési feladat; card nélkül csak letöltés (előtöltés)
+    __slots__ = ('key', 'priority', 'url', 'uuid', 'card', 'binding', 'host', 'started', 'cancelled')
 
-    def set_markup(self, text):
-        self.label.set_markup(text)
-        self.reset()
+    def __init__(self, key, priority, url, uuid, card=None, binding=0):
+        self.key = key
+        self.priority = priority
+        self.url = url
+        self.uuid = uuid
+        self.card = card
+        self.binding = binding
+        self.host = urlsplit(url).hostname or ''
+        self.started = False
+        self.cancelled = False
 
-    def set_text(self, text):
-        self.label.set_text(text)
-        self.reset()
-        
-    def reset(self):
-        self.scroll_pos = 0
-        self.direction = 1
-        self.wait_counter = 60
-        self.h_adj.set_value(0)
+class LogoScheduler:
+    # Prioritásos logó betöltés: látható > látható közelében > előtöltés.
+    # A már nem kért (eltűnt/elgörgetett) munkák törlődnek, hostonként korlátozott a párhuzamosság.
+    PRIORITY_VISIBLE = 0
+    PRIORITY_NEAR = 1
+    PRIORITY_PREFETCH = 2
 
-    def _tick(self):
-        if not self.timer_id: return False
-        
-        upper = self.h_adj.get_upper()
-        page_size = self.h_adj.get_page_size()
-        max_scroll = upper - page_size
-        
-        if max_scroll <= 0:
-            return True
-            
-        if self.wait_counter > 0:
-            self.wait_counter -= 1
-            return True
-            
-        self.scroll_pos += self.direction
-        
-        if self.scroll_pos >= max_scroll:
-            self.scroll_pos = max_scroll
-            self.direction = -1
-            self.wait_counter = 60
-        elif self.scroll_pos <= 0:
-            self.scroll_pos = 0
-            self.direction = 1
-            self.wait_counter = 60
-            
-        self.h_adj.set_value(self.scroll_pos)
-        return True
+    def __init__(self, load, workers=4, per_host=2):
+        self.load = load
+        self.per_host = per_host
+        self.cond = threading.Condition()
+        self.heap = []
+        self.jobs = {}      # kulcs -> még nem befejezett munka
+        self.finished = set()
+        self.host_active = {}
+        self.seq = itertools.count()
 
-# Ismert működő stream helyettesítések (ha az API hibás/audio linket ad)
-STREAM_OVERRIDES = {
-    "CCTV-1": "http://ivi.bupt.edu.cn/hls/cctv1hd.m3u8",
-    "CCTV-2": "http://ivi.bupt.edu.cn/hls/cctv2hd.m3u8",
-    "CCTV-3": "http://ivi.bupt.edu.cn/hls/cctv3hd.m3u8",
-    "CCTV-4": "http://ivi.bupt.edu.cn/hls/cctv4hd.m3u8",
-    "CCTV-5": "http://ivi.bupt.edu.cn/hls/cctv5hd.m3u8",
-    "CCTV-5+": "http://ivi.bupt.edu.cn/hls/cctv5phd.m3u8",
-    "CCTV-6": "http://ivi.bupt.edu.cn/hls/cctv6hd.m3u8",
-    "CCTV-7": "http://ivi.bupt.edu.cn/hls/cctv7hd.m3u8",
-    "CCTV-8": "http://ivi.bupt.edu.cn/hls/cctv8hd.m3u8",
-    "CCTV-9": "http://ivi.bupt.edu.cn/hls/cctv9hd.m3u8",
-    "CCTV-10": "http://ivi.bupt.edu.cn/hls/cctv10hd.m3u8",
-    "CCTV-11": "http://ivi.bupt.edu.cn/hls/cctv11hd.m3u8",
-    "CCTV-12": "http://ivi.bupt.edu.cn/hls/cctv12hd.m3u8",
-    "CCTV-13": "http://ivi.bupt.edu.cn/hls/cctv13hd.m3u8",
-    "CCTV-14": "http://ivi.bupt.edu.cn/hls/cctv14hd.m3u8",
-    "CCTV-15": "http://ivi.bupt.edu.cn/hls/cctv15hd.m3u8",
-    "CETV-1": "http://ivi.bupt.edu.cn/hls/cetv1.m3u8",
-    "CETV-2": "http://ivi.bupt.edu.cn/hls/cetv2.m3u8",
-    "CETV-3": "http://ivi.bupt.edu.cn/hls/cetv3.m3u8",
-    "CETV-4": "http://ivi.bupt.edu.cn/hls/cetv4.m3u8",
-}
+        # Számlálók (stats())
+        self.submitted = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.reprioritized = 0
+        self.host_waits = 0
+        self.max_depth = 0
+
+        for _ in range(workers):
+            threading.Thread(target=self._run, daemon=True).start()
+
+    def update(self, jobs):
+        # A kívánt munkák teljes listája: ami eddig sorban volt, de most nincs benne, törlődik
+        with self.cond:
+            wanted = {job.key: job for job in jobs}
+            for key, job in list(self.jobs.items()):
+                if key not in wanted and not job.started:
+                    job.cancelled = True
+                    del self.jobs[key]
+                    self.cancelled += 1
+            self.finished &= wanted.keys()
+
+            for key, job in wanted.items():
+                if key in self.finished:
+                    continue
+                current = self.jobs.get(key)
+                if current is not None:
+                    if not current.started and current.priority != job.priority:
+                        current.priority = job.priority
+                        heapq.heappush(self.heap, (job.priority, next(self.seq), current))
+                        self.reprioritized += 1
+                    continue
+                self.jobs[key] = job
+                heapq.heappush(self.heap, (job.priority, next(self.seq), job))
+                self.submitted += 1
+
+            # Az elavult heap bejegyzések időnkénti kitakarítása
+            if len(self.heap) > 4 * len(self.jobs) + 100:
+                self.heap = [entry for entry in self.heap if self._entry_valid(entry)]
+                heapq.heapify(self.heap)
+
+            self.max_depth = max(self.max_depth, self.queue_depth())
+            self.cond.notify_all()
+
+    def queue_depth(self):
+        return sum(1 for job in self.jobs.values() if not job.started)
+
+    def stats(self):
+        with self.cond:
+            return {
+                'queue_depth': self.queue_depth(),
+                'running': sum(self.host_active.values()),
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'cancelled': self.cancelled,
+                'reprioritized': self.reprioritized,
+                'host_waits': self.host_waits,
+                'max_depth': self.max_depth,
+            }
+
+    def _entry_valid(self, entry):
+        priority, _, job = entry
+        return not job.cancelled and not job.started and job.priority == priority
+
+    def _next_job(self):
+        # A legjobb prioritású munka, amelynek a hostján van még szabad hely
+        blocked = []
+        job = None
+        while self.heap:
+            entry = heapq.heappop(self.heap)
+            if not self._entry_valid(entry):
+                continue
+            if self.host_active.get(entry[2].host, 0) >= self.per_host:
+                blocked.append(entry)
+                continue
+            job = entry[2]
+            break
+        if blocked:
+            self.host_waits += len(blocked)
+            for entry in blocked:
+                heapq.heappush(self.heap, entry)
+        return job
+
+    def _run(self):
+        while True:
+            with self.cond:
+                job = self._next_job()
+                while job is None:
+                    self.cond.wait()
+                    job = self._next_job()
+                job.started = True
+                self.host_active[job.host] = self.host_active.get(job.host, 0) + 1
+            try:
+                self.load(job)
+            except Exception as e:
+                print(f"Logó hiba: {e}")
+            finally:
+                with self.cond:
+                    self.host_active[job.host] -= 1
+                    if self.jobs.get(job.key) is job:
+                        del self.jobs[job.key]
+                        self.finished.add(job.key)
+                    self.completed += 1
+                    self.cond.notify_all()
 
 class RadioApp(Gtk.Window):
     def __init__(self):
@@ -134,6 +3949,14 @@ class RadioApp(Gtk.Window):
         self.set_border_width(0)
         self.set_position(Gtk.WindowPosition.CENTER)
         
+        # Közös HTTP kliens (keep-alive poolok, feltételes újraellenőrzés)
+        self.http = HttpClient(os.path.join(self.get_cache_dir(), "http_validators.json"))
+        self.mirrors = MirrorManager(self.http, os.path.join(self.get_cache_dir(), "mirrors.json"))
+        self.catalog_sync = CatalogSync(self.http, self.mirrors)
+        self.sync_state = None
+        self.sync_running = False
+        self.sync_timer_id = None
+
         # App Ikon
         self.setup_icon()
         
@@ -141,18 +3964,40 @@ class RadioApp(Gtk.Window):
         self.setup_css()
         
         # Adatok inicializálása
-        self.radios = []
-        self.filtered_radios = []
+        self.catalog = StationCatalog()
+        self.ingested = 0 # Folyamatos letöltésnél a sidebarba már felvett sorok száma
+        self.sidebar_live_counts = False # Kombinált szűrésnél élő darabszámok látszanak
+        self.search_index = None
+        self.filtered_radios = [] # A rácsban látható nézet (StationList vagy StationQuery)
         self.current_radio = None
         self.favorites = set()
-        self.displayed_count = 50
         self.load_favorites()
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.store = None
+        self.store_active = False # Betöltés után a nézetek a SQLite katalógusból jönnek
+        if USE_SQLITE_STORE:
+            try:
+                self.store = CatalogDB(os.path.join(self.get_cache_dir(), "catalog.sqlite3"))
+                self.store.set_favorites(self.favorites)
+            except Exception as e:
+                print(f"SQLite katalógus nem elérhető, memóriabeli katalógus marad: {e}")
+        self.logo_cache = PixbufCache()
+        self.thumb_store = ThumbnailStore(os.path.join(self.get_cache_dir(), "thumbs"))
+        self.logo_failures = NegativeCache(os.path.join(self.get_cache_dir(), "logo_failures.json"))
+        self.logo_scheduler = LogoScheduler(self.run_logo_job)
+        self.filter_pipeline = FilterPipeline(self.compute_filter, self.on_filter_done)
+        self.stream_resolver = StreamResolver(self.http, os.path.join(self.get_cache_dir(), "resolved_streams.json"))
+        # Lejátszási minőség metrikák (GLADERADIO_METRICS_DIR: export könyvtár, pl. textfile collector)
+        self.metrics = PlaybackMetrics(os.environ.get("GLADERADIO_METRICS_DIR") or self.get_cache_dir())
+        GLib.timeout_add_seconds(PlaybackMetrics.EXPORT_INTERVAL, self.metrics.export)
+        self.playback = PlaybackQueue(self.prepare_playback, self.on_playback_ready, fail=self.on_playback_failed)
         
-        # GStreamer setup
+        # GStreamer setup: előre felépített pipeline készlet, self.player az éppen szóló
         Gst.init(None)
         self.player = None
-        self.create_player()
+        self.buffer_policy = BufferPolicy(os.path.join(self.get_cache_dir(), "buffer_tuning.json"))
+        self.engine = PlayerEngine(self.setup_pipeline, self.on_player_state, self.buffer_policy)
+        self.preroll_timer_id = None
+        self.current_index = None # Az aktuális állomás helye a rácsban (előző/következő)
 
         # Videó ablak előkészítése (TV csatornákhoz)
         self.video_window = Gtk.Window(title="ÉlőTv")
@@ -213,35 +4058,42 @@ class RadioApp(Gtk.Window):
         # Fő elrendezés felépítése
         self.setup_ui()
         
+        if PERF_LOG:
+            GLib.timeout_add_seconds(10, self.report_perf_stats)
+
+        self.connect("destroy", self.on_app_destroy)
+
         # Adatok betöltése háttérszálon, hogy ne fagyjon le az UI
         threading.Thread(target=self.load_radios_bg, daemon=True).start()
 
-    def create_player(self):
-        # Régi player takarítása
-        if self.player:
-            self.player.set_state(Gst.State.NULL)
-            bus = self.player.get_bus()
-            bus.remove_signal_watch()
-            self.player = None
-            
-        # Új player létrehozása
-        self.player = Gst.ElementFactory.make("playbin", "player")
-        
-        # Pufferelés beállítása (3 másodperc) - Akadozásmentességért
-        # buffer-duration nanosecundumban van
-        try:
-            self.player.set_property("buffer-duration", 3 * 1000000000)
-            self.player.set_property("buffer-size", 4 * 1024 * 1024) # 4MB
-        except:
-            pass
-            
-        self.player.connect("source-setup", self.on_source_setup)
+    def on_app_destroy(self, widget):
+        # Lemezre írandó cache-ek mentése kilépéskor
+        self.thumb_store.save()
+        self.logo_failures.save()
+        self.stream_resolver.save()
+        self.engine.stop()
+        self.buffer_policy.save()
+        self.metrics.end('exit')
+        self.metrics.export(force=True)
+        self.http.save(force=True)
+        if self.store:
+            self.store.close()
+
+    def setup_pipeline(self, playbin):
+        # Egy új (készletbe kerülő) playbin jelzéseinek bekötése; a kezelők csak az éppen
+        # szóló pipeline üzeneteivel foglalkoznak, az előtöltöttekét figyelmen kívül hagyják
+        playbin.connect("source-setup", self.on_source_setup)
+        # Mérési pont az audio ágon (első puffer ideje); az identity adatot nem módosít
+        probe_point = Gst.ElementFactory.make("identity", None)
+        if probe_point:
+            playbin.set_property("audio-filter", probe_point)
         
-        bus = self.player.get_bus()
+        bus = playbin.get_bus()
         bus.add_signal_watch()
         bus.enable_sync_message_emission() # Fontos a videó ablakhoz
         bus.connect("message::tag", self.on_tag_message)
         bus.connect("message::error", self.on_player_error)
+        bus.connect("message::qos", self.on_qos_message)
         bus.connect("sync-message::element", self.on_sync_message)
 
     def setup_icon(self):
@@ -269,7 +4121,7 @@ class RadioApp(Gtk.Window):
                     icon_path = fallback_path
                 else:
                     url = "https://upload.wikimedia.org/wikipedia/commons/thumb/8/83/Circle-icons-radio.svg/512px-Circle-icons-radio.svg.png"
-                    resp = requests.get(url, timeout=5)
+                    resp = self.http.get(url, timeout=5)
                     if resp.status_code == 200:
                         with open(fallback_path, "wb") as f:
                             f.write(resp.content)
@@ -304,16 +4156,15 @@ class RadioApp(Gtk.Window):
         list {
             background-color: #2a2a2a;
         }
-        .sidebar-row {
-            padding: 10px;
-            border-bottom: 1px solid #333333;
+        treeview.sidebar-tree {
             background-color: #2a2a2a;
             color: #ffffff;
+            padding: 6px;
         }
-        .sidebar-row:hover {
+        treeview.sidebar-tree:hover {
             background-color: #333333;
         }
-        .sidebar-row:selected {
+        treeview.sidebar-tree:selected {
             background-color: #3daee9;
             color: white;
         }
@@ -364,7 +4215,7 @@ class RadioApp(Gtk.Window):
 
         # Frissítés gomb
         refresh_btn = Gtk.Button.new_from_icon_name("view-refresh-symbolic", Gtk.IconSize.BUTTON)
-        refresh_btn.connect("clicked", lambda x: threading.Thread(target=self.load_radios_bg, daemon=True).start())
+        refresh_btn.connect("clicked", self.on_refresh_clicked)
         header.pack_end(refresh_btn)
 
         # Fő konténer (Vertikális: Tartalom + Lejátszó)
@@ -377,19 +4228,28 @@ class RadioApp(Gtk.Window):
         main_box.pack_start(paned, True, True, 0)
 
         # --- Oldalsáv (Bal oldal) ---
-        sidebar_scroll = Gtk.ScrolledWindow()
-        sidebar_scroll.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
-        sidebar_scroll.get_style_context().add_class("sidebar")
-        
-        self.sidebar_list = Gtk.ListBox()
-        self.sidebar_list.set_selection_mode(Gtk.SelectionMode.SINGLE)
-        self.sidebar_list.connect("row-selected", self.on_category_selected)
-        sidebar_scroll.add(self.sidebar_list)
+        # Kategóriák és kontinensenként csoportosított országok, országszűrővel
+        self.sidebar = CategorySidebar(self.on_category_selected)
+
+        # Kombinált szűrők (élő darabszámokkal) az országlista alatt
+        self.facet_panel = FacetPanel(self.filter_radios)
+        facet_scroll = Gtk.ScrolledWindow()
+        facet_scroll.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+        facet_scroll.set_min_content_height(300)
+        facet_scroll.add(self.facet_panel)
+        self.facet_expander = Gtk.Expander(label="Szűrők")
+        self.facet_expander.add(facet_scroll)
+        self.facet_expander.connect("notify::expanded", lambda expander, pspec: self.filter_radios())
+
+        sidebar_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        sidebar_box.get_style_context().add_class("sidebar")
+        sidebar_box.pack_start(self.sidebar, True, True, 0)
+        sidebar_box.pack_end(self.facet_expander, False, False, 0)
         
         # Kategóriák hozzáadása (kezdetben csak a fixek)
         self.populate_sidebar()
         
-        paned.pack1(sidebar_scroll, False, False)
+        paned.pack1(sidebar_box, False, False)
 
         # --- Rádió Lista (Jobb oldal) ---
         content_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
@@ -401,33 +4261,14 @@ class RadioApp(Gtk.Window):
         self.status_label.set_margin_bottom(5)
         content_box.pack_start(self.status_label, False, False, 0)
 
-        # ScrolledWindow a FlowBox-nak
+        # ScrolledWindow a kártyarácsnak
         self.scrolled_window = Gtk.ScrolledWindow()
         self.scrolled_window.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
         content_box.pack_start(self.scrolled_window, True, True, 0)
 
-        # FlowBox a kártyáknak
-        self.flowbox = Gtk.FlowBox()
-        self.flowbox.set_valign(Gtk.Align.START)
-        self.flowbox.set_max_children_per_line(10) # Dinamikus, de limitált
-        self.flowbox.set_min_children_per_line(1)
-        self.flowbox.set_selection_mode(Gtk.SelectionMode.NONE)
-        self.flowbox.set_homogeneous(False) # Fontos a méretezéshez
-        self.flowbox.set_column_spacing(10)
-        self.flowbox.set_row_spacing(10)
-        self.flowbox.set_margin_top(10)
-        self.flowbox.set_margin_bottom(10)
-        self.flowbox.set_margin_start(10)
-        self.flowbox.set_margin_end(10)
-        
-        self.scrolled_window.add(self.flowbox)
-        
-        # "Több betöltése" gomb a lista aljára (trükkös FlowBox-nál, inkább a Box aljára)
-        self.load_more_btn = Gtk.Button(label="Több betöltése")
-        self.load_more_btn.connect("clicked", self.on_load_more)
-        self.load_more_btn.set_margin_top(10)
-        self.load_more_btn.set_margin_bottom(10)
-        content_box.pack_start(self.load_more_btn, False, False, 0)
+        # Virtualizált kártyarács (csak a látható kártyákhoz készül widget, végtelen görgetéssel)
+        self.grid = StationGrid(self.play_radio, on_viewport_changed=self.on_grid_viewport_changed, on_shown_changed=self.on_grid_shown_changed)
+        self.scrolled_window.add(self.grid)
 
         paned.pack2(content_box, True, False)
 
@@ -442,6 +4283,8 @@ class RadioApp(Gtk.Window):
         self.btn_play = Gtk.Button.new_from_icon_name("media-playback-start-symbolic", Gtk.IconSize.LARGE_TOOLBAR)
         self.btn_play.connect("clicked", self.on_play_pause_clicked)
         self.btn_next = Gtk.Button.new_from_icon_name("media-skip-forward-symbolic", Gtk.IconSize.LARGE_TOOLBAR)
+        self.btn_prev.connect("clicked", lambda b: self.zap(-1))
+        self.btn_next.connect("clicked", lambda b: self.zap(1))
         
         controls_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=5)
         controls_box.pack_start(self.btn_prev, False, False, 0)
@@ -463,6 +4306,7 @@ class RadioApp(Gtk.Window):
         vol_icon = Gtk.Image.new_from_icon_name("audio-volume-high-symbolic", Gtk.IconSize.MENU)
         self.volume_scale = Gtk.Scale.new_with_range(Gtk.Orientation.HORIZONTAL, 0, 1, 0.05)
         self.volume_scale.set_value(0.5)
+        self.engine.set_volume(0.5)
         self.volume_scale.set_size_request(100, -1)
         self.volume_scale.connect("value-changed", self.on_volume_changed)
         
@@ -475,314 +4319,521 @@ class RadioApp(Gtk.Window):
         self.btn_fav.connect("clicked", self.on_favorite_toggle)
         player_bar.pack_end(self.btn_fav, False, False, 0)
 
-    def add_sidebar_item(self, id, title, icon_name):
-        row = Gtk.ListBoxRow()
-        row.id = id
-        box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
-        box.get_style_context().add_class("sidebar-row")
-        
-        icon = Gtk.Image.new_from_icon_name(icon_name, Gtk.IconSize.MENU)
-        label = Gtk.Label(label=title)
-        
-        box.pack_start(icon, False, False, 0)
-        box.pack_start(label, False, False, 0)
-        row.add(box)
-        self.sidebar_list.add(row)
+        # Videó ablak gomb (csak TV csatornánál látszik): elrejtve csak a hang szól
+        self.btn_video = Gtk.Button.new_from_icon_name("video-display-symbolic", Gtk.IconSize.BUTTON)
+        self.btn_video.set_tooltip_text("Videó ablak")
+        self.btn_video.connect("clicked", self.on_video_button_clicked)
+        self.btn_video.set_no_show_all(True)
+        player_bar.pack_end(self.btn_video, False, False, 0)
+
+    def static_sidebar_counts(self):
+        # {sor id: darab} a teljes katalógusra; ami nem ismert (pl. letöltés közben), kimarad
+        counts = {'all': self.station_count(), 'favorites': len(self.favorites)}
+        facets = self.catalog.facets()
+        if self.store_active:
+            counts['tv'] = self.store.count(*self.store.where("tv", ""))
+            counts.update((f"country:{country}", count) for country, _, count in self.store.country_counts())
+        elif facets:
+            counts['tv'] = len(facets.tv_rows())
+            counts.update((f"country:{country}", count) for country, count in facets.counts('country').items())
+        return counts
+
+    def country_entries(self):
+        # (ország, országkód) párok a teljes katalógusra, a kontinens szerinti csoportosításhoz
+        facets = self.catalog.facets()
+        if self.store_active:
+            return [(country, code) for country, code, _ in self.store.country_counts()]
+        codes = self.catalog.column('countrycode')
+        if facets:
+            return [(country, codes[facets.rows('country', country)[0]]) for country in facets.values('country')]
+        return set(zip(self.catalog.column('country'), codes))
 
     def load_radios_bg(self):
         GLib.idle_add(self.status_label.set_text, "Adatok letöltése...")
         try:
-            # Cache ellenőrzése (verziózott cache fájl a frissítés kényszerítéséhez)
-            cache_file = "radios_cache_v2.json.bz2"
-            if os.path.exists(cache_file):
-                with bz2.open(cache_file, "rt") as f:
-                    data = json.load(f)
-                    if isinstance(data, dict):
-                        self.radios = data.get('radios', [])
-                    else:
-                        self.radios = data
-            else:
-                # API hívás - Növelt limit (50.000 helyett 100.000 a biztonság kedvéért)
-                response = requests.get("https://de1.api.radio-browser.info/json/stations?limit=100000", timeout=15)
-                if response.status_code == 200:
-                    self.radios = response.json()
-                    with bz2.open(cache_file, "wt") as f:
-                        json.dump({'radios': self.radios}, f)
+            if self.store and self.store.station_count():
+                # SQLite katalógus: a lista nem töltődik be, a nézetek lekérdezésekből jönnek
+                self.sync_state = self.store.sync_state()
+                GLib.idle_add(self.on_store_loaded)
+                return
+
+            # Cache ellenőrzése: bináris katalógus, ennek hiányában a régi bz2 JSON cache átalakítása
+            loaded = None
+            if os.path.exists(CATALOG_CACHE_FILE):
+                try:
+                    loaded = CatalogFile.load(CATALOG_CACHE_FILE)
+                except Exception as e:
+                    print(f"Katalógus cache nem használható: {e}")
+            if loaded is None:
+                loaded = CatalogFile.migrate(LEGACY_CATALOG_FILE)
+                if loaded is not None:
+                    CatalogFile.save(loaded[0], loaded[1], CATALOG_CACHE_FILE)
+            if loaded is None:
+                # Folyamatos letöltés: az első állomások már a letöltés közben megjelennek
+                loaded = self.catalog_sync.fetch_full_stream(
+                    on_chunk=lambda c: GLib.idle_add(self.on_radios_chunk, c, len(c)))
+                CatalogFile.save(loaded[0], loaded[1], CATALOG_CACHE_FILE)
             
-            GLib.idle_add(self.on_radios_loaded)
+            catalog, state = loaded
+            if not catalog.has_facets():
+                catalog.build_facets()
+            self.sync_state = state
+            if self.store:
+                self.store.replace_catalog(catalog, state)
+                GLib.idle_add(self.on_store_loaded)
+                return
+            GLib.idle_add(self.on_radios_loaded, catalog)
         except Exception as e:
             print(f"Hiba: {e}")
             GLib.idle_add(self.status_label.set_text, "Hiba a betöltéskor!")
 
+    def maybe_sync_catalog(self, force=False):
+        # Időzített (és a frissítés gombbal kényszerített) háttér szinkron
+        if self.sync_running or not self.station_count():
+            return True
+        if force or self.catalog_sync.is_due(self.sync_state):
+            self.sync_running = True
+            threading.Thread(target=self.sync_catalog_bg, args=(self.catalog, self.sync_state), daemon=True).start()
+        return True
+
+    def station_count(self):
+        return self.store.station_count() if self.store_active else len(self.catalog)
+
+    def sync_catalog_bg(self, catalog, state):
+        try:
+            if self.store:
+                # SQLite katalógus: a változások közvetlenül a táblába kerülnek
+                if self.catalog_sync.needs_full(state):
+                    full, new_state = self.catalog_sync.fetch_full_stream()
+                    self.store.replace_catalog(full, new_state)
+                    del full
+                    changed = True
+                else:
+                    changes, removed, new_state = self.catalog_sync.fetch_changes(state)
+                    changed = self.store.apply_changes(changes, removed, new_state)
+                perf_log(f"katalógus szinkron: {self.catalog_sync.last_stats}")
+                GLib.idle_add(self.on_store_synced, changed, new_state)
+                return
+            if self.catalog_sync.needs_full(state):
+                merged, new_state = self.catalog_sync.fetch_full_stream()
+            else:
+                merged, new_state = self.catalog_sync.sync(catalog, state)
+            # Változás nélkül nem írjuk újra a cache-t; induláskor a régebbi időpont miatt
+            # egy (olcsó) inkrementális szinkron fut majd
+            if merged is not None:
+                catalog.materialize() # A régi leképezés lezárása a fájl cseréje előtt
+                CatalogFile.save(merged, new_state, CATALOG_CACHE_FILE)
+            perf_log(f"katalógus szinkron: {self.catalog_sync.last_stats}")
+            GLib.idle_add(self.on_catalog_synced, catalog, merged, new_state)
+        except Exception as e:
+            print(f"Szinkronizálási hiba: {e}")
+            GLib.idle_add(self.on_catalog_synced, catalog, None, None)
+
+    def on_catalog_synced(self, old_catalog, merged, state):
+        self.sync_running = False
+        if state is not None:
+            self.sync_state = state
+        # Csak akkor cseréljük, ha közben nem töltődött be másik katalógus
+        if merged is not None and old_catalog is self.catalog:
+            self.on_radios_loaded(merged, refreshed=True)
+
+    def on_store_synced(self, changed, state):
+        self.sync_running = False
+        if state is not None:
+            self.sync_state = state
+        if changed:
+            self.on_store_loaded()
+
+    def on_refresh_clicked(self, btn):
+        # Betöltött katalógusnál azonnali inkrementális szinkron, egyébként újratöltés
+        if self.station_count():
+            self.maybe_sync_catalog(force=True)
+        else:
+            threading.Thread(target=self.load_radios_bg, daemon=True).start()
+
     def populate_sidebar(self):
-        # Törlés
-        for child in self.sidebar_list.get_children():
-            self.sidebar_list.remove(child)
-            
-        # Fix elemek
-        self.add_sidebar_item("all", "Összes Rádió", "network-transmit-receive-symbolic")
-        self.add_sidebar_item("favorites", "Kedvencek", "starred-symbolic")
-        self.add_sidebar_item("tv", "ÉlőTv", "video-display-symbolic")
-        
-        # Országok gyűjtése
-        countries = set()
-        for radio in self.radios:
-            c = radio.get('country')
-            if c:
-                countries.add(c)
-        
-        for country in sorted(countries):
-            self.add_sidebar_item(f"country:{country}", country, "globe-symbolic")
-            
-        self.sidebar_list.show_all()
-
-    def on_radios_loaded(self):
-        # 1. Deduplikálás és szűrés (csak működő)
-        unique_radios = {}
-        for radio in self.radios:
-            # Csak ha a lastcheckok 1 (működő), vagy nincs ilyen mező
-            if 'lastcheckok' in radio and str(radio['lastcheckok']) == '0':
-                continue
-                
-            uuid = radio.get('stationuuid')
-            if uuid and uuid not in unique_radios:
-                unique_radios[uuid] = radio
+        # Eltérés szerinti frissítés: csak az új/eltűnt országok és a változott darabszámok íródnak,
+        # a kijelölés megmarad
+        self.sidebar_live_counts = False
+        self.sidebar.set_countries(self.country_entries(), self.static_sidebar_counts())
+
+    def on_radios_chunk(self, catalog, count):
+        # Folyamatos letöltés közben: a már beérkezett állomások azonnal láthatók
+        first = catalog is not self.catalog
+        if first:
+            self.catalog = catalog
+            self.search_index = None
+            self.ingested = 0
+        self.status_label.set_text(f"Adatok letöltése... ({count} állomás)")
+        self.sidebar.add_countries(set(zip(catalog.column('country')[self.ingested:count], catalog.column('countrycode')[self.ingested:count])))
+        self.ingested = count
+        # A katalógus csak bővül, így a rács görgetési pozíciója megtartható
+        self.filter_radios(keep_position=not first)
+        return False
+
+    def on_radios_loaded(self, catalog, refreshed=False):
+        # A deduplikálás és a szűrés már a katalógus építésekor megtörtént
+        # refreshed: háttér szinkron utáni csere, a görgetési pozíció és a kijelölés marad
+        streamed = catalog is self.catalog # Folyamatos letöltés vége: a rács már mutatja
+        self.catalog = catalog
+        self.search_index = None
+        self.status_label.set_text(f"Összesen {len(self.catalog)} rádió elérhető")
         
-        self.radios = list(unique_radios.values())
-        self.status_label.set_text(f"Összesen {len(self.radios)} rádió elérhető")
+        # Sidebar és szűrő panel frissítése az új adatokkal (a darabszámok a facet táblákból)
+        self.populate_sidebar()
+        facets = catalog.facets()
+        if facets:
+            self.facet_panel.set_options({facet: facets.counts(facet) for facet in ('language', 'codec', 'tag')})
+        self.filter_radios(keep_position=streamed or refreshed, rebind=refreshed)
         
-        # Sidebar frissítése az új adatokkal
+        # Keresőindex építése háttérszálon (addig lineáris keresés)
+        threading.Thread(target=self.build_search_index, args=(catalog,), daemon=True).start()
+        threading.Thread(target=self.prefetch_favorite_streams, args=(catalog,), daemon=True).start()
+
+        # Háttér szinkron: betöltés után (ha esedékes), utána negyedóránként ellenőrizzük
+        if not self.sync_timer_id:
+            self.sync_timer_id = GLib.timeout_add_seconds(15 * 60, self.maybe_sync_catalog)
+        self.maybe_sync_catalog()
+
+    def on_store_loaded(self):
+        # SQLite katalógus: a memóriabeli katalógus (pl. a folyamatos letöltésé) eldobható
+        self.store_active = True
+        self.catalog = StationCatalog()
+        self.search_index = None
+        self.status_label.set_text(f"Összesen {self.store.station_count()} rádió elérhető")
+        # A kombinált szűrők a memóriabeli facet táblákra épülnek, SQLite módban nem elérhetők
+        self.facet_expander.hide()
+        self.facet_expander.set_no_show_all(True)
         self.populate_sidebar()
         self.filter_radios()
+        threading.Thread(target=self.prefetch_favorite_streams, args=(None,), daemon=True).start()
 
-    def on_category_selected(self, listbox, row):
-        if row:
-            self.filter_radios()
+        if not self.sync_timer_id:
+            self.sync_timer_id = GLib.timeout_add_seconds(15 * 60, self.maybe_sync_catalog)
+        self.maybe_sync_catalog()
+        return False
 
-    def on_search_changed(self, entry):
+    def build_search_index(self, catalog):
+        index = SearchIndex(catalog)
+        GLib.idle_add(self.on_search_index_ready, index)
+
+    def on_search_index_ready(self, index):
+        # Csak ha közben nem töltődött be újabb katalógus
+        if index.catalog is self.catalog:
+            self.search_index = index
+
+    def on_category_selected(self, category_id):
         self.filter_radios()
 
-    def filter_radios(self):
+    def on_search_changed(self, entry):
+        self.filter_radios(debounce=True)
+
+    def filter_radios(self, debounce=False, keep_position=False, rebind=False):
+        # A szűrés háttérszálon fut; itt csak a paramétereket gyűjtjük össze
         query = self.search_entry.get_text().lower()
-        selected_row = self.sidebar_list.get_selected_row()
-        category = selected_row.id if selected_row else "all"
+        category = self.sidebar.selected_id()
+
+        params = {
+            'query': query,
+            'category': category,
+            'catalog': self.catalog,
+            'store': self.store if self.store_active else None,
+            'search_index': self.search_index,
+            'favorites': frozenset(self.favorites),
+            'selection': {} if self.store_active else self.facet_panel.selection(),
+            'facet_options': self.facet_panel.options() if self.facet_expander.get_expanded() else None,
+            'keep_position': keep_position,
+            'rebind': rebind,
+        }
+        self.filter_pipeline.submit(params, debounce)
 
-        filtered = []
+    def compute_filter(self, params, is_cancelled):
+        # Háttérszálon fut: csak a params-ban kapott (nem változó) adatokat használja
+        query = params['query']
+        category = params['category']
+        if params['store']:
+            # Indexelt lekérdezés; a rács oldalanként kéri le a sorokat
+            return params['store'].query(category, query)
+        catalog = params['catalog']
+        search_index = params['search_index']
+        names = catalog.column('name')
+        tags_col = catalog.column('tags')
+        facets = catalog.facets()
+        if facets and (params['selection'] or params['facet_options']):
+            return self.compute_facet_filter(params, facets, is_cancelled)
         
-        # Forrás lista meghatározása
+        # Forrás lista meghatározása (sorindexek)
         if category == "favorites":
-            source_list = [r for r in self.radios if r['stationuuid'] in self.favorites]
+            favorites = params['favorites']
+            source_list = [i for i, uuid in enumerate(catalog.column('stationuuid')) if uuid in favorites]
+        elif facets and (category == "tv" or category.startswith("country:")):
+            # Előre számolt facet táblák: kategória váltáskor csak kikeresés
+            if category == "tv":
+                source_list = facets.tv_rows()
+            else:
+                source_list = facets.rows('country', category.split(":", 1)[1])
         elif category == "tv":
-            # TV csatornák szűrése címkék ÉS kodek alapján
-            def is_tv(r):
-                tags = r.get('tags', '').lower()
-                codec = r.get('codec', '').lower()
-                # Címke alapú szűrés
-                if 'tv' in tags.split(',') or 'video' in tags or 'television' in tags:
-                    return True
-                # Kodek alapú szűrés (ha a címke hiányozna)
-                if 'h.264' in codec or 'h.265' in codec or 'mp4' in codec or 'vp8' in codec or 'vp9' in codec:
-                    return True
-                return False
-            
-            source_list = [r for r in self.radios if is_tv(r)]
+            # TV csatornák szűrése címkék ÉS kodek alapján (a facet táblák elkészültéig)
+            codecs = catalog.column('codec')
+            source_list = _filter_chunked(range(len(catalog)), lambda i: is_tv_station(tags_col[i], codecs[i]), is_cancelled)
         elif category.startswith("country:"):
             country_name = category.split(":", 1)[1]
-            source_list = [r for r in self.radios if r.get('country') == country_name]
+            countries = catalog.column('country')
+            source_list = _filter_chunked(range(len(catalog)), lambda i: countries[i] == country_name, is_cancelled)
         else:
-            source_list = self.radios
+            source_list = range(len(catalog))
+
+        if source_list is None or is_cancelled():
+            return None
 
         # Keresés
-        for radio in source_list:
-            if query:
-                if query in radio.get('name', '').lower() or query in radio.get('tags', '').lower():
-                    filtered.append(radio)
+        if query and search_index:
+            matches = search_index.search(query)
+            if category == "all":
+                filtered = matches
+            else:
+                source_set = set(source_list)
+                filtered = [i for i in matches if i in source_set]
+        elif query:
+            filtered = _filter_chunked(source_list, lambda i: query in names[i].lower() or query in tags_col[i].lower(), is_cancelled)
+        else:
+            filtered = list(source_list)
+
+        if query:
+            # Kereséskor relevancia sorrend (csak a látható lap rendezett teljesen)
+            return StationRanker.for_catalog(catalog).rank(filtered, query, StationGrid.PAGE_SIZE)
+        return StationList(catalog, filtered)
+
+    def compute_facet_filter(self, params, facets, is_cancelled):
+        # Kombinált szűrés bitsetekkel: kategória ÉS keresés ÉS a panel facet-jei,
+        # közben az élő darabszámok a panelhez és az oldalsávhoz
+        query = params['query']
+        category = params['category']
+        catalog = params['catalog']
+        selection = params['selection']
+        index = facets.bitset_index()
+
+        query_bits = None
+        if query:
+            if params['search_index']:
+                matches = params['search_index'].search(query)
             else:
-                filtered.append(radio)
+                names = catalog.column('name')
+                tags_col = catalog.column('tags')
+                matches = _filter_chunked(range(len(catalog)), lambda i: query in names[i].lower() or query in tags_col[i].lower(), is_cancelled)
+            if matches is None:
+                return None
+            query_bits = index.from_rows(matches)
+
+        if category == "favorites":
+            favorites = params['favorites']
+            category_bits = index.from_rows(i for i, uuid in enumerate(catalog.column('stationuuid')) if uuid in favorites)
+        elif category == "tv":
+            category_bits = index.bitset('tv', True)
+        elif category.startswith("country:"):
+            category_bits = index.bitset('country', category.split(":", 1)[1])
+        else:
+            category_bits = None
 
+        base = query_bits
+        if category_bits is not None:
+            base = category_bits if base is None else base & category_bits
+        if is_cancelled():
+            return None
+        filtered = index.to_rows(index.filter(selection, base))
+
+        # Darabszámok: a panelhez a kategóriával együtt, az oldalsávhoz a kategória nélkül
+        counts = {}
+        if params['facet_options']:
+            counts = index.counts(selection, base, params['facet_options'])
+        if is_cancelled():
+            return None
+        rest = index.filter(selection, query_bits)
+        counts['sidebar'] = {f"country:{country}": count for country, count in
+                             index.counts(selection, query_bits, {'country': facets.values('country')})['country'].items()}
+        counts['sidebar']['all'] = _popcount(rest)
+        counts['sidebar']['tv'] = _popcount(rest & index.bitset('tv', True))
+        if query:
+            return StationRanker.for_catalog(catalog).rank(filtered, query, StationGrid.PAGE_SIZE, counts)
+        return StationList(catalog, filtered, counts)
+
+    def on_filter_done(self, params, filtered):
+        # Fő szálon: csak az aktuális generáció eredménye érkezik ide
+        if params['catalog'] is not self.catalog:
+            return
         self.filtered_radios = filtered
-        self.displayed_count = 50 # Reset
-        self.update_flowbox()
-
-    def update_flowbox(self):
-        # Törlés
-        for child in self.flowbox.get_children():
-            self.flowbox.remove(child)
-
-        # Új elemek
-        count = 0
-        for radio in self.filtered_radios:
-            if count >= self.displayed_count:
-                break
-            
-            card = self.create_radio_card(radio)
-            self.flowbox.add(card)
-            count += 1
-        
-        self.flowbox.show_all()
-        
+        self.grid.set_items(filtered, keep_position=params['keep_position'], rebind=params['rebind'])
+        counts = filtered.counts
+        if counts:
+            self.facet_panel.set_counts(counts)
+            self.sidebar.set_counts(counts['sidebar'])
+            self.sidebar_live_counts = True
+        elif self.sidebar_live_counts:
+            # Szűrő nélkül vissza a statikus (teljes katalógus) darabszámokra
+            self.sidebar_live_counts = False
+            self.sidebar.set_counts(self.static_sidebar_counts())
+
+    def on_grid_shown_changed(self, shown, total):
         # Státusz frissítése
-        visible = min(self.displayed_count, len(self.filtered_radios))
-        total = len(self.filtered_radios)
-        self.status_label.set_text(f"Megjelenítve: {visible} / {total}")
-        self.load_more_btn.set_visible(visible < total)
-
-    def create_radio_card(self, radio):
-        # Kártya konténer (Button, hogy kattintható legyen)
-        btn = Gtk.Button()
-        btn.set_relief(Gtk.ReliefStyle.NONE)
-        btn.get_style_context().add_class("radio-card")
-        btn.set_size_request(140, 160) # Fix méret a kártyának
-        
-        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
-        btn.add(box)
+        self.status_label.set_text(f"Megjelenítve: {shown} / {total}")
 
-        # Ikon
-        icon = Gtk.Image()
-        icon.set_pixel_size(64)
-        icon.set_halign(Gtk.Align.CENTER)
-        
-        favicon = radio.get('favicon')
-        if favicon:
-            self.executor.submit(self.load_image, icon, favicon, radio.get('stationuuid'))
-        else:
-            icon.set_from_icon_name("audio-x-generic", Gtk.IconSize.DIALOG)
-            
-        box.pack_start(icon, True, True, 0)
+    def on_grid_viewport_changed(self, visible_cards, near_cards, ahead):
+        # A látható állomások playlistjeinek előfeloldása, hogy a kattintás azonnal induljon
+        self.stream_resolver.prefetch('visible', [(card.radio.get('stationuuid'), card.radio.get('url')) for card in visible_cards])
 
-        # Cím
-        lbl_name = Gtk.Label(label=radio.get('name', 'Névtelen'))
-        lbl_name.set_ellipsize(Pango.EllipsizeMode.END)
-        lbl_name.set_max_width_chars(15)
-        lbl_name.set_halign(Gtk.Align.CENTER)
-        lbl_name.get_style_context().add_class("card-title")
-        box.pack_start(lbl_name, False, False, 0)
+        # A logó ütemező mindig a teljes kívánt állapotot kapja; ami kimaradt, azt törli
+        jobs = []
+        for priority, cards in ((LogoScheduler.PRIORITY_VISIBLE, visible_cards), (LogoScheduler.PRIORITY_NEAR, near_cards)):
+            for card in cards:
+                if card.logo_binding == card.binding:
+                    continue # Már megvan a logó
+                favicon = card.radio.get('favicon')
+                if not favicon:
+                    continue
+                uuid = card.radio.get('stationuuid')
+                # Memóriából azonnal, lemez olvasás és dekódolás nélkül
+                pixbuf = self.logo_cache.get((uuid, favicon), count_miss=False)
+                if pixbuf is not None:
+                    card.set_logo(card.binding, pixbuf)
+                    continue
+                jobs.append(LogoJob((card, card.binding), priority, favicon, uuid, card, card.binding))
+        for radio in ahead:
+            favicon = radio.get('favicon')
+            if favicon:
+                uuid = radio.get('stationuuid')
+                jobs.append(LogoJob(('prefetch', uuid), LogoScheduler.PRIORITY_PREFETCH, favicon, uuid))
+        self.logo_scheduler.update(jobs)
 
-        # Ország / Info
-        lbl_info = Gtk.Label(label=radio.get('country', ''))
-        lbl_info.set_ellipsize(Pango.EllipsizeMode.END)
-        lbl_info.set_max_width_chars(15)
-        lbl_info.set_halign(Gtk.Align.CENTER)
-        lbl_info.get_style_context().add_class("dim-label")
-        box.pack_start(lbl_info, False, False, 0)
+    def run_logo_job(self, job):
+        # Munkaszálon: előtöltésnél (card nélkül) csak letöltünk, dekódolni nem kell
+        if job.card is not None:
+            self.logo_cache.miss() # A memória cache-ben nem volt meg, betöltjük
+        self.load_image(job.card, job.binding, job.url, job.uuid)
 
-        # Klikk esemény
-        btn.connect("clicked", lambda b: self.play_radio(radio))
-        
-        return btn
+    def report_perf_stats(self):
+        for name, stats in (("logó sor", self.logo_scheduler.stats()), ("logó memória cache", self.logo_cache.stats()),
+                            ("logó pack tár", self.thumb_store.stats()), ("hibás logó URL-ek", self.logo_failures.stats()),
+                            ("HTTP", self.http.stats()), ("stream feloldás", self.stream_resolver.stats()),
+                            ("lejátszó pipeline-ok", self.engine.stats()), ("lejátszási kérések", self.playback.stats()),
+                            ("pufferelés", self.buffer_policy.stats()), ("lejátszás minőség", self.metrics.stats())):
+            perf_log(f"{name}: " + ", ".join(f"{key}={value}" for key, value in stats.items()))
+        return True
 
-    def load_image(self, image_widget, url, uuid):
+    def show_logo(self, card, binding, url, uuid, pixbuf):
+        # Munkaszálról: eltesszük a memória cache-be és átadjuk a fő szálnak
+        self.logo_cache.put((uuid, url), pixbuf)
+        GLib.idle_add(card.set_logo, binding, pixbuf)
+
+    def load_image(self, card, binding, url, uuid):
         if not url: return
-        
-        # Helyi cache mappa
-        if not os.path.exists("logos"):
-            os.makedirs("logos", exist_ok=True)
-            
-        # Kiterjesztés kitalálása
-        ext = os.path.splitext(url)[1].lower()
-        if len(ext) > 5 or not ext: ext = ".png"
-        local_path = os.path.join("logos", f"{uuid}{ext}")
+        # Közben újrahasznosították a kártyát egy másik állomáshoz
+        if card is not None and card.binding != binding: return
 
         try:
-            # Letöltés
-            if not os.path.exists(local_path):
-                try:
-                    resp = requests.get(url, timeout=5)
-                    if resp.status_code == 200:
-                        # Ellenőrizzük, hogy nem HTML-e (pl. 404 oldal)
-                        if 'text/html' in resp.headers.get('content-type', '').lower():
-                            return
-                        with open(local_path, "wb") as f:
-                            f.write(resp.content)
-                    else:
-                        return
-                except:
+            # Előtöltés: ha már a tárban van, nincs teendő
+            if card is None and self.thumb_store.contains(uuid, url):
+                return
+
+            # Előre méretezett bélyegkép a pack tárból (nincs fájlonkénti megnyitás és dekódolás)
+            thumb = self.thumb_store.get(uuid, url)
+            if thumb is not None:
+                if card is not None:
+                    self.show_thumbnail(card, binding, url, uuid, thumb)
+                # Régi bélyegkép: feltételes kéréssel ellenőrizzük, változott-e a favicon
+                if not self.thumb_store.is_stale(uuid, LOGO_REVALIDATE_AGE):
                     return
+                thumb = self.fetch_thumbnail(uuid, url, revalidate=True)
+            else:
+                thumb = self.fetch_thumbnail(uuid, url)
 
-            if not os.path.exists(local_path) or os.path.getsize(local_path) == 0:
-                return
+            # Előtöltés: elég, ha a tárba bekerült
+            if thumb is not None and card is not None:
+                self.show_thumbnail(card, binding, url, uuid, thumb)
 
-            # SVG detektálása (kiterjesztés vagy tartalom alapján)
-            is_svg = url.lower().endswith('.svg')
-            if not is_svg:
-                try:
-                    with open(local_path, 'rb') as f:
-                        header = f.read(100)
-                        if b'<svg' in header or b'<!DOCTYPE svg' in header:
-                            is_svg = True
-                except: pass
-
-            if is_svg:
-                # SVG-t a GdkPixbuf kezeli natívan
-                try:
-                    loader = GdkPixbuf.PixbufLoader()
-                    with open(local_path, 'rb') as f:
-                        loader.write(f.read())
-                    loader.close()
-                    pixbuf = loader.get_pixbuf()
-                    if pixbuf:
-                        scaled = pixbuf.scale_simple(64, 64, GdkPixbuf.InterpType.BILINEAR)
-                        GLib.idle_add(image_widget.set_from_pixbuf, scaled)
-                except: pass
-                return
+        except Exception:
+            # print(f"Logo hiba: {e}")
+            pass
+
+    def fetch_thumbnail(self, uuid, url, revalidate=False):
+        # Letöltés + normalizálás a pack tárba. Újraellenőrzéskor a 304 csak frissnek jelöli a meglévőt.
+        # Ismert hibás URL: nem foglalunk le egy letöltő szálat 5 másodpercre
+        if not revalidate and self.logo_failures.should_skip(url):
+            return None
+        try:
+            resp = self.http.get(url, timeout=5, revalidate=revalidate)
+            if resp.status_code == 304:
+                self.thumb_store.mark_fresh(uuid)
+                return None
+            if resp.status_code != 200:
+                if not revalidate:
+                    self.logo_failures.record_failure(url, 'not_found' if resp.status_code in (404, 410) else 'http_error')
+                return None
+            # Ellenőrizzük, hogy nem HTML-e (pl. 404 oldal)
+            if 'text/html' in resp.headers.get('content-type', '').lower():
+                if not revalidate:
+                    self.logo_failures.record_failure(url, 'html')
+                return None
+            data = resp.content
+        except requests.Timeout:
+            if not revalidate:
+                self.logo_failures.record_failure(url, 'timeout')
+            return None
+        except:
+            if not revalidate:
+                self.logo_failures.record_failure(url, 'network')
+            return None
+
+        thumb = self.decode_thumbnail(data, url) if data else None
+        if thumb is None:
+            if not revalidate:
+                self.logo_failures.record_failure(url, 'decode')
+            return None
+        self.logo_failures.record_success(url)
+        self.thumb_store.put(uuid, url, *thumb)
+        return thumb
+
+    def show_thumbnail(self, card, binding, url, uuid, thumb):
+        width, height, rgba = thumb
+        pixbuf = GdkPixbuf.Pixbuf.new_from_bytes(GLib.Bytes.new(rgba), GdkPixbuf.Colorspace.RGB, True, 8, width, height, width * 4)
+        self.show_logo(card, binding, url, uuid, pixbuf)
 
+    def decode_thumbnail(self, data, url):
+        # Letöltött kép -> (szélesség, magasság, RGBA bájtok), legfeljebb 64x64
+        # SVG detektálása (kiterjesztés vagy tartalom alapján)
+        header = data[:100]
+        is_svg = url.lower().endswith('.svg') or b'<svg' in header or b'<!DOCTYPE svg' in header
+
+        if not is_svg:
             # Egyéb képek Pillow-val (robusztusabb)
-            success = False
             try:
-                with Image.open(local_path) as img:
-                    # CMYK konvertálása RGB-be (PNG nem támogatja a CMYK-t)
-                    if img.mode == 'CMYK':
-                        img = img.convert('RGB')
-                    
-                    img.thumbnail((64, 64), Image.Resampling.LANCZOS)
-                    
-                    byte_arr = io.BytesIO()
-                    img.save(byte_arr, format='PNG')
-                    data = byte_arr.getvalue()
-                    
-                    loader = GdkPixbuf.PixbufLoader()
-                    loader.write(data)
-                    loader.close()
-                    pixbuf = loader.get_pixbuf()
-                    
-                    if pixbuf:
-                        GLib.idle_add(image_widget.set_from_pixbuf, pixbuf)
-                        success = True
-            except Exception as e:
+                with Image.open(io.BytesIO(data)) as img:
+                    img = img.convert('RGBA') # CMYK, paletta, stb. egységesen
+                    img.thumbnail((THUMB_SIZE, THUMB_SIZE), Image.Resampling.LANCZOS)
+                    return img.width, img.height, img.tobytes()
+            except Exception:
                 pass
 
-            if not success:
-                # Fallback: GdkPixbuf (hátha ő ismeri, pl. speciális ikonok)
-                try:
-                    loader = GdkPixbuf.PixbufLoader()
-                    with open(local_path, 'rb') as f:
-                        loader.write(f.read())
-                    loader.close()
-                    pixbuf = loader.get_pixbuf()
-                    if pixbuf:
-                        scaled = pixbuf.scale_simple(64, 64, GdkPixbuf.InterpType.BILINEAR)
-                        GLib.idle_add(image_widget.set_from_pixbuf, scaled)
-                        success = True
-                except:
-                    pass
-            
-            # Ha minden kötél szakad és a fájl hibás, töröljük
-            if not success and os.path.exists(local_path):
-                try:
-                    os.remove(local_path)
-                except:
-                    pass
-
-        except Exception as e:
-            # print(f"Logo hiba: {e}")
+        # SVG-t a GdkPixbuf kezeli natívan; egyébként fallback (hátha ő ismeri, pl. speciális ikonok)
+        try:
+            loader = GdkPixbuf.PixbufLoader()
+            loader.write(data)
+            loader.close()
+            pixbuf = loader.get_pixbuf()
+            if pixbuf:
+                scaled = pixbuf.scale_simple(THUMB_SIZE, THUMB_SIZE, GdkPixbuf.InterpType.BILINEAR).add_alpha(False, 0, 0, 0)
+                rowstride = scaled.get_rowstride()
+                pixels = scaled.get_pixels()
+                row_bytes = THUMB_SIZE * 4
+                rgba = b''.join(pixels[y * rowstride:y * rowstride + row_bytes] for y in range(THUMB_SIZE))
+                return THUMB_SIZE, THUMB_SIZE, rgba
+        except Exception:
             pass
-
-    def on_load_more(self, btn):
-        self.displayed_count += 50
-        self.update_flowbox()
+        return None
 
     def on_sync_message(self, bus, msg):
-        # Videó ablak kezelése
+        # Videó ablak kezelése (csak az éppen szóló pipeline-é)
+        if not self.engine.owns(bus):
+            return
         structure = msg.get_structure()
         if structure and structure.get_name() == "prepare-window-handle":
             if self.video_xid:
@@ -839,19 +4890,33 @@ class RadioApp(Gtk.Window):
             self.is_fullscreen = True
 
     def on_video_window_close(self, widget, event):
-        # Nem zárjuk be, csak elrejtjük
-        self.player.set_state(Gst.State.NULL) # Leállítjuk a lejátszást is
-        self.btn_play.set_image(Gtk.Image.new_from_icon_name("media-playback-start-symbolic", Gtk.IconSize.LARGE_TOOLBAR))
+        # Nem zárjuk be, csak elrejtjük; a hang tovább szól, a videó dekódolás leáll (csak hang mód)
+        self.hide_video()
+        return True
+
+    def hide_video(self):
+        self.engine.set_video(False)
         
         if self.is_fullscreen:
             self.video_window.unfullscreen()
             self.is_fullscreen = False
             
-        widget.hide()
-        return True
+        self.video_window.hide()
+        perf_log("csak hang mód: videó dekódolás kikapcsolva")
+
+    def on_video_button_clicked(self, btn):
+        # Videó ablak ki/be: elrejtéskor csak hang mód, megnyitáskor a videó ág visszakapcsol
+        # (az új videó sink a prepare-window-handle üzenettel az ablakra kerül)
+        if self.video_window.get_visible():
+            self.hide_video()
+        else:
+            self.engine.set_video(True)
+            self.video_window.show_all()
+            self.video_window.present()
 
-    def play_radio(self, radio):
+    def play_radio(self, radio, index=None):
         self.current_radio = radio
+        self.current_index = index
         
         # Videó ablak elrejtése (ha előzőleg nyitva volt)
         # FONTOS: Nem rejtjük el azonnal, mert ha az új is videó, akkor villogna
@@ -871,88 +4936,134 @@ class RadioApp(Gtk.Window):
         
         # Kedvenc ikon frissítése
         self.update_favorite_icon()
+        self.btn_video.set_visible(is_tv_station(radio.get('tags') or '', radio.get('codec') or ''))
 
-        # Lejátszás indítása háttérszálon (playlist feloldás miatt)
-        threading.Thread(target=self.start_playback_async, args=(radio.get('url'),), daemon=True).start()
+        # Lejátszás indítása a kérés soron át (playlist feloldás háttérszálon; csak a legutolsó kattintás számít)
+        self.metrics.click(radio)
+        self.playback.request(radio)
 
-    def start_playback_async(self, url):
+    def stream_url(self, radio):
+        url = radio.get('url')
         # Név alapú felülbírálás (ha van jobb forrásunk)
-        if self.current_radio:
-            name = self.current_radio.get('name', '')
-            # Keresés a STREAM_OVERRIDES-ben részleges egyezéssel
-            for key, override_url in STREAM_OVERRIDES.items():
-                # Ha a név tartalmazza a kulcsot (pl. "CCTV-1" benne van a "CCTV-1 综合" névben)
-                # De vigyázzunk: CCTV-1 ne egyezzen CCTV-10-zel -> szóhatár vagy pontosabb illesztés kellene
-                # Egyszerűsített: Ha a név kezdődik vele, vagy szóközökkel határolt
-                if key == name or f"{key} " in name or f" {key}" in name or f"({key})" in name:
-                    print(f"Stream felülbírálva: {key} -> {override_url}")
-                    url = override_url
-                    break
-                    
-        resolved = self.resolve_url(url)
+        name = radio.get('name', '')
+        # Keresés a STREAM_OVERRIDES-ben részleges egyezéssel
+        for key, override_url in STREAM_OVERRIDES.items():
+            # Ha a név tartalmazza a kulcsot (pl. "CCTV-1" benne van a "CCTV-1 综合" névben)
+            # De vigyázzunk: CCTV-1 ne egyezzen CCTV-10-zel -> szóhatár vagy pontosabb illesztés kellene
+            # Egyszerűsített: Ha a név kezdődik vele, vagy szóközökkel határolt
+            if key == name or f"{key} " in name or f" {key}" in name or f"({key})" in name:
+                print(f"Stream felülbírálva: {key} -> {override_url}")
+                url = override_url
+                break
+        return url
+
+    def prepare_playback(self, radio, cancelled):
+        # Munkaszálon: override keresés és playlist feloldás; újabb kérésnél visszalépünk
+        url = self.stream_url(radio)
+        if not url or cancelled():
+            return None
+        uuid = radio.get('stationuuid')
+        hit = self.stream_resolver.cached(uuid, url)
+        resolved = self.stream_resolver.resolve(uuid, url, cancelled)
+        if resolved is None:
+            return None
         print(f"Lejátszás indítása: {resolved}")
-        GLib.idle_add(self.start_gstreamer, resolved)
+        return resolved, hit
 
-    def start_gstreamer(self, url):
-        # Teljes újraindítás minden váltásnál a tiszta állapotért
-        # Ez megoldja a videó ablak újranyitási problémákat is
-        self.create_player()
-        
-        self.player.set_property("uri", url)
-        self.player.set_state(Gst.State.PLAYING)
+    def on_playback_ready(self, radio, result):
+        # Fő szálon, csak a legutolsó kéréshez
+        url, hit = result
+        self.metrics.resolved(hit)
+        self.start_gstreamer(url, radio)
 
-    def resolve_url(self, url):
-        # Playlist fájlok (.m3u, .pls) manuális feloldása, 
-        # mert a GStreamer néha elhasal rajtuk (text/uri-list hiba)
-        # DE: Modern streaming formátumokat (HLS, DASH, Video) NE bántsuk!
-        
-        # Ázsiai TV javítás (AliCDN audio-only paraméterek eltávolítása)
-        if "myalicdn.com" in url and ("BR=audio" in url or "adapt=0" in url):
-            url = url.replace("BR=audio", "").replace("adapt=0", "").replace("?&", "?").replace("&&", "&").strip("?&")
-            # Ha az URL vége ? vagy &, vágjuk le
-            if url.endswith("?") or url.endswith("&"):
-                url = url[:-1]
-        
-        skip_extensions = ('.m3u8', '.mpd', '.mp4', '.webm', '.mkv', '.flv')
-        if url.lower().endswith(('.m3u', '.pls')) and not url.lower().endswith(skip_extensions):
-            try:
-                resp = requests.get(url, timeout=5)
-                if resp.status_code == 200:
-                    content = resp.text
-                    
-                    # HLS detektálás: Ha HLS tagek vannak benne, hagyjuk a GStreamerre
-                    # Mert a manuális sor-kiválasztás elronthatja a relatív linkeket vagy a sávszélesség-választást
-                    if "#EXT-X-STREAM-INF" in content or "#EXT-X-TARGETDURATION" in content:
-                        return url
-
-                    lines = content.splitlines()
-                    
-                    # PLS formátum
-                    if 'pls' in url.lower() or '[playlist]' in content.lower():
-                        for line in lines:
-                            if line.lower().strip().startswith('file1='):
-                                return line.split('=', 1)[1].strip()
-                    
-                    # M3U formátum (első érvényes URL)
-                    for line in lines:
-                        line = line.strip()
-                        if line and not line.startswith('#') and line.startswith('http'):
-                            return line
-            except Exception as e:
-                print(f"Playlist feloldási hiba: {e}")
-        return url
+    def on_playback_failed(self, radio):
+        # Fő szálon, a legutolsó kérésre nincs lejátszható cím: a felület hibát mutat, nem "szól"
+        msg_text = "Az adás címe nem érhető el"
+        self.metrics.error('unresolved')
+        self.lbl_artist.set_text(f"Hiba: {msg_text}")
+        self.engine.fail(msg_text)
+
+    def start_gstreamer(self, url, radio=None):
+        # Előtöltött vagy kész (üres) pipeline-ra váltunk; videós állomás után a pipeline
+        # nem kerül vissza a készletbe (a videó ablak újranyitásához tiszta pipeline kell)
+        radio = radio or self.current_radio
+        video = radio is not None and is_tv_station(radio.get('tags') or '', radio.get('codec') or '')
+        hits = self.engine.preroll_hits
+        self.player = self.engine.play(url, reusable=not video, radio=radio, video=video)
+        self.metrics.arm_first_buffer(self.player)
+        if self.engine.preroll_hits > hits:
+            perf_log("váltás előtöltött pipeline-ra")
+        self.schedule_preroll()
+
+    def schedule_preroll(self):
+        # A szomszédos állomások előtöltése kis késéssel: előbb az aktuális adás kap sávszélességet
+        if self.preroll_timer_id:
+            GLib.source_remove(self.preroll_timer_id)
+        self.preroll_timer_id = GLib.timeout_add(1500, self.preroll_neighbours)
+
+    def preroll_neighbours(self):
+        self.preroll_timer_id = None
+        # TV csatornát nem töltünk elő: a videó sink ablakot nyitna
+        stations = [radio for radio in (self.neighbour(1), self.neighbour(-1))
+                    if radio is not None and not is_tv_station(radio.get('tags') or '', radio.get('codec') or '')]
+        threading.Thread(target=self.resolve_for_preroll, args=(self.current_radio, stations), daemon=True).start()
+        return False
+
+    def resolve_for_preroll(self, current, stations):
+        # Háttérszálon: a feloldás a cache-be kerül, így a váltáskor már nincs hálózati kérés
+        items = [(self.stream_resolver.resolve(radio.get('stationuuid'), self.stream_url(radio)), radio) for radio in stations]
+        GLib.idle_add(lambda: self.current_radio is current and self.engine.preroll(items))
+
+    def find_current_index(self):
+        # Az aktuális állomás helye a rács elemei között (a kattintott kártya a már megjelenítettek közt van)
+        items = self.filtered_radios
+        if self.current_radio is None:
+            return None
+        uuid = self.current_radio.get('stationuuid')
+        index = self.current_index
+        if index is not None and index < len(items) and items[index].get('stationuuid') == uuid:
+            return index
+        for i in range(min(len(items), max(self.grid.shown, StationGrid.PAGE_SIZE))):
+            if items[i].get('stationuuid') == uuid:
+                self.current_index = i
+                return i
+        return None
+
+    def neighbour(self, step):
+        index = self.find_current_index()
+        if index is None or not 0 <= index + step < len(self.filtered_radios):
+            return None
+        return self.filtered_radios[index + step]
+
+    def zap(self, step):
+        # Előző/következő állomás a rács sorrendjében (az előtöltés miatt szinte azonnal szól)
+        index = self.find_current_index()
+        radio = self.neighbour(step)
+        if radio is not None:
+            self.play_radio(radio, index + step)
+
+    def prefetch_favorite_streams(self, catalog):
+        # Háttérszálon: a kedvencek playlistjei előre feloldódnak (catalog=None: SQLite katalógus)
+        favorites = set(self.favorites)
+        if catalog is None:
+            rows = self.store.query("favorites", "")
+            stations = [(row['stationuuid'], row['url']) for row in (rows[i] for i in range(len(rows)))]
+        else:
+            urls = catalog.column('url')
+            stations = [(uuid, urls[i]) for i, uuid in enumerate(catalog.column('stationuuid')) if uuid in favorites]
+        self.stream_resolver.prefetch('favorites', stations)
 
     def on_play_pause_clicked(self, btn):
-        _, state, _ = self.player.get_state(Gst.CLOCK_TIME_NONE)
-        if state == Gst.State.PLAYING:
-            self.player.set_state(Gst.State.PAUSED)
-            self.btn_play.set_image(Gtk.Image.new_from_icon_name("media-playback-start-symbolic", Gtk.IconSize.LARGE_TOOLBAR))
+        # A logikai állapot alapján, a pipeline lekérdezése (és a rá várakozás) nélkül
+        if self.player is None:
+            return
+        if self.engine.playing():
+            self.engine.pause()
         else:
-            self.player.set_state(Gst.State.PLAYING)
-            self.btn_play.set_image(Gtk.Image.new_from_icon_name("media-playback-pause-symbolic", Gtk.IconSize.LARGE_TOOLBAR))
+            self.engine.resume()
 
     def on_volume_changed(self, scale):
-        self.player.set_property("volume", scale.get_value())
+        self.engine.set_volume(scale.get_value())
 
     def on_favorite_toggle(self, btn):
         if not self.current_radio: return
@@ -964,11 +5075,13 @@ class RadioApp(Gtk.Window):
             self.favorites.add(uuid)
         
         self.save_favorites()
+        if self.store:
+            self.store.set_favorite(uuid, uuid in self.favorites)
+        self.sidebar.set_counts({"favorites": len(self.favorites)})
         self.update_favorite_icon()
         
         # Ha a kedvencek nézetben vagyunk, frissíteni kell a listát
-        selected = self.sidebar_list.get_selected_row()
-        if selected and selected.id == "favorites":
+        if self.sidebar.selected_id() == "favorites":
             self.filter_radios()
 
     def update_favorite_icon(self):
@@ -983,6 +5096,12 @@ class RadioApp(Gtk.Window):
             os.makedirs(config_dir)
         return config_dir
 
+    def get_cache_dir(self):
+        cache_dir = os.path.join(GLib.get_user_cache_dir(), "gladeradio")
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        return cache_dir
+
     def load_favorites(self):
         config_file = os.path.join(self.get_config_dir(), "favorites.json")
         if os.path.exists(config_file):
@@ -1007,33 +5126,53 @@ class RadioApp(Gtk.Window):
             pass
 
     def on_tag_message(self, bus, msg):
-        # Metaadatok (pl. éppen játszott dal) frissítése
+        # Metaadatok: a bitráta és a kodek a metrikákhoz kerül
+        if not self.engine.owns(bus):
+            return
         taglist = msg.parse_tag()
-        # Itt lehetne bővíteni a UI-t dinamikus infókkal
-        pass
+        found, bitrate = taglist.get_uint(Gst.TAG_BITRATE)
+        has_codec, codec = taglist.get_string(Gst.TAG_AUDIO_CODEC)
+        self.metrics.tags(bitrate if found else None, codec if has_codec else None)
+        # Itt lehetne bővíteni a UI-t dinamikus infókkal (pl. éppen játszott dal)
+
+    def on_qos_message(self, bus, msg):
+        # A sinkek minőség jelzései (késés miatt eldobott pufferek)
+        if not self.engine.owns(bus):
+            return
+        _, processed, dropped = msg.parse_qos_stats()
+        self.metrics.qos(msg.src.get_name(), processed, dropped)
+
+    def on_player_state(self, state, detail):
+        # A lejátszó logikai állapota (fő szálon); a gomb ikonja a szándékot követi
+        icon = "media-playback-pause-symbolic" if self.engine.playing() else "media-playback-start-symbolic"
+        self.btn_play.set_image(Gtk.Image.new_from_icon_name(icon, Gtk.IconSize.LARGE_TOOLBAR))
+        self.metrics.state(state, detail)
+        if state == PlayerEngine.ERROR and detail == "timeout":
+            self.lbl_artist.set_text("Hiba: Az adás nem indult el (időtúllépés)")
 
     def on_player_error(self, bus, msg):
+        if not self.engine.owns(bus):
+            # Előtöltött pipeline hibája: eldobjuk, váltáskor majd frissen indul
+            self.engine.discard(bus)
+            return
         err, debug = msg.parse_error()
         print(f"Lejátszási hiba: {err}, {debug}")
+        # Előtöltésből átvett pipeline hibája: egy friss pipeline-nal még egyszer próbálkozunk
+        player = self.engine.retry()
+        if player is not None:
+            self.player = player
+            self.metrics.arm_first_buffer(player)
+            return
+        if self.current_radio:
+            self.stream_resolver.forget(self.current_radio.get('stationuuid'))
         
-        msg_text = err.message
-        debug_str = str(debug) if debug else ""
-        
-        # Felhasználóbarát hibaüzenetek
-        if "Not Found" in msg_text or "404" in debug_str:
-            msg_text = "Az adás nem elérhető (404 - Offline)"
-        elif "Forbidden" in msg_text or "403" in debug_str:
-            msg_text = "Hozzáférés megtagadva (403)"
-        elif "Connection refused" in msg_text or "connection refused" in debug_str:
-            msg_text = "A szerver nem válaszol"
-        elif "GstTypeFindElement" in debug_str or "missing plugin" in debug_str.lower():
-            msg_text = "Hiányzó kodek! (gstreamer-plugins-ugly/bad)"
-        elif "Internal data stream error" in msg_text:
-            msg_text = "Adatfolyam hiba (Lehet, hogy offline)"
+        # Felhasználóbarát hibaüzenet és hibatípus a metrikákhoz
+        kind, msg_text = classify_player_error(err.message, str(debug) if debug else "")
+        self.metrics.error(kind)
             
-        # UI frissítése
+        # UI frissítése (a lejátszó leáll, a gomb ikonja az állapotjelzésből frissül)
         self.lbl_artist.set_text(f"Hiba: {msg_text}")
-        self.btn_play.set_image(Gtk.Image.new_from_icon_name("media-playback-start-symbolic", Gtk.IconSize.LARGE_TOOLBAR))
+        self.engine.fail(msg_text)
 
 if __name__ == "__main__":
     win = RadioApp()
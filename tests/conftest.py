@@ -0,0 +1,81 @@
+# Közös pytest beállítások: a main modul és a benchmarks/standin.py helyi szerver elérése
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from standin import StandinServer
+
+@pytest.fixture
+def standin():
+    # Gyár: standin(routes, **opciók) elindít egy helyi szervert, a teszt végén leáll
+    servers = []
+
+    def start(routes, **options):
+        server = StandinServer(routes, **options).start()
+        servers.append(server)
+        return server
+    yield start
+    # Párhuzamos leállítás (a serve_forever fél másodpercenként néz rá a leállítási kérésre)
+    stoppers = [threading.Thread(target=server.stop) for server in servers]
+    for stopper in stoppers:
+        stopper.start()
+    for stopper in stoppers:
+        stopper.join()
+
+def make_record(i, **fields):
+    # Radio Browser stílusú állomás rekord a tesztekhez
+    record = {
+        'stationuuid': f"uuid-{i}", 'changeuuid': f"change-{i}", 'name': f"Station {i}",
+        'url': f"http://example.invalid/{i}", 'url_resolved': f"http://example.invalid/{i}",
+        'favicon': '', 'tags': "pop,rock" if i % 2 else "news", 'country': "Hungary" if i % 3 else "Austria",
+        'countrycode': "HU" if i % 3 else "AT", 'codec': "MP3", 'language': "hungarian",
+        'bitrate': 128, 'hls': 0, 'votes': i % 50, 'clickcount': i % 70, 'clicktrend': 0,
+        'geo_lat': None, 'geo_long': None, 'lastcheckok': 1,
+        'lastchangetime_iso8601': "2025-01-01T00:00:00Z",
+    }
+    record.update(fields)
+    return record
+
+def base_records(count=50):
+    return [make_record(i, lastchangetime=f"2025-01-01 00:00:{i:02d}") for i in range(count)]
+
+class FakeRadioBrowser:
+    # Teljes lista, változásnapló ('stations/changed') és hibás állomások ('stations/broken')
+    def __init__(self, records):
+        self.stations = {record['stationuuid']: dict(record) for record in records}
+        self.log = []
+        self.broken = []
+        self.changed_queries = []
+
+    def change(self, record):
+        n = len(self.log)
+        record = dict(record, changeuuid=f"log-{n}", lastchangetime=f"2025-02-01 00:{n // 60:02d}:{n % 60:02d}")
+        self.log.append(record)
+        self.stations[record['stationuuid']] = record
+        return record
+
+    def break_station(self, uuid):
+        self.stations[uuid] = dict(self.stations[uuid], lastcheckok=0)
+        self.broken.append(self.stations[uuid])
+
+    def routes(self):
+        def reply(payload):
+            return 200, {"Content-Type": "application/json"}, json.dumps(payload).encode()
+
+        def stations(headers, path, query):
+            if path.endswith("/changed"):
+                self.changed_queries.append(query.get('lastchangeuuid'))
+                positions = {change['changeuuid']: i for i, change in enumerate(self.log)}
+                start = positions.get(query.get('lastchangeuuid'), -1) + 1
+                return reply(self.log[start:start + int(query.get('limit', 10000))])
+            if path.endswith("/broken"):
+                return reply(self.broken)
+            return reply(list(self.stations.values()))
+        return {"/json/stations": stations}
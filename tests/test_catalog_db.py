@@ -0,0 +1,38 @@
+# Az opcionális SQLite katalógus (CatalogDB): a rács olvasásai nem várnak a teljes cserére
+import threading
+
+import pytest
+
+from conftest import make_record
+from main import CatalogDB, StationCatalog, sqlite3
+
+pytestmark = pytest.mark.skipif(sqlite3 is None, reason="sqlite3 nem elérhető")
+
+def test_reads_do_not_wait_for_replace(tmp_path):
+    db = CatalogDB(str(tmp_path / "catalog.sqlite3"))
+    db.replace_catalog(StationCatalog.from_records(make_record(i) for i in range(100)), None)
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_rows():
+        # Teljes frissítés, ami a tranzakció közepén megáll
+        for i in range(200):
+            if i == 50:
+                started.set()
+                release.wait(10)
+            yield make_record(i)
+
+    writer = threading.Thread(target=db.replace_catalog, args=(slow_rows(), None))
+    writer.start()
+    try:
+        assert started.wait(10)
+        # Az író tranzakció nyitva van: az olvasó a régi, véglegesített állapotot látja
+        assert db.station_count() == 100
+        results = db.query("all", "")
+        assert len(results) == 100
+        assert results[99]['name'] == "Station 99"
+    finally:
+        release.set()
+        writer.join()
+    assert db.station_count() == 200
+    db.close()
@@ -0,0 +1,62 @@
+# A bináris katalógus fájl (CatalogFile) lusta oszlop dekódolása
+import bz2
+import json
+import threading
+
+from conftest import make_record
+from main import CatalogFile, CatalogSync, StationCatalog
+
+def saved_catalog(tmp_path, count=20000):
+    catalog = StationCatalog.from_records(make_record(i) for i in range(count))
+    path = str(tmp_path / "radios_cache.bin")
+    CatalogFile.save(catalog, {'watermark': "2025-01-01T00:00:00Z"}, path)
+    return catalog, path
+
+def test_roundtrip(tmp_path):
+    catalog, path = saved_catalog(tmp_path, 500)
+    loaded, state = CatalogFile.load(path)
+    assert state == {'watermark': "2025-01-01T00:00:00Z"}
+    assert loaded.to_records() == catalog.to_records()
+    loaded.materialize()
+    assert loaded.columns.mapping is None # Minden oszlop betöltve: a leképezés lezárult
+
+def test_concurrent_column_reads(tmp_path):
+    # Induláskor a szűrés, a keresőindex és a szinkron egyszerre kéri ugyanazokat az oszlopokat
+    catalog, path = saved_catalog(tmp_path)
+    keys = ('name', 'tags', 'stationuuid', 'url_resolved', 'votes')
+    for _ in range(10):
+        loaded, _ = CatalogFile.load(path)
+        barrier = threading.Barrier(6)
+        errors = []
+
+        def read(offset):
+            barrier.wait()
+            try:
+                for key in keys[offset:] + keys[:offset]:
+                    assert len(loaded.column(key)) == len(catalog)
+                if offset == 0:
+                    loaded.materialize()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=read, args=(n % len(keys),)) for n in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        assert loaded.to_records() == catalog.to_records()
+        assert loaded.columns.mapping is None
+
+def test_migrate_forces_full_refresh(tmp_path):
+    # Csak a saját korábbi cache kerül át, és a következő szinkron teljes letöltés
+    records = [make_record(i, lastchangetime=f"2025-01-01 00:00:{i:02d}") for i in range(30)]
+    path = str(tmp_path / "radios_cache_v2.json.bz2")
+    with bz2.open(path, "wt") as f:
+        json.dump(records, f)
+    catalog, state = CatalogFile.migrate(path)
+    assert len(catalog) == 30
+    assert state['lastchangeuuid'] == "change-29"
+    assert state['last_full'] == 0
+    assert CatalogSync(None).needs_full(state)
+    assert CatalogFile.migrate(str(tmp_path / "missing.json.bz2")) is None
@@ -0,0 +1,96 @@
+# Inkrementális katalógus szinkron (CatalogSync) egy hamis, helyi Radio Browser szerverrel,
+# valamint a változások összefésülése (StationCatalog.merged)
+from conftest import FakeRadioBrowser, base_records, make_record
+from main import CatalogFile, CatalogSync, HttpClient, MirrorManager, StationCatalog
+
+def make_sync(standin, fake):
+    server = standin(fake.routes())
+    http = HttpClient()
+    return CatalogSync(http, MirrorManager(http, servers=[server.url]))
+
+def by_uuid(catalog):
+    return {row['stationuuid']: row.to_dict() for row in catalog}
+
+def test_merged_applies_changes_in_place():
+    catalog = StationCatalog.from_records(base_records(5))
+    merged = catalog.merged([make_record(2, name="Átnevezett", votes=999)])
+    assert [row['stationuuid'] for row in merged] == [f"uuid-{i}" for i in range(5)]
+    assert merged[2]['name'] == "Átnevezett"
+    assert merged[2]['votes'] == 999
+    assert merged[2]['country'] == catalog[2]['country']
+    assert catalog[2]['name'] == "Station 2" # Az eredeti katalógus nem változik
+
+def test_merged_last_change_wins():
+    catalog = StationCatalog.from_records(base_records(3))
+    merged = catalog.merged([make_record(1, name="Első"), make_record(1, name="Második")])
+    assert merged[1]['name'] == "Második"
+
+def test_merged_removes_deleted_and_broken():
+    catalog = StationCatalog.from_records(base_records(5))
+    merged = catalog.merged([make_record(3, lastcheckok=0)], removed=["uuid-1"])
+    assert [row['stationuuid'] for row in merged] == ["uuid-0", "uuid-2", "uuid-4"]
+
+def test_merged_appends_new_stations():
+    catalog = StationCatalog.from_records(base_records(3))
+    merged = catalog.merged([make_record(10), make_record(11, lastcheckok=0), make_record(12)], removed=["uuid-12"])
+    assert [row['stationuuid'] for row in merged] == ["uuid-0", "uuid-1", "uuid-2", "uuid-10"]
+
+def test_incremental_sync_matches_full_download(standin):
+    fake = FakeRadioBrowser(base_records())
+    sync = make_sync(standin, fake)
+    catalog, state = sync.fetch_full_stream()
+    assert len(catalog) == 50
+    assert state['lastchangeuuid'] == "change-49"
+
+    fake.change(make_record(5, name="Módosított", votes=1234))
+    fake.change(make_record(60, name="Új állomás"))
+    fake.change(make_record(7, lastcheckok=0))
+    fake.break_station("uuid-9")
+
+    merged, new_state = sync.sync(catalog, state)
+    assert sync.last_stats['mode'] == 'incremental'
+    full, _ = sync.fetch_full_stream()
+    assert by_uuid(merged) == by_uuid(full)
+    assert by_uuid(merged)["uuid-5"]['name'] == "Módosított"
+    assert "uuid-7" not in by_uuid(merged)
+    assert "uuid-9" not in by_uuid(merged)
+    assert merged[len(merged) - 1]['stationuuid'] == "uuid-60"
+    assert new_state['lastchangeuuid'] == fake.log[-1]['changeuuid']
+
+def test_changes_are_paged(standin):
+    fake = FakeRadioBrowser(base_records())
+    sync = make_sync(standin, fake)
+    sync.PAGE_SIZE = 4
+    state = CatalogSync.state_from_records(base_records())
+    for i in range(10):
+        fake.change(make_record(i, votes=100 + i))
+    changes, removed, new_state = sync.fetch_changes(state)
+    assert [change['stationuuid'] for change in changes] == [f"uuid-{i}" for i in range(10)]
+    assert removed == []
+    assert fake.changed_queries == ["change-49", "log-3", "log-7"]
+    assert new_state['lastchangeuuid'] == "log-9"
+
+def test_watermark_persists_across_runs(standin, tmp_path):
+    fake = FakeRadioBrowser(base_records())
+    sync = make_sync(standin, fake)
+    catalog, state = sync.fetch_full_stream()
+    fake.change(make_record(1, name="Egyszer"))
+    merged, state = sync.sync(catalog, state)
+    path = str(tmp_path / "radios_cache.bin")
+    CatalogFile.save(merged, state, path)
+
+    # Új indítás: a vízjel a cache fájlból jön, a régi változás nem töltődik le újra
+    loaded, loaded_state = CatalogFile.load(path)
+    assert loaded_state['lastchangeuuid'] == "log-0"
+    fake.changed_queries.clear()
+    again, again_state = make_sync(standin, fake).sync(loaded, loaded_state)
+    assert again is None
+    assert fake.changed_queries == ["log-0"]
+    assert again_state['lastchangeuuid'] == "log-0"
+    assert again_state['last_sync'] >= state['last_sync']
+
+    fake.change(make_record(2, name="Később"))
+    merged, state = make_sync(standin, fake).sync(loaded, again_state)
+    assert by_uuid(merged)["uuid-1"]['name'] == "Egyszer"
+    assert by_uuid(merged)["uuid-2"]['name'] == "Később"
+    assert state['lastchangeuuid'] == "log-1"
@@ -0,0 +1,102 @@
+# A közös HttpClient a helyi stand-in szerverrel: kapcsolatok és átvitt bájtok száma
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from main import HttpClient
+
+LOGO_BODY = os.urandom(12 * 1024)
+PLAYLIST_BODY = b"[playlist]\nFile1=http://127.0.0.1/stream\nNumberOfEntries=1\n" * 20
+
+def static_route(body, content_type):
+    etag = '"%s"' % hashlib.md5(body).hexdigest()
+
+    def handler(headers, path, query):
+        if headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        return 200, {"Content-Type": content_type, "ETag": etag, "Last-Modified": "Mon, 01 Dec 2025 10:00:00 GMT"}, body
+    return handler
+
+def fetch_all(fetch, urls, workers=8):
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fetch, urls))
+
+def logo_server(standin):
+    server = standin({"/logo/": static_route(LOGO_BODY, "image/png"),
+                      "/list.pls": static_route(PLAYLIST_BODY, "audio/x-scpls")})
+    return server, [f"{server.url}/logo/{i}.png" for i in range(100)]
+
+def test_connections_bounded_per_host(standin, tmp_path):
+    server, urls = logo_server(standin)
+    client = HttpClient(str(tmp_path / "validators.json"), per_host=4)
+    statuses = fetch_all(lambda url: client.get(url).status_code, urls)
+    assert statuses == [200] * len(urls)
+    assert server.requests == len(urls)
+    # 8 párhuzamos szál, de hostonként legfeljebb 4 kapcsolat nyílik
+    assert server.connections <= 4
+    assert client.stats()['connections_opened'] <= 4
+
+def test_pooled_connections_are_reused(standin):
+    server, urls = logo_server(standin)
+    fetch_all(lambda url: requests.get(url, timeout=5).status_code, urls, workers=4)
+    bare = server.connections
+    server.reset_counters()
+
+    client = HttpClient()
+    fetch_all(lambda url: client.get(url).status_code, urls, workers=4)
+    assert bare == len(urls) # Csupasz requests.get: kérésenként új kapcsolat
+    assert server.connections <= 4
+    server.reset_counters()
+    fetch_all(lambda url: client.get(url).status_code, urls, workers=4)
+    assert server.connections == 0 # A már nyitott kapcsolatok újrahasznosulnak
+
+def test_revalidation_transfers_no_body(standin, tmp_path):
+    server, urls = logo_server(standin)
+    client = HttpClient(str(tmp_path / "validators.json"))
+    fetch_all(lambda url: client.get(url).status_code, urls)
+    assert server.bytes_sent == len(urls) * len(LOGO_BODY)
+
+    server.reset_counters()
+    statuses = fetch_all(lambda url: client.get(url, revalidate=True).status_code, urls)
+    assert statuses == [304] * len(urls)
+    assert server.bytes_sent == 0
+    assert client.stats()['not_modified'] == len(urls)
+
+def test_validators_persist(standin, tmp_path):
+    server, urls = logo_server(standin)
+    path = str(tmp_path / "validators.json")
+    client = HttpClient(path)
+    client.get(urls[0])
+    client.save(force=True)
+
+    server.reset_counters()
+    assert HttpClient(path).get(urls[0], revalidate=True).status_code == 304
+    assert server.bytes_sent == 0
+
+def test_fetch_text_served_from_memory_on_304(standin):
+    server, _ = logo_server(standin)
+    client = HttpClient()
+    url = f"{server.url}/list.pls"
+    assert client.fetch_text(url) == PLAYLIST_BODY.decode()
+    server.reset_counters()
+    assert client.fetch_text(url) == PLAYLIST_BODY.decode()
+    assert server.requests == 1
+    assert server.bytes_sent == 0
+
+def test_streamed_requests_hold_a_slot(standin):
+    # A folyamatos letöltés (pl. a katalógus) is beleszámít az összes kapcsolat korlátjába
+    server, urls = logo_server(standin)
+    client = HttpClient(max_connections=2)
+    first = client.get(urls[0], stream=True)
+    second = client.get(urls[1], stream=True)
+    assert not client.slots.acquire(blocking=False)
+    first.close()
+    first.close() # Ismételt lezárás nem ad vissza még egy helyet
+    assert client.slots.acquire(blocking=False)
+    assert not client.slots.acquire(blocking=False)
+    client.slots.release()
+    with second:
+        assert second.content == LOGO_BODY
+    assert client.get(urls[2]).status_code == 200
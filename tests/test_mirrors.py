@@ -0,0 +1,99 @@
+# Radio Browser tükrök (MirrorManager) helyi stand-in tükrökkel: injektált késleltetés és hibák
+import json
+
+import pytest
+import requests
+
+from conftest import FakeRadioBrowser, base_records, make_record
+from main import CatalogSync, HttpClient, MirrorManager
+
+# név -> (késleltetés mp, hibaarány)
+MIRRORS = {
+    "fast": (0.0, 0.0),
+    "medium": (0.02, 0.0),
+    "slow": (0.6, 0.0),
+    "dead": (0.0, 1.0),
+}
+
+@pytest.fixture
+def mirror_setup(standin, tmp_path):
+    # (tükörkezelő, {név: szerver}, {url: név}, hamis Radio Browser) a /json/servers felderítéssel
+    fake = FakeRadioBrowser(base_records())
+
+    def stats(headers, path, query):
+        return 200, {"Content-Type": "application/json"}, b'{"stations": 50}'
+
+    servers = {name: standin(dict(fake.routes(), **{"/json/stats": stats}), latency=latency, fail_rate=fail_rate)
+               for name, (latency, fail_rate) in MIRRORS.items()}
+    listing = json.dumps([{"name": server.url} for server in servers.values()]).encode()
+    discovery = standin({"/json/servers": lambda h, p, q: (200, {"Content-Type": "application/json"}, listing)})
+    mirrors = MirrorManager(HttpClient(), state_path=str(tmp_path / "mirrors.json"),
+                            discovery_url=f"{discovery.url}/json/servers", fallback=())
+    mirrors.probe()
+    for server in servers.values():
+        server.reset_counters()
+    return mirrors, servers, {server.url: name for name, server in servers.items()}, fake
+
+def test_fastest_mirror_is_picked(mirror_setup):
+    mirrors, servers, names, _ = mirror_setup
+    ranking = mirrors.ranking()
+    assert [names[url] for url, _ in ranking] == ["fast", "medium", "slow", "dead"]
+    assert ranking[-1][1] is None # A halott tükörnek nincs mért késleltetése
+    assert names[mirrors.best()] == "fast"
+    assert mirrors.stats()['healthy'] == 3
+
+    mirrors.request("/json/stations/broken", timeout=5)
+    assert servers["fast"].requests == 1
+    assert sum(server.requests for server in servers.values()) == 1
+
+def test_ranking_persists(mirror_setup, tmp_path):
+    mirrors, _, names, _ = mirror_setup
+    reloaded = MirrorManager(HttpClient(), state_path=str(tmp_path / "mirrors.json"), discovery_url="http://127.0.0.1:9/")
+    assert reloaded.ranking() == mirrors.ranking()
+    assert names[reloaded.best()] == "fast" # Friss mérés nélkül, a mentett rangsorból
+
+def test_failover_when_fastest_goes_down(mirror_setup):
+    mirrors, servers, names, _ = mirror_setup
+    servers["fast"].fail_rate = 1.0
+    resp = mirrors.request("/json/stations/broken", timeout=5)
+    assert resp.status_code == 200
+    assert servers["fast"].requests == 1
+    assert servers["medium"].requests == 1
+    assert mirrors.stats()['failovers'] == 1
+
+    # A kiesett tükör tiltva marad: a következő kérések már nem próbálkoznak vele
+    for _ in range(5):
+        mirrors.request("/json/stations/broken", timeout=5)
+    assert servers["fast"].requests == 1
+    assert names[mirrors.best()] == "medium"
+
+    # Ha minden tükör hibás, a hiba a hívóig jut
+    for server in servers.values():
+        server.fail_rate = 1.0
+    with pytest.raises(requests.RequestException):
+        mirrors.request("/json/stations/broken", timeout=5)
+
+def test_full_download_fails_over(mirror_setup):
+    mirrors, servers, names, _ = mirror_setup
+    servers["fast"].fail_rate = 1.0
+    sync = CatalogSync(mirrors.http, mirrors)
+    catalog, _ = sync.fetch_full_stream()
+    assert len(catalog) == 50
+    assert names[sync.last_stats['mirror']] == "medium"
+
+def test_paged_requests_spread_across_healthy_mirrors(mirror_setup):
+    mirrors, servers, names, fake = mirror_setup
+    for i in range(40):
+        fake.change(make_record(i, votes=1000 + i))
+    sync = CatalogSync(mirrors.http, mirrors)
+    sync.PAGE_SIZE = 2
+    changes, _, state = sync.fetch_changes(CatalogSync.state_from_records(base_records()))
+    assert len(changes) == 40
+    assert state['lastchangeuuid'] == "log-39"
+
+    # A gyors és a közepes tükör osztozik a lapokon; a lassú és a halott nem kap kérést
+    assert servers["fast"].requests > 0
+    assert servers["medium"].requests > 0
+    assert servers["slow"].requests == 0
+    assert servers["dead"].requests == 0
+    assert servers["fast"].requests + servers["medium"].requests == 22 # 21 lap + a hibás állomások
@@ -0,0 +1,132 @@
+# Gyors csatornaváltás (PlaybackQueue): a legutolsó kérés jut el a lejátszóig, korlátos szálszámmal
+import queue
+import random
+import threading
+import time
+
+from main import HttpClient, PlaybackQueue, StreamResolver
+
+STATIONS = 40
+
+class MainLoop:
+    # A GTK fő ciklus helyett: a dispatch-elt hívások a teszt szálán futnak le
+    def __init__(self):
+        self.calls = queue.Queue()
+
+    def dispatch(self, func, *args):
+        self.calls.put((func, args))
+
+    def run_pending(self, timeout=0.0):
+        try:
+            while True:
+                func, args = self.calls.get(timeout=timeout)
+                func(*args)
+                timeout = 0.0
+        except queue.Empty:
+            pass
+
+def queue_threads(playback):
+    # A sor munkaszálai (a stand-in szerver szálai nem számítanak)
+    return sum(1 for thread in threading.enumerate() if getattr(getattr(thread, '_target', None), '__self__', None) is playback)
+
+def drain(loop, playback, timeout=30):
+    # Megvárjuk, amíg minden munkaszál végez és a fő szálra küldött hívások lefutnak
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        loop.run_pending(0.05)
+        with playback.cond:
+            idle = playback.pending is None and playback.busy == 0
+        if idle and loop.calls.empty():
+            return
+    raise AssertionError("A lejátszási sor nem ürült ki")
+
+def test_rapid_zapping_plays_last_station(standin):
+    server = None
+
+    def playlist(headers, path, query):
+        time.sleep(random.uniform(0.0, 0.1)) # Változó válaszidő: a kérések más sorrendben végeznek
+        i = path.rsplit('/', 1)[1].split('.')[0]
+        return 200, {"Content-Type": "audio/x-scpls"}, f"[playlist]\nFile1={server.url}/stream/{i}\n".encode()
+
+    server = standin({"/pls/": playlist}, compress=False)
+    stations = [{'stationuuid': f"uuid-{i}", 'url': f"{server.url}/pls/{i}.pls"} for i in range(STATIONS)]
+    rng = random.Random(7)
+
+    for _ in range(3):
+        resolver = StreamResolver(HttpClient(), None, workers=0)
+        loop = MainLoop()
+        played = []
+
+        def prepare(radio, cancelled):
+            if cancelled():
+                return None
+            return resolver.resolve(radio['stationuuid'], radio['url'], cancelled)
+
+        playback = PlaybackQueue(prepare, lambda radio, url: played.append((radio['stationuuid'], url)), dispatch=loop.dispatch)
+        peak = 0
+        zaps = [rng.choice(stations) for _ in range(300)]
+        for radio in zaps:
+            playback.request(radio)
+            peak = max(peak, queue_threads(playback))
+            loop.run_pending()
+            time.sleep(rng.uniform(0, 0.002))
+        drain(loop, playback)
+
+        last = zaps[-1]['stationuuid']
+        assert played[-1] == (last, f"{server.url}/stream/{last.split('-')[1]}")
+        # Minden indítás a saját állomásának feloldott URL-jével történt
+        assert all(url.endswith("/stream/" + uuid.split('-')[1]) for uuid, url in played)
+        assert len(played) < len(zaps) / 2
+        assert 0 < peak <= PlaybackQueue.MAX_WORKERS
+        stats = playback.stats()
+        assert stats['workers'] <= PlaybackQueue.MAX_WORKERS
+        assert stats['requested'] == len(zaps)
+        assert stats['delivered'] == len(played)
+
+def test_pending_requests_coalesce():
+    # Foglalt munkaszálak mellett a várakozó kérések összevonódnak: csak a legutolsó indul el
+    release = threading.Event()
+    started = []
+    loop = MainLoop()
+    played = []
+
+    def prepare(radio, cancelled):
+        started.append(radio)
+        release.wait(5)
+        return None if cancelled() else radio
+
+    playback = PlaybackQueue(prepare, lambda radio, result: played.append(radio), dispatch=loop.dispatch)
+    for i in range(200):
+        playback.request(i)
+        # Az első kérések mind elindulnak (minden foglalt szál mellé új indul, a korlátig)
+        deadline = time.time() + 5
+        while len(started) < min(i + 1, PlaybackQueue.MAX_WORKERS) and time.time() < deadline:
+            time.sleep(0.001)
+    assert queue_threads(playback) == PlaybackQueue.MAX_WORKERS
+    release.set()
+    drain(loop, playback)
+
+    assert playback.stats()['workers'] == PlaybackQueue.MAX_WORKERS
+    assert played == [199]
+    assert started == list(range(PlaybackQueue.MAX_WORKERS)) + [199]
+    assert playback.stats()['coalesced'] == 200 - PlaybackQueue.MAX_WORKERS - 1
+
+def test_failed_latest_request_reports_failure():
+    # Nincs lejátszható cím a legutolsó kérésre: hibát kapunk, nem némán elnyelt kérést;
+    # egy elavult kérés sikertelensége viszont nem jelez
+    loop = MainLoop()
+    played = []
+    failed = []
+    playback = PlaybackQueue(lambda radio, cancelled: None if radio.startswith("dead") else radio,
+                             lambda radio, result: played.append(radio), dispatch=loop.dispatch, fail=failed.append)
+    playback.request("dead-1")
+    drain(loop, playback)
+    assert failed == ["dead-1"]
+    assert played == []
+
+    playback.request("dead-2")
+    playback.request("live")
+    drain(loop, playback)
+    assert failed == ["dead-1"]
+    assert played == ["live"]
+    assert playback.stats()['failed'] == 1
@@ -0,0 +1,252 @@
+# PlayerEngine: csak hang mód (playbin3-nál a videó folyam kiválasztásának megszüntetése, a régi
+# playbin-nél a 'flags' videó bitje), pipeline-onkénti munkaszálak és az előtöltések kezelése.
+# GStreamer helyett kis utánzatokkal: csak azt nézzük, milyen eseményt, tulajdonságot vagy
+# állapotot kap a pipeline.
+import threading
+
+import pytest
+
+import main
+from main import PlayerEngine
+
+AUDIO, VIDEO, TEXT = 2, 4, 8
+
+class FakeStream:
+    def __init__(self, stream_id, stream_type):
+        self.stream_id = stream_id
+        self.stream_type = stream_type
+
+    def get_stream_id(self):
+        return self.stream_id
+
+    def get_stream_type(self):
+        return self.stream_type
+
+class FakeCollection:
+    def __init__(self, streams):
+        self.streams = streams
+
+    def get_size(self):
+        return len(self.streams)
+
+    def get_stream(self, i):
+        return self.streams[i]
+
+class FakeMessage:
+    def __init__(self, collection=None, selected=()):
+        self.collection = collection
+        self.selected = list(selected)
+
+    def parse_stream_collection(self):
+        return self.collection
+
+    def streams_selected_get_size(self):
+        return len(self.selected)
+
+    def streams_selected_get_stream(self, i):
+        return self.selected[i]
+
+class FakeBus:
+    def connect(self, *args):
+        pass
+
+    def remove_signal_watch(self):
+        pass
+
+class FakePlaybin:
+    def __init__(self):
+        self.props = {'flags': 0x17} # video | audio | text | soft-volume
+        self.bus = FakeBus()
+        self.events = []
+        self.states = []
+
+    def set_property(self, key, value):
+        self.props[key] = value
+
+    def get_property(self, key):
+        return self.props[key]
+
+    def set_state(self, state):
+        self.states.append(state)
+
+    def get_bus(self):
+        return self.bus
+
+    def send_event(self, event):
+        self.events.append(event)
+
+class FakeGst:
+    class State:
+        NULL, PAUSED, PLAYING = 'NULL', 'PAUSED', 'PLAYING'
+
+    class StateChangeReturn:
+        NO_PREROLL = 'NO_PREROLL'
+
+    class StreamType:
+        AUDIO, VIDEO, TEXT = AUDIO, VIDEO, TEXT
+
+    class Event:
+        @staticmethod
+        def new_select_streams(ids):
+            return ('select-streams', list(ids))
+
+    class ElementFactory:
+        @staticmethod
+        def make(kind, name):
+            return FakePlaybin()
+
+@pytest.fixture
+def engine(monkeypatch, request):
+    monkeypatch.setenv("GLADERADIO_PLAYBIN", request.param)
+    monkeypatch.setattr(main, "Gst", FakeGst)
+    monkeypatch.setattr(main.GLib, "idle_add", lambda func, *args: 0)
+    monkeypatch.setattr(main.GLib, "timeout_add_seconds", lambda seconds, func: 0)
+    return PlayerEngine(lambda playbin: None)
+
+def settle(engine, playbin):
+    # Megvárjuk, amíg a pipeline munkaszála minden beküldött műveletet lefuttat
+    done = threading.Event()
+    engine._submit(playbin, done.set)
+    assert done.wait(5)
+
+STREAMS = [FakeStream("audio-0", AUDIO), FakeStream("video-0", VIDEO), FakeStream("audio-1", AUDIO), FakeStream("text-0", TEXT)]
+
+@pytest.mark.parametrize("engine", ["playbin3"], indirect=True)
+def test_audio_only_deselects_video_stream(engine):
+    playbin = engine.play("http://example.invalid/tv.m3u8", reusable=False, video=True)
+    bus = playbin.get_bus()
+    engine.on_stream_collection(bus, FakeMessage(collection=FakeCollection(STREAMS)))
+    engine.on_streams_selected(bus, FakeMessage(selected=STREAMS[:2]))
+    settle(engine, playbin)
+    assert playbin.events == []
+
+    engine.set_video(False)
+    settle(engine, playbin)
+    assert playbin.events == [('select-streams', ["audio-0"])]
+    engine.on_streams_selected(bus, FakeMessage(selected=STREAMS[:1]))
+
+    # Új folyam lista után a videó újra kiválasztódna: csak hang módban azonnal lekapcsoljuk
+    engine.on_streams_selected(bus, FakeMessage(selected=STREAMS[:2]))
+    settle(engine, playbin)
+    assert playbin.events[-1] == ('select-streams', ["audio-0"])
+    engine.on_streams_selected(bus, FakeMessage(selected=STREAMS[:1]))
+
+    engine.set_video(True)
+    settle(engine, playbin)
+    assert playbin.events[-1] == ('select-streams', ["audio-0", "video-0"])
+    assert playbin.props['flags'] == 0x17 # A playbin3 útnál a flags nem változik
+    assert engine.stats()['video_pipeline'] == "playbin3"
+
+@pytest.mark.parametrize("engine", ["playbin3"], indirect=True)
+def test_audio_only_before_streams_are_known(engine):
+    # A videó ablak már az első kiválasztás előtt rejtve: az üzenet érkezésekor kapcsolódik le
+    playbin = engine.play("http://example.invalid/tv.m3u8", reusable=False, video=True)
+    engine.set_video(False)
+    settle(engine, playbin)
+    assert playbin.events == []
+    bus = playbin.get_bus()
+    engine.on_stream_collection(bus, FakeMessage(collection=FakeCollection(STREAMS)))
+    engine.on_streams_selected(bus, FakeMessage(selected=[STREAMS[0], STREAMS[1], STREAMS[3]]))
+    settle(engine, playbin)
+    assert playbin.events == [('select-streams', ["audio-0", "text-0"])]
+
+@pytest.mark.parametrize("engine", ["playbin3"], indirect=True)
+def test_new_station_starts_with_video(engine):
+    first = engine.play("http://example.invalid/a.m3u8", reusable=False, video=True)
+    bus = first.get_bus()
+    engine.on_stream_collection(bus, FakeMessage(collection=FakeCollection(STREAMS)))
+    engine.on_streams_selected(bus, FakeMessage(selected=STREAMS[:2]))
+    engine.set_video(False)
+    second = engine.play("http://example.invalid/b.m3u8", reusable=False, video=True)
+    settle(engine, second)
+    assert engine.video_enabled
+    assert first not in engine.streams # Az elengedett pipeline folyam listája törlődik
+    assert second.events == []
+
+@pytest.mark.parametrize("engine", ["playbin3"], indirect=True)
+def test_radio_stays_on_legacy_playbin(engine):
+    # playbin3 csak a TV adásoké: a rádiók a készletből jövő régi playbin-en szólnak
+    playbin = engine.play("http://example.invalid/radio.mp3")
+    settle(engine, playbin)
+    assert playbin not in engine.streams
+    assert engine.built == engine.POOL_SIZE
+
+@pytest.mark.parametrize("engine", ["playbin"], indirect=True)
+def test_legacy_playbin_uses_video_flag(engine):
+    playbin = engine.play("http://example.invalid/tv.m3u8", reusable=False, video=True)
+    engine.set_video(False)
+    settle(engine, playbin)
+    assert playbin.props['flags'] == 0x16
+    engine.set_video(True)
+    settle(engine, playbin)
+    assert playbin.props['flags'] == 0x17
+    assert playbin.events == []
+
+class StuckPlaybin(FakePlaybin):
+    # Nem válaszoló HTTP forrás: a NULL-ba váltás addig vár, amíg a teszt el nem engedi
+    def __init__(self, release):
+        super().__init__()
+        self.release = release
+
+    def set_state(self, state):
+        if state == FakeGst.State.NULL:
+            self.release.wait(10)
+        super().set_state(state)
+
+@pytest.mark.parametrize("engine", ["playbin"], indirect=True)
+def test_stuck_teardown_does_not_delay_next_station(engine):
+    release = threading.Event()
+    stuck = StuckPlaybin(release)
+    engine.idle = [stuck]
+    first = engine.play("http://example.invalid/dead")
+    assert first is stuck
+    settle(engine, first)
+    second = engine.play("http://example.invalid/live")
+    try:
+        # A régi pipeline lebontása beragadt, az új adás mégis elindul
+        settle(engine, second)
+        assert second.states == [FakeGst.State.PLAYING]
+        assert stuck.states == [FakeGst.State.PLAYING]
+        assert stuck not in engine.idle # A készletbe csak a lebontás után kerülhet vissza
+    finally:
+        release.set()
+    settle(engine, stuck)
+    assert stuck.states[-1] == FakeGst.State.NULL
+
+class StateMessage:
+    def __init__(self, src, new):
+        self.src = src
+        self.new = new
+
+    def parse_state_changed(self):
+        return None, self.new, None
+
+@pytest.mark.parametrize("engine", ["playbin"], indirect=True)
+def test_old_preroll_expires(engine, monkeypatch):
+    engine.preroll([("http://example.invalid/next", None)])
+    playbin = engine.prerolled["http://example.invalid/next"]
+    engine.on_state_changed(playbin.get_bus(), StateMessage(playbin, FakeGst.State.PAUSED))
+    assert engine._watchdog() # Friss előtöltés: marad, a watchdog tovább figyel
+    assert "http://example.invalid/next" in engine.prerolled
+    later = main.time.time() + engine.PREROLL_MAX_AGE + 1
+    monkeypatch.setattr(main.time, "time", lambda: later)
+    assert not engine._watchdog()
+    assert engine.prerolled == {}
+    assert engine.stats()['expired_prerolls'] == 1
+    settle(engine, playbin)
+    assert playbin.states[-1] == FakeGst.State.NULL
+
+@pytest.mark.parametrize("engine", ["playbin"], indirect=True)
+def test_failed_preroll_is_retried_once(engine):
+    url = "http://example.invalid/next"
+    engine.preroll([(url, None)])
+    prerolled = engine.prerolled[url]
+    assert engine.play(url) is prerolled
+    fresh = engine.retry()
+    assert fresh is not None and fresh is not prerolled
+    assert engine.active is fresh
+    settle(engine, fresh)
+    assert fresh.props['uri'] == url
+    assert fresh.states == [FakeGst.State.PLAYING]
+    assert engine.retry() is None # A friss pipeline hibája már valódi hiba
+    assert engine.stats()['preroll_retries'] == 1
@@ -0,0 +1,68 @@
+# Oszlopos katalógus: facet táblák, származtatott gyorsítótárak és a keresési rangsor
+from conftest import make_record
+import pytest
+
+from main import CATALOG_FIELDS, FACET_COLUMNS, POPULARITY_SPAN, CatalogDB, StationCatalog, StationRanker, sqlite3
+
+def facet_catalog(count=30, **fields):
+    catalog = StationCatalog.from_records(make_record(i, **fields) for i in range(count))
+    catalog.build_facets()
+    return catalog
+
+def test_derived_caches_are_not_columns():
+    catalog = facet_catalog(tags="tv,news", codec="H.264")
+    facets = catalog.facets()
+    assert list(facets.tv_rows()) == list(range(30))
+    index = facets.bitset_index()
+    ranker = StationRanker.for_catalog(catalog)
+
+    # Ugyanaz az objektum jön vissza, de az oszlopok között nem jelenik meg
+    assert facets.bitset_index() is index
+    assert StationRanker.for_catalog(catalog) is ranker
+    assert set(catalog.columns) == set(CATALOG_FIELDS + FACET_COLUMNS)
+    row = catalog[0]
+    for key in ('facet:bitset_index', 'facet:tv_rows', 'rank:ranker', 'bitset_index', 'tv_rows', 'ranker'):
+        assert key not in row
+        assert row.get(key) is None
+
+def test_derived_caches_per_catalog():
+    catalog = facet_catalog()
+    merged = catalog.merged([make_record(99)])
+    merged.build_facets()
+    assert StationRanker.for_catalog(merged) is not StationRanker.for_catalog(catalog)
+    assert StationRanker.for_catalog(merged).catalog is merged
+
+def ranked_names(catalog, query):
+    ranked = StationRanker.for_catalog(catalog).rank(range(len(catalog)), query, 10)
+    return [ranked[i]['name'] for i in range(len(ranked))]
+
+def popular_vs_exact_records():
+    # Óriási népszerűségű, de csak címkében egyező állomás vs. pontos névegyezés népszerűség nélkül
+    return [
+        make_record(0, name="Jazz", votes=0, clickcount=0, clicktrend=-500, bitrate=0),
+        make_record(1, name="Radio Mega", tags="jazz", votes=10 ** 7, clickcount=10 ** 7, clicktrend=10 ** 5, bitrate=320),
+        make_record(2, name="Jazz FM", votes=0, clickcount=0, clicktrend=0, bitrate=0),
+        make_record(3, name="Smooth Jazz", votes=10 ** 6, clickcount=10 ** 6, clicktrend=1000, bitrate=320),
+        make_record(4, name="Radio Two", tags="pop,jazz", votes=10 ** 7, clickcount=10 ** 7, clicktrend=10 ** 5, bitrate=320),
+    ]
+
+def test_match_quality_dominates_popularity():
+    catalog = StationCatalog.from_records(popular_vs_exact_records())
+    catalog.build_facets()
+    assert ranked_names(catalog, "jazz")[:3] == ["Jazz", "Jazz FM", "Smooth Jazz"]
+
+def test_popularity_orders_within_a_tier():
+    records = [make_record(i, name=f"Rock {i}", votes=v, clickcount=v) for i, v in enumerate((5, 5000, 50))]
+    catalog = StationCatalog.from_records(records)
+    assert ranked_names(catalog, "rock") == ["Rock 1", "Rock 2", "Rock 0"]
+    popularity = StationRanker.for_catalog(catalog).popularity
+    assert min(popularity) >= 0.0
+    assert max(popularity) <= POPULARITY_SPAN
+
+@pytest.mark.skipif(sqlite3 is None, reason="sqlite3 nem elérhető")
+def test_sqlite_store_ranks_like_memory(tmp_path):
+    db = CatalogDB(str(tmp_path / "catalog.sqlite3"))
+    db.replace_catalog(StationCatalog.from_records(popular_vs_exact_records()), None)
+    results = db.query("all", "jazz")
+    assert [results[i]['name'] for i in range(3)] == ["Jazz", "Jazz FM", "Smooth Jazz"]
+    db.close()